@@ -14,18 +14,23 @@ CORS(app, origins=[
 # Handler para adicionar CORS em todas as respostas
 @app.after_request
 def after_request(response):
-    origin = request.headers.get('Origin', '')
-    # Permite qualquer origem vercel.app
-    if origin.endswith('.vercel.app') or origin == 'http://localhost:3000':
-        response.headers['Access-Control-Allow-Origin'] = origin
-        response.headers['Access-Control-Allow-Headers'] = 'Content-Type,Authorization'
-        response.headers['Access-Control-Allow-Methods'] = 'GET,POST,PUT,DELETE,OPTIONS'
+    # Permite qualquer origem vercel.app (regra em gateway.allowed_origin)
+    response.headers.update(gateway.cors_headers(request.headers.get('Origin', '')))
     return response
 
 @app.route('/health', methods=['GET'])
 def health():
     """Endpoint para verificar se o Gateway está funcionando"""
-    return {'status': 'API Gateway is running!'}, 200
+    return {'status': 'API Gateway is running!', 'auth': gateway.get_auth_stats()}, 200
+
+@app.route('/gateway/metrics', methods=['GET'])
+def metrics():
+    """Métricas dos pools de conexão, da verificação de tokens e a tabela de rotas"""
+    return {
+        'upstreams': gateway.get_upstream_stats(),
+        'auth': gateway.get_auth_stats(),
+        'routes': gateway.get_route_table()
+    }, 200
 
 # Rota catch-all que captura TODAS as requisições e delega para o gateway
 @app.route('/<path:path>', methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH'])
@@ -0,0 +1,136 @@
+from quart import Quart, request, jsonify, Response
+import asyncio
+import math
+import time
+import httpx
+import async_proxy
+import gateway
+import request_log
+import resilience
+import routes
+import upstream_pool
+import os
+
+# Modo assíncrono do gateway (GATEWAY_MODE=async no Dockerfile): mesma
+# autenticação e roteamento do app.py, mas servido por ASGI (Hypercorn) e com
+# corpos de requisição e resposta repassados em streaming, sem reinterpretar
+app = Quart(__name__)
+
+# Sem limite de tamanho: o corpo não é acumulado no gateway
+app.config['MAX_CONTENT_LENGTH'] = None
+
+_upstreams = async_proxy.AsyncUpstreamPool(
+    pool_size=upstream_pool.UPSTREAM_POOL_SIZE,
+    connect_timeout=upstream_pool.UPSTREAM_CONNECT_TIMEOUT
+)
+
+# Handler para adicionar CORS em todas as respostas (mesma regra do app.py)
+@app.after_request
+async def after_request(response):
+    # Permite qualquer origem vercel.app (regra em gateway.allowed_origin)
+    response.headers.update(gateway.cors_headers(request.headers.get('Origin', '')))
+    return response
+
+@app.after_serving
+async def close_upstreams():
+    await _upstreams.aclose()
+
+@app.route('/health', methods=['GET'])
+async def health():
+    """Endpoint para verificar se o Gateway está funcionando"""
+    return {'status': 'API Gateway is running!', 'mode': 'async', 'auth': gateway.get_auth_stats()}, 200
+
+@app.route('/gateway/metrics', methods=['GET'])
+async def metrics():
+    """Métricas das conexões, da verificação de tokens e a tabela de rotas"""
+    return {
+        'upstreams': _upstreams.stats(),
+        'auth': gateway.get_auth_stats(),
+        'routes': gateway.get_route_table()
+    }, 200
+
+# Rota catch-all que captura TODAS as requisições e faz o proxy em streaming
+@app.route('/<path:path>', methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH'])
+async def catch_all(path):
+    """Autentica e repassa a requisição para o microserviço"""
+    started = time.monotonic()
+    path = request.path
+    method = request.method
+    auth_header = request.headers.get('Authorization')
+
+    # Uma consulta na tabela: serviço, autenticação, timeout e cache da rota
+    route = routes.resolve(path)
+
+    # A consulta ao Auth Service é bloqueante: roda fora do event loop
+    if gateway.token_check_blocks():
+        error, user_id = await asyncio.to_thread(gateway.authenticate, route, auth_header)
+    else:
+        error, user_id = gateway.authenticate(route, auth_header)
+    if error:
+        request_log.log_request(method, path, route, 401, started)
+        return jsonify({'error': error}), 401
+
+    if not route.service_url:
+        request_log.log_request(method, path, route, 404, started, user_id)
+        return jsonify({'error': 'Service not found'}), 404
+
+    if method not in ('GET', 'POST', 'PUT', 'DELETE'):
+        request_log.log_request(method, path, route, 405, started, user_id)
+        return jsonify({'error': 'Method not allowed'}), 405
+
+    try:
+        upstream = await _upstreams.call(
+            route.service_url,
+            method,
+            path,
+            query_string=request.query_string,
+            headers=async_proxy.upstream_request_headers(request.headers),
+            body=request.body if method in ('POST', 'PUT') else None,
+            read_timeout=route.timeout
+        )
+    except resilience.CircuitOpenError as e:
+        request_log.log_request(method, path, route, 503, started, user_id, error=e)
+        return jsonify({'error': 'Service unavailable'}), 503, {'Retry-After': str(math.ceil(e.retry_after))}
+    except httpx.TimeoutException as e:
+        request_log.log_request(method, path, route, 504, started, user_id, error=e)
+        return jsonify({'error': 'Service timeout'}), 504
+    except httpx.TransportError as e:
+        request_log.log_request(method, path, route, 503, started, user_id, error=e)
+        return jsonify({'error': 'Service unavailable'}), 503
+    except Exception as e:
+        request_log.log_request(method, path, route, 500, started, user_id, error=e)
+        return jsonify({'error': 'Internal gateway error'}), 500
+
+    # Registrado quando chegam os cabeçalhos (o corpo pode ser um stream longo)
+    request_log.log_request(method, path, route, upstream.status_code, started, user_id)
+
+    # Status, cabeçalhos e bytes do corpo exatamente como o microserviço enviou
+    headers = async_proxy.client_response_headers(upstream.headers)
+    headers += gateway.cache_headers(route, method, upstream.status_code, upstream.headers).items()
+    response = Response(
+        _upstreams.stream(route.service_url, upstream, route, started, user_id),
+        status=upstream.status_code,
+        headers=headers
+    )
+    # Sem timeout para respostas longas (SSE/NDJSON); o de leitura é do upstream
+    response.timeout = None
+    return response
+
+# Rota raiz
+@app.route('/', methods=['GET'])
+async def root():
+    return {
+        'message': 'Chess Microservices API Gateway',
+        'version': '1.0.0',
+        'services': {
+            'auth': '/auth/*',
+            'game': '/games/*',
+            'ai': '/ai/*',
+            'history': '/history/*'
+        }
+    }, 200
+
+if __name__ == '__main__':
+    port = int(os.environ.get('PORT', 8000))
+    print(f"🚀 Starting async API Gateway on port {port}...")
+    app.run(host='0.0.0.0', port=port, debug=False)
@@ -0,0 +1,275 @@
+import asyncio
+import threading
+import time
+import httpx
+import request_log
+import resilience
+import routes
+
+# Cabeçalhos que valem só para uma conexão e não são repassados (RFC 9110, 7.6.1)
+HOP_BY_HOP_HEADERS = {
+    'connection',
+    'keep-alive',
+    'proxy-authenticate',
+    'proxy-authorization',
+    'te',
+    'trailer',
+    'transfer-encoding',
+    'upgrade'
+}
+
+# Não seguem para o microserviço: o host é o do upstream e o token já foi conferido aqui
+REQUEST_DROP_HEADERS = HOP_BY_HOP_HEADERS | {'host', 'authorization'}
+# Date e Server são escritos pelo próprio servidor ASGI (evita duplicá-los)
+RESPONSE_DROP_HEADERS = HOP_BY_HOP_HEADERS | {'date', 'server'}
+
+def upstream_request_headers(headers):
+    """Cabeçalhos da requisição do cliente que seguem para o microserviço"""
+    return [(name, value) for name, value in headers.items() if name.lower() not in REQUEST_DROP_HEADERS]
+
+def client_response_headers(headers):
+    """
+    Cabeçalhos da resposta do microserviço devolvidos ao cliente. O corpo
+    é repassado sem decodificar, então Content-Length e Content-Encoding
+    continuam valendo; respostas chunked (NDJSON, SSE) seguem chunked.
+    """
+    return [(name, value) for name, value in headers.multi_items() if name.lower() not in RESPONSE_DROP_HEADERS]
+
+class AsyncUpstreamPool:
+    """
+    Um httpx.AsyncClient por microserviço (pool keep-alive no event loop do
+    gateway). As respostas são lidas em streaming: o corpo passa para o
+    cliente à medida que chega, sem bufferizar nem reinterpretar o JSON.
+    call() acrescenta circuit breaker, novas tentativas e hedge (ver resilience.py)
+    """
+
+    def __init__(self, pool_size=20, connect_timeout=3.05):
+        self.pool_size = max(1, pool_size)
+        self.connect_timeout = connect_timeout
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._breakers = {}
+        self._budgets = {}
+
+    def client(self, base_url):
+        """AsyncClient do microserviço (criado no primeiro uso, dentro do event loop)"""
+        client = self._clients.get(base_url)
+        if client is None:
+            client = httpx.AsyncClient(
+                base_url=base_url,
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size
+                ),
+                follow_redirects=False
+            )
+            self._clients[base_url] = client
+            with self._lock:
+                self._breakers.setdefault(base_url, resilience.new_breaker(base_url))
+                self._budgets.setdefault(base_url, resilience.new_budget())
+                self._metrics[base_url] = {
+                    'requests': 0,
+                    'errors': 0,
+                    'timeouts': 0,
+                    'in_flight': 0,
+                    'streaming': 0,
+                    'retries': 0,
+                    'hedges': 0,
+                    'hedges_won': 0,
+                    'total_time': 0.0,
+                    'bytes_streamed': 0,
+                    'status_codes': {}
+                }
+        return client
+
+    def _timeout(self, path, read_timeout=None):
+        if read_timeout is None:
+            read_timeout = routes.resolve(path).timeout
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=read_timeout,
+            write=read_timeout,
+            pool=self.connect_timeout
+        )
+
+    async def open(self, base_url, method, path, query_string=b'', headers=None, body=None, read_timeout=None):
+        """
+        Envia a requisição (corpo em streaming) e retorna a resposta assim
+        que os cabeçalhos chegam. O corpo deve ser consumido com stream().
+        """
+        client = self.client(base_url)
+        metrics = self._metrics[base_url]
+        # Query string repassada como veio (sem re-encode)
+        target = f"{path}?{query_string.decode('latin-1')}" if query_string else path
+        request = client.build_request(
+            method,
+            target,
+            headers=headers,
+            content=body,
+            timeout=self._timeout(path, read_timeout)
+        )
+        self._update(metrics, in_flight=1)
+        started = time.monotonic()
+        try:
+            response = await client.send(request, stream=True)
+        except httpx.TimeoutException:
+            self._update(metrics, in_flight=-1, requests=1, timeouts=1, total_time=time.monotonic() - started)
+            raise
+        except httpx.HTTPError:
+            self._update(metrics, in_flight=-1, requests=1, errors=1, total_time=time.monotonic() - started)
+            raise
+        except asyncio.CancelledError:
+            # Cópia de hedge descartada (ou cliente desconectou)
+            self._update(metrics, in_flight=-1)
+            raise
+
+        # Latência registrada até os cabeçalhos (o corpo pode ser um stream longo)
+        self._update(metrics, in_flight=-1, requests=1, streaming=1, total_time=time.monotonic() - started)
+        with self._lock:
+            key = str(response.status_code)
+            metrics['status_codes'][key] = metrics['status_codes'].get(key, 0) + 1
+        return response
+
+    async def call(self, base_url, method, path, query_string=b'', headers=None, body=None, read_timeout=None):
+        """
+        open() protegido pelo circuit breaker do microserviço, com novas
+        tentativas para GET (dentro do orçamento) e hedge nas rotas
+        configuradas. Levanta resilience.CircuitOpenError com o circuito aberto
+        """
+        self.client(base_url)
+        breaker = self._breakers[base_url]
+        budget = self._budgets[base_url]
+        metrics = self._metrics[base_url]
+        budget.record_request()
+        attempts = 1 + (resilience.UPSTREAM_RETRIES if resilience.can_retry(method) else 0)
+
+        for attempt in range(attempts):
+            trial = breaker.before_request()
+            try:
+                if resilience.should_hedge(method, path):
+                    response = await self._hedged(base_url, method, path, query_string, headers, read_timeout)
+                else:
+                    response = await self.open(base_url, method, path, query_string, headers, body, read_timeout)
+            except httpx.HTTPError:
+                breaker.record_failure()
+                if attempt + 1 < attempts and budget.try_spend():
+                    self._update(metrics, retries=1)
+                    await asyncio.sleep(resilience.RETRY_BACKOFF * (2 ** attempt))
+                    continue
+                raise
+            except BaseException:
+                # Cancelada (cliente desconectou) ou erro do próprio gateway:
+                # sem veredito sobre o microserviço, a vaga de teste é devolvida
+                breaker.release(trial)
+                raise
+
+            # Respostas normais e 503 de excesso de carga (com Retry-After) vão direto ao cliente
+            if not resilience.is_upstream_failure(response.status_code, response.headers):
+                breaker.record_success()
+                return response
+
+            breaker.record_failure()
+            if attempt + 1 < attempts and budget.try_spend():
+                await self._discard(base_url, response)
+                self._update(metrics, retries=1)
+                await asyncio.sleep(resilience.RETRY_BACKOFF * (2 ** attempt))
+                continue
+            return response
+
+    async def _hedged(self, base_url, method, path, query_string, headers, read_timeout):
+        """Dispara uma segunda cópia se a primeira demorar; vale a primeira resposta"""
+        metrics = self._metrics[base_url]
+        first = asyncio.ensure_future(self.open(base_url, method, path, query_string, headers, None, read_timeout))
+        done, _ = await asyncio.wait({first}, timeout=resilience.HEDGE_DELAY)
+        if done or not self._budgets[base_url].try_spend():
+            return await first
+
+        self._update(metrics, hedges=1)
+        second = asyncio.ensure_future(self.open(base_url, method, path, query_string, headers, None, read_timeout))
+        pending = {first, second}
+        winner = None
+        error = None
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                    elif winner is None:
+                        winner = task
+                    else:
+                        # As duas responderam juntas: a sobra é fechada
+                        await self._discard(base_url, task.result())
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if winner is None:
+            raise error
+        if winner is second:
+            self._update(metrics, hedges_won=1)
+        return winner.result()
+
+    async def _discard(self, base_url, response):
+        """Fecha uma resposta aberta que não vai para o cliente"""
+        await response.aclose()
+        self._update(self._metrics[base_url], streaming=-1)
+
+    async def stream(self, base_url, response, route=None, started=None, user_id=None):
+        """
+        Repassa os bytes do corpo como chegaram e fecha a resposta no fim.
+        route/started/user_id são os da requisição, para o log de erro
+        """
+        metrics = self._metrics[base_url]
+        sent = 0
+        try:
+            async for chunk in response.aiter_raw():
+                sent += len(chunk)
+                yield chunk
+        except httpx.HTTPError as e:
+            # Os cabeçalhos já foram enviados: só resta interromper o corpo
+            self._update(metrics, errors=1)
+            path = response.request.url.path
+            request_log.log_request(
+                response.request.method,
+                path,
+                route or routes.resolve(path),
+                response.status_code,
+                started if started is not None else time.monotonic(),
+                user_id,
+                error=f'upstream stream interrupted after {sent} bytes: {e}'
+            )
+        finally:
+            await response.aclose()
+            self._update(metrics, streaming=-1, bytes_streamed=sent)
+
+    def _update(self, metrics, **deltas):
+        with self._lock:
+            for name, value in deltas.items():
+                metrics[name] += value
+
+    def stats(self):
+        """Métricas por microserviço"""
+        with self._lock:
+            snapshot = {url: dict(m, status_codes=dict(m['status_codes'])) for url, m in self._metrics.items()}
+        upstreams = {}
+        for url, metrics in snapshot.items():
+            total_time = metrics.pop('total_time')
+            metrics['avg_latency_ms'] = round(total_time / metrics['requests'] * 1000, 2) if metrics['requests'] else 0.0
+            metrics['circuit'] = self._breakers[url].stats()
+            metrics['retry_budget'] = self._budgets[url].stats()
+            upstreams[url] = metrics
+        return {
+            'mode': 'async',
+            'pool_size': self.pool_size,
+            'connect_timeout': self.connect_timeout,
+            'resilience': resilience.settings(),
+            'upstreams': upstreams
+        }
+
+    async def aclose(self):
+        clients = list(self._clients.values())
+        self._clients = {}
+        for client in clients:
+            await client.aclose()
@@ -1,31 +1,31 @@
 import requests
 from flask import request, jsonify
-import os
-
-# URLs dos microserviços (vêm das variáveis de ambiente)
-AUTH_SERVICE_URL = os.getenv('AUTH_SERVICE_URL', 'http://localhost:8001')
-GAME_SERVICE_URL = os.getenv('GAME_SERVICE_URL', 'http://localhost:8003')
-AI_SERVICE_URL = os.getenv('AI_SERVICE_URL', 'http://localhost:8004')
-HISTORY_SERVICE_URL = os.getenv('HISTORY_SERVICE_URL', 'http://localhost:8005')
-RECOMMENDATION_SERVICE_URL = os.getenv('RECOMMENDATION_SERVICE_URL', 'http://localhost:8006')
-MULTIPLAYER_SERVICE_URL = os.getenv('MULTIPLAYER_SERVICE_URL', 'http://localhost:8007')
-
-# Rotas que não precisam de autenticação
-PUBLIC_ROUTES = [
-    '/auth/register',
-    '/auth/login',
-    '/health',
-    '/rooms', # Listagem de salas é pública
-    '/recommendations'
-]
+import math
+import time
+import request_log
+import resilience
+import routes
+import token_verifier
+import upstream_pool
 
-def verify_token(token):
+# Serviço, autenticação, timeout e cache de cada rota ficam em routes.py
+AUTH_SERVICE_URL = routes.SERVICES['auth']
+
+# Conexões keep-alive reaproveitadas com cada microserviço
+_upstreams = upstream_pool.UpstreamPool(
+    pool_size=upstream_pool.UPSTREAM_POOL_SIZE,
+    pool_block=upstream_pool.UPSTREAM_POOL_BLOCK,
+    connect_timeout=upstream_pool.UPSTREAM_CONNECT_TIMEOUT
+)
+
+def verify_token_remote(token):
     """Verifica o token JWT com o serviço de autenticação."""
     try:
-        response = requests.post(
-            f'{AUTH_SERVICE_URL}/auth/verify-token',
-            json={'token': token},
-            timeout=5
+        response = _upstreams.request(
+            AUTH_SERVICE_URL,
+            'POST',
+            '/auth/verify-token',
+            json={'token': token}
         )
         if response.status_code == 200:
             data = response.json()
@@ -34,81 +34,129 @@ def verify_token(token):
     except Exception as e:
         print(f'Error verifying token: {e}')
         return False, None
+
+# Verificação local dos tokens (HS256), com cache até o `exp`
+_verifier = token_verifier.TokenVerifier(
+    token_verifier.KeyRing(
+        token_verifier.JWT_KEYS,
+        keys_file=token_verifier.JWT_KEYS_FILE,
+        legacy_secret=token_verifier.SECRET_KEY,
+        reload_interval=token_verifier.JWT_KEYS_RELOAD_INTERVAL
+    ),
+    verify_token_remote,
+    remote_fallback=token_verifier.JWT_REMOTE_FALLBACK,
+    cache_size=token_verifier.TOKEN_CACHE_SIZE
+)
+
+def verify_token(token):
+    """Verifica o token JWT localmente (ou no Auth Service, se configurado)."""
+    return _verifier.verify(token)
+
+def get_auth_stats():
+    """Métricas da verificação de tokens"""
+    return _verifier.stats()
+
+def get_upstream_stats():
+    """Métricas dos pools de conexão com os microserviços"""
+    return _upstreams.stats()
     
-def is_public_route(path):
-    """Verifica se a rota é pública."""
-    for public_route in PUBLIC_ROUTES:
-        if path.startswith(public_route):
-            return True
-    return False
-
-def get_service_url(path):
-    """Determina qual microsserviço deve receber a requisição baseado no path"""
-    print(f"🔍 Checking path: {path}")  # DEBUG
-    
-    if path.startswith('/auth'):
-        print(f"✅ Routing to AUTH_SERVICE_URL: {AUTH_SERVICE_URL}")
-        return AUTH_SERVICE_URL
-    elif path.startswith('/games'):
-        print(f"✅ Routing to GAME_SERVICE_URL: {GAME_SERVICE_URL}")
-        return GAME_SERVICE_URL
-    elif path.startswith('/ai'):
-        print(f"✅ Routing to AI_SERVICE_URL: {AI_SERVICE_URL}")
-        return AI_SERVICE_URL
-    elif path.startswith('/history'):
-        print(f"✅ Routing to HISTORY_SERVICE_URL: {HISTORY_SERVICE_URL}")
-        return HISTORY_SERVICE_URL
-    elif path.startswith('/recommendations'):
-        print(f"✅ Routing to RECOMMENDATION_SERVICE_URL: {RECOMMENDATION_SERVICE_URL}")
-        return RECOMMENDATION_SERVICE_URL
-    elif path.startswith('/multiplayer') or path.startswith('/rooms'):
-        print(f"✅ Routing to MULTIPLAYER_SERVICE_URL: {MULTIPLAYER_SERVICE_URL}")
-        return MULTIPLAYER_SERVICE_URL
-    else:
-        print(f"❌ No service found for path: {path}")
-        return None
-    
-def proxy_request(path, method, data=None, headers=None):
+def token_check_blocks():
+    """True se a verificação de token pode chamar o Auth Service (E/S de rede)"""
+    return not _verifier.is_local()
+
+def authenticate(route, auth_header):
+    """
+    Confere o token se a rota exige. Retorna (mensagem de erro, user_id);
+    o erro é None quando a requisição pode seguir
+    """
+    if route.public:
+        return None, None
+
+    if not auth_header:
+        return 'Authorization header missing', None
+
+    # Extrai o token (formato: "Bearer TOKEN")
+    try:
+        token = auth_header.split(' ')[1]
+    except IndexError:
+        return 'Invalid authorization header format', None
+
+    # Verifica o token
+    is_valid, user_id = verify_token(token)
+
+    if not is_valid:
+        return 'Invalid or expired token', None
+
+    # Token válido, pode prosseguir
+    return None, user_id
+
+def allowed_origin(origin):
+    """Origens liberadas no CORS (app.py e asgi_app.py): qualquer vercel.app e o frontend local"""
+    return origin.endswith('.vercel.app') or origin == 'http://localhost:3000'
+
+def cors_headers(origin):
+    """Cabeçalhos de CORS para a origem da requisição (vazio se não for liberada)"""
+    if not allowed_origin(origin):
+        return {}
+    return {
+        'Access-Control-Allow-Origin': origin,
+        'Access-Control-Allow-Headers': 'Content-Type,Authorization',
+        'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
+    }
+
+def cache_headers(route, method, status, upstream_headers):
+    """Cache-Control da rota para GET 2xx, se o microserviço não mandou o seu"""
+    if route.cache and method == 'GET' and 200 <= status < 300 and 'Cache-Control' not in upstream_headers:
+        return {'Cache-Control': route.cache}
+    return {}
+
+def proxy_request(path, method, data=None, headers=None, route=None):
     """Faz proxy da requisição para o microserviço apropriado."""
     # Determina qual serviço usar
-    service_url = get_service_url(path)
+    if route is None:
+        route = routes.resolve(path)
 
-    if not service_url:
+    if not route.service_url:
         return jsonify({'error': 'Service not found'}), 404
     
-    # Monta a URL completa
-    url = f'{service_url}{path}'
-
     # Prepara os headers (sem o authorization)
     proxy_headers = {
         'Content-Type': 'application/json'
     }
 
+    if method not in ('GET', 'POST', 'PUT', 'DELETE'):
+        return jsonify({'error': 'Method not allowed'}), 405
+
     try:
-        # Faz a requisição para o microserviço
-        if method == 'GET':
-            response = requests.get(url, headers=proxy_headers, timeout=30)
-        elif method == 'POST':
-            response = requests.post(url, json=data, headers=proxy_headers, timeout=30)
-        elif method == 'PUT':
-            response = requests.put(url, json=data, headers=proxy_headers, timeout=30)
-        elif method == 'DELETE':
-            response = requests.delete(url, headers=proxy_headers, timeout=30)
-        else:
-            return jsonify({'error': 'Method not allowed'}), 405
+        # Faz a requisição para o microserviço (conexão do pool, timeout da rota,
+        # circuit breaker, novas tentativas e hedge)
+        response = _upstreams.call(
+            route.service_url,
+            method,
+            path,
+            json=data if method in ('POST', 'PUT') else None,
+            headers=proxy_headers,
+            read_timeout=route.timeout
+        )
+        extra_headers = cache_headers(route, method, response.status_code, response.headers)
+        # O corpo é refeito pelo jsonify: repassa o prazo pedido pelo microserviço
+        if 'Retry-After' in response.headers:
+            extra_headers['Retry-After'] = response.headers['Retry-After']
         
         # Retorna a resposta do microserviço
         try: 
-            return jsonify(response.json()), response.status_code
+            return jsonify(response.json()), response.status_code, extra_headers
         except:
-            return jsonify({'data': response.text}), response.status_code
+            return jsonify({'data': response.text}), response.status_code, extra_headers
         
+    except resilience.CircuitOpenError as e:
+        return jsonify({'error': 'Service unavailable'}), 503, {'Retry-After': str(math.ceil(e.retry_after))}
     except requests.exceptions.Timeout:
         return jsonify({'error': 'Service timeout'}), 504
     except requests.exceptions.ConnectionError:
         return jsonify({'error': 'Service unavailable'}), 503
     except Exception as e:
-        print(f'Error proxying request: {e}')
+        request_log.log_event('proxy_error', method=method, path=path, error=str(e))
         return jsonify({'error': 'Internal gateway error'}), 500
 
 def handle_request():
@@ -119,31 +167,25 @@ def handle_request():
         3. faz proxy da requisição para o microserviço apropriado.
     """
 
+    started = time.monotonic()
     path = request.path
     method = request.method
     data = request.get_json() if request.is_json else None
 
-    # Se não for rota pública, verifica autenticação
-    if not is_public_route(path):
-        auth_header = request.headers.get('Authorization')
-
-        if not auth_header:
-            return jsonify({'error': 'Authorization header missing'}), 401
-        
-        # Extrai o token (formato: "Bearer TOKEN")
-        try:
-            token = auth_header.split(' ')[1]
-        except IndexError:
-            return jsonify({'error': 'Invalid authorization header format'}), 401
-        
-        # Verifica o token
-        is_valid, user_id = verify_token(token)
+    # Uma consulta na tabela: serviço, autenticação, timeout e cache da rota
+    route = routes.resolve(path)
 
-        if not is_valid:
-            return jsonify({'error': 'Invalid or expired token'}), 401
-        
-        # Token válido, pode prosseguir
-        print(f'Authenticated request from user: {user_id}')
+    # Se não for rota pública, verifica autenticação
+    error, user_id = authenticate(route, request.headers.get('Authorization'))
+    if error:
+        request_log.log_request(method, path, route, 401, started)
+        return jsonify({'error': error}), 401
 
     # Faz proxy da requisição
-    return proxy_request(path, method, data, request.headers)
\ No newline at end of file
+    response = proxy_request(path, method, data, request.headers, route=route)
+    request_log.log_request(method, path, route, response[1], started, user_id)
+    return response
+
+def get_route_table():
+    """Rotas resolvidas (para as métricas)"""
+    return routes.table.describe()
\ No newline at end of file
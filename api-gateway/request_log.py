@@ -0,0 +1,37 @@
+import json
+import os
+import random
+import time
+
+# Fração das requisições registradas; erros (5xx/exceção) e respostas mais
+# lentas que LOG_SLOW_MS são sempre registrados
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 0.01))
+LOG_SLOW_MS = float(os.environ.get('LOG_SLOW_MS', 2000))
+
+def _emit(record):
+    # Uma linha JSON por evento (fácil de filtrar nos logs do Docker/Render)
+    print(json.dumps(record, separators=(',', ':'), default=str), flush=True)
+
+def log_request(method, path, route, status, started, user_id=None, error=None):
+    """Registra uma requisição proxyada, por amostragem"""
+    elapsed_ms = (time.monotonic() - started) * 1000
+    if error is None and status < 500 and elapsed_ms < LOG_SLOW_MS and random.random() >= LOG_SAMPLE_RATE:
+        return
+    record = {
+        'ts': round(time.time(), 3),
+        'event': 'proxy',
+        'method': method,
+        'path': path,
+        'route': route.prefix or None,
+        'upstream': route.service_url,
+        'status': status,
+        'ms': round(elapsed_ms, 1),
+        'user_id': user_id
+    }
+    if error is not None:
+        record['error'] = str(error)
+    _emit(record)
+
+def log_event(event, **fields):
+    """Registra um evento avulso (sempre)"""
+    _emit(dict({'ts': round(time.time(), 3), 'event': event}, **fields))
@@ -0,0 +1,207 @@
+import os
+import re
+import threading
+import time
+from collections import deque
+
+# Circuit breaker por microserviço: abre depois de N falhas seguidas
+# (timeout, conexão recusada, 502/504 ou 503 sem Retry-After) e rejeita na hora por
+# BREAKER_RESET_TIMEOUT segundos; depois deixa passar poucas requisições de teste
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get('BREAKER_FAILURE_THRESHOLD', 5))
+BREAKER_RESET_TIMEOUT = float(os.environ.get('BREAKER_RESET_TIMEOUT', 15))
+BREAKER_HALF_OPEN_REQUESTS = int(os.environ.get('BREAKER_HALF_OPEN_REQUESTS', 1))
+
+# Novas tentativas (só GET) e orçamento: no máximo RETRY_BUDGET_RATIO das
+# requisições dos últimos RETRY_BUDGET_WINDOW segundos, mais RETRY_BUDGET_MIN_PER_SEC
+UPSTREAM_RETRIES = int(os.environ.get('UPSTREAM_RETRIES', 1))
+RETRY_BACKOFF = float(os.environ.get('RETRY_BACKOFF', 0.05))
+RETRY_BUDGET_RATIO = float(os.environ.get('RETRY_BUDGET_RATIO', 0.2))
+RETRY_BUDGET_MIN_PER_SEC = float(os.environ.get('RETRY_BUDGET_MIN_PER_SEC', 1))
+RETRY_BUDGET_WINDOW = float(os.environ.get('RETRY_BUDGET_WINDOW', 10))
+
+# Hedged requests: GETs nestas rotas (regex) ganham uma segunda cópia se a
+# primeira não responder em HEDGE_DELAY segundos; vale a que chegar antes.
+# As cópias saem do mesmo orçamento das novas tentativas. HEDGE_DELAY=0 desliga
+HEDGE_ROUTES = os.environ.get('HEDGE_ROUTES', r'^/games/[^/]+$')
+HEDGE_DELAY = float(os.environ.get('HEDGE_DELAY', 0.25))
+
+# Respostas que contam como falha do microserviço (e podem ser repetidas)
+RETRYABLE_STATUS = {502, 503, 504}
+
+def is_upstream_failure(status, headers):
+    """
+    Status que indica microserviço com problema. Um 503 com Retry-After é
+    rejeição deliberada por excesso de carga (ex.: controle de admissão do
+    AI Service): o serviço está de pé, então não abre o circuito nem é
+    repetido antes do prazo que ele pediu.
+    """
+    if status not in RETRYABLE_STATUS:
+        return False
+    return not (status == 503 and 'Retry-After' in headers)
+
+class CircuitOpenError(Exception):
+    """O circuito do microserviço está aberto: a requisição nem é enviada"""
+
+    def __init__(self, upstream, retry_after):
+        super().__init__(f'Circuit open for {upstream}')
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """Estados closed -> open -> half_open -> closed (ou open de novo)"""
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=15, half_open_requests=1):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.half_open_requests = max(1, half_open_requests)
+        self.state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_at = 0.0
+        self._trials = 0
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.rejected = 0
+
+    def before_request(self):
+        """
+        Levanta CircuitOpenError se a requisição não pode sair agora. Retorna
+        True se ela ocupou uma vaga de teste do half_open (ver release)
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.state == 'open':
+                waited = now - self._opened_at
+                if waited < self.reset_timeout:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, self.reset_timeout - waited)
+                self.state = 'half_open'
+                self._half_open_at = now
+                self._trials = 0
+            if self.state == 'half_open':
+                if self._trials >= self.half_open_requests:
+                    waited = now - self._half_open_at
+                    if waited < self.reset_timeout:
+                        self.rejected += 1
+                        raise CircuitOpenError(self.name, self.reset_timeout - waited)
+                    # Testes sem resultado há reset_timeout: considerados perdidos
+                    self._half_open_at = now
+                    self._trials = 0
+                self._trials += 1
+                return True
+            return False
+
+    def release(self, trial):
+        """Devolve a vaga de teste de uma requisição que terminou sem veredito (cancelada ou erro do gateway)"""
+        if not trial:
+            return
+        with self._lock:
+            if self.state == 'half_open' and self._trials > 0:
+                self._trials -= 1
+
+    def record_success(self):
+        with self._lock:
+            if self.state != 'closed':
+                print(f"✅ Circuit closed for {self.name}")
+            self.state = 'closed'
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == 'half_open' or self._failures >= self.failure_threshold:
+                if self.state != 'open':
+                    self.opened += 1
+                    print(f"🔴 Circuit opened for {self.name} after {self._failures} failures")
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self._failures,
+                'opened': self.opened,
+                'rejected': self.rejected
+            }
+
+class RetryBudget:
+    """Limita novas tentativas e hedges a uma fração do tráfego recente"""
+
+    def __init__(self, ratio=0.2, min_per_sec=1, window=10):
+        self.ratio = ratio
+        self.min_per_sec = min_per_sec
+        self.window = window
+        self._requests = deque()
+        self._retries = deque()
+        self._lock = threading.Lock()
+        self.denied = 0
+
+    def _trim(self, now):
+        for events in (self._requests, self._retries):
+            while events and now - events[0] > self.window:
+                events.popleft()
+
+    def record_request(self):
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            self._requests.append(now)
+
+    def try_spend(self):
+        """True (e consome) se ainda há orçamento para mais uma tentativa"""
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            allowed = self.min_per_sec * self.window + self.ratio * len(self._requests)
+            if len(self._retries) >= allowed:
+                self.denied += 1
+                return False
+            self._retries.append(now)
+            return True
+
+    def stats(self):
+        with self._lock:
+            self._trim(time.monotonic())
+            return {
+                'requests_in_window': len(self._requests),
+                'retries_in_window': len(self._retries),
+                'denied': self.denied
+            }
+
+_hedge_patterns = [re.compile(p.strip()) for p in HEDGE_ROUTES.split(',') if p.strip()]
+
+def should_hedge(method, path):
+    """GET numa rota configurada para hedge"""
+    return HEDGE_DELAY > 0 and method == 'GET' and any(p.match(path) for p in _hedge_patterns)
+
+def can_retry(method):
+    """Só métodos idempotentes sem corpo são repetidos"""
+    return method == 'GET' and UPSTREAM_RETRIES > 0
+
+def new_breaker(name):
+    return CircuitBreaker(
+        name,
+        failure_threshold=BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=BREAKER_RESET_TIMEOUT,
+        half_open_requests=BREAKER_HALF_OPEN_REQUESTS
+    )
+
+def new_budget():
+    return RetryBudget(
+        ratio=RETRY_BUDGET_RATIO,
+        min_per_sec=RETRY_BUDGET_MIN_PER_SEC,
+        window=RETRY_BUDGET_WINDOW
+    )
+
+def settings():
+    """Configuração ativa (exposta nas métricas)"""
+    return {
+        'breaker_failure_threshold': BREAKER_FAILURE_THRESHOLD,
+        'breaker_reset_timeout': BREAKER_RESET_TIMEOUT,
+        'retries': UPSTREAM_RETRIES,
+        'retry_budget_ratio': RETRY_BUDGET_RATIO,
+        'hedge_routes': HEDGE_ROUTES,
+        'hedge_delay': HEDGE_DELAY
+    }
@@ -0,0 +1,141 @@
+import json
+import os
+from collections import namedtuple
+
+# URLs dos microserviços (vêm das variáveis de ambiente)
+SERVICES = {
+    'auth': os.getenv('AUTH_SERVICE_URL', 'http://localhost:8001'),
+    'game': os.getenv('GAME_SERVICE_URL', 'http://localhost:8003'),
+    'ai': os.getenv('AI_SERVICE_URL', 'http://localhost:8004'),
+    'history': os.getenv('HISTORY_SERVICE_URL', 'http://localhost:8005'),
+    'recommendation': os.getenv('RECOMMENDATION_SERVICE_URL', 'http://localhost:8006'),
+    'multiplayer': os.getenv('MULTIPLAYER_SERVICE_URL', 'http://localhost:8007')
+}
+
+# Timeout de leitura (s) das rotas que não definem o seu
+UPSTREAM_READ_TIMEOUT = float(os.environ.get('UPSTREAM_READ_TIMEOUT', 30))
+
+# Tabela de rotas por prefixo. Cada entrada herda do prefixo mais curto que
+# a contém o que não definir: service (nome em SERVICES ou URL), public
+# (dispensa token), timeout (leitura, em s) e cache (Cache-Control colocado
+# nos GET 2xx que o microserviço devolver sem um)
+DEFAULT_ROUTES = [
+    {'prefix': '/auth', 'service': 'auth', 'timeout': 10},
+    {'prefix': '/auth/register', 'public': True},
+    {'prefix': '/auth/login', 'public': True},
+    {'prefix': '/health', 'public': True},
+    {'prefix': '/games', 'service': 'game', 'timeout': 10},
+    {'prefix': '/ai', 'service': 'ai', 'timeout': 30},
+    {'prefix': '/history', 'service': 'history', 'timeout': 15},
+    {'prefix': '/recommendations', 'service': 'recommendation', 'public': True, 'timeout': 10},
+    {'prefix': '/multiplayer', 'service': 'multiplayer', 'timeout': 10},
+    {'prefix': '/rooms', 'service': 'multiplayer', 'public': True, 'timeout': 10}
+]
+
+# Entradas extras/sobrescritas: arquivo JSON {"routes": [{"prefix": ..., ...}]}
+GATEWAY_ROUTES_FILE = os.environ.get('GATEWAY_ROUTES_FILE')
+# Atalho só para os timeouts: ROUTE_TIMEOUTS="/ai=45,/auth=5"
+ROUTE_TIMEOUTS = os.environ.get('ROUTE_TIMEOUTS', '')
+
+ROUTE_FIELDS = ('service', 'public', 'timeout', 'cache')
+
+Route = namedtuple('Route', ['prefix', 'service_url', 'public', 'timeout', 'cache'])
+
+# Resultado para paths sem nenhum prefixo configurado
+NO_ROUTE = Route(prefix='', service_url=None, public=False, timeout=UPSTREAM_READ_TIMEOUT, cache=None)
+
+def parse_route_timeouts(value):
+    """Lê "/ai=45,/auth=5" em entradas da tabela"""
+    entries = []
+    for item in value.split(','):
+        prefix, _, seconds = item.strip().partition('=')
+        if prefix and seconds:
+            entries.append({'prefix': prefix.strip(), 'timeout': float(seconds)})
+    return entries
+
+def load_config():
+    """Tabela padrão + GATEWAY_ROUTES_FILE + ROUTE_TIMEOUTS (nessa ordem de prioridade crescente)"""
+    entries = [dict(entry) for entry in DEFAULT_ROUTES]
+    if GATEWAY_ROUTES_FILE:
+        with open(GATEWAY_ROUTES_FILE) as f:
+            entries += json.load(f).get('routes', [])
+    entries += parse_route_timeouts(ROUTE_TIMEOUTS)
+    return entries
+
+class _Node:
+    __slots__ = ('children', 'route')
+
+    def __init__(self):
+        self.children = {}
+        self.route = None
+
+class RouteTable:
+    """
+    Trie de prefixos (caractere a caractere, mesma semântica do startswith)
+    com cada rota já resolvida na construção: uma consulta percorre o path
+    uma vez e devolve o serviço, a autenticação, o timeout e o cache
+    """
+
+    def __init__(self, entries, services=None):
+        self.services = services if services is not None else SERVICES
+        self._root = _Node()
+        self._root.route = NO_ROUTE
+
+        # Junta as entradas do mesmo prefixo (as posteriores sobrescrevem)
+        merged = {}
+        for entry in entries:
+            prefix = entry['prefix']
+            fields = {k: v for k, v in entry.items() if k in ROUTE_FIELDS}
+            merged.setdefault(prefix, {}).update(fields)
+
+        # Prefixos mais curtos primeiro: o pai já está resolvido quando o filho entra
+        for prefix in sorted(merged, key=len):
+            parent = self.resolve(prefix)
+            fields = merged[prefix]
+            service = fields.get('service')
+            node = self._root
+            for char in prefix:
+                node = node.children.setdefault(char, _Node())
+            node.route = Route(
+                prefix=prefix,
+                service_url=self._service_url(service) if service else parent.service_url,
+                public=bool(fields.get('public', parent.public)),
+                timeout=float(fields.get('timeout', parent.timeout)),
+                cache=fields.get('cache', parent.cache)
+            )
+
+    def _service_url(self, service):
+        if service.startswith(('http://', 'https://')):
+            return service
+        if service not in self.services:
+            raise ValueError(f'Unknown service "{service}" in route table')
+        return self.services[service]
+
+    def resolve(self, path):
+        """Rota do prefixo mais longo que casa com o path (NO_ROUTE se nenhum)"""
+        node = self._root
+        best = node.route
+        for char in path:
+            node = node.children.get(char)
+            if node is None:
+                break
+            if node.route is not None:
+                best = node.route
+        return best
+
+    def describe(self):
+        """Rotas resolvidas, para as métricas"""
+        routes = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node.route is not None and node.route.prefix:
+                routes.append(node.route._asdict())
+            stack.extend(node.children.values())
+        return sorted(routes, key=lambda r: r['prefix'])
+
+table = RouteTable(load_config())
+
+def resolve(path):
+    """Atalho para table.resolve"""
+    return table.resolve(path)
@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+import jwt
+
+# Chaves HS256 compartilhadas com o Auth Service, identificadas pelo `kid`
+# do cabeçalho do token: "kid1:segredo1,kid2:segredo2". Na rotação, a chave
+# nova entra na lista e a antiga só sai depois que seus tokens expirarem.
+JWT_KEYS = os.environ.get('JWT_KEYS', '')
+# Alternativa: arquivo JSON {"keys": {"kid": "segredo"}}, relido quando muda
+JWT_KEYS_FILE = os.environ.get('JWT_KEYS_FILE')
+JWT_KEYS_RELOAD_INTERVAL = float(os.environ.get('JWT_KEYS_RELOAD_INTERVAL', 30))
+# Chave única antiga (tokens sem `kid`), a mesma SECRET_KEY do Auth Service
+SECRET_KEY = os.environ.get('SECRET_KEY')
+# Consulta o /auth/verify-token quando o `kid` não é conhecido localmente
+JWT_REMOTE_FALLBACK = os.environ.get('JWT_REMOTE_FALLBACK', 'false').lower() in ('1', 'true', 'yes')
+# Tokens já verificados mantidos em cache (por hash) até o `exp`
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 10000))
+
+DEFAULT_KID = 'default'
+
+def parse_keys(value):
+    """
+    Lê "kid:segredo,kid2:segredo2" num dicionário. Entrada malformada é
+    erro (mesma regra do Auth Service, auth._parse_keys): uma chave
+    descartada em silêncio num lado e não no outro quebra os tokens
+    """
+    keys = {}
+    for position, item in enumerate(value.split(','), 1):
+        item = item.strip()
+        if not item:
+            continue
+        kid, _, secret = item.partition(':')
+        kid, secret = kid.strip(), secret.strip()
+        # A mensagem cita só a posição e o kid: nunca o segredo
+        if not kid or not secret:
+            raise ValueError(f'Invalid JWT_KEYS entry #{position} (expected "kid:secret")')
+        if kid in keys:
+            raise ValueError(f'Duplicate kid "{kid}" in JWT_KEYS')
+        keys[kid] = secret
+    return keys
+
+class KeyRing:
+    """Chaves de verificação por `kid`, vindas do ambiente e/ou de um arquivo"""
+
+    def __init__(self, env_keys='', keys_file=None, legacy_secret=None, reload_interval=30):
+        self.keys_file = keys_file
+        self.reload_interval = reload_interval
+        self._static = parse_keys(env_keys) if env_keys else {}
+        if legacy_secret:
+            self._static.setdefault(DEFAULT_KID, legacy_secret)
+        self._file_keys = {}
+        self._file_mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._reload()
+
+    def _reload(self):
+        """Relê o arquivo de chaves se ele mudou (rotação sem restart)"""
+        if not self.keys_file:
+            return
+        try:
+            mtime = os.path.getmtime(self.keys_file)
+            if mtime == self._file_mtime:
+                return
+            with open(self.keys_file) as f:
+                self._file_keys = dict(json.load(f).get('keys', {}))
+            self._file_mtime = mtime
+            print(f"🔑 Loaded {len(self._file_keys)} JWT keys from {self.keys_file}")
+        except (OSError, ValueError) as e:
+            print(f"Error loading JWT keys file: {e}")
+
+    def get(self, kid):
+        """Segredo do `kid` (ou da chave antiga, para tokens sem `kid`)"""
+        now = time.monotonic()
+        with self._lock:
+            if self.keys_file and now - self._checked_at >= self.reload_interval:
+                self._checked_at = now
+                self._reload()
+            kid = kid or DEFAULT_KID
+            return self._file_keys.get(kid) or self._static.get(kid)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._static) + len(self._file_keys)
+
+    def kids(self):
+        with self._lock:
+            return sorted(set(self._static) | set(self._file_keys))
+
+class TokenCache:
+    """LRU de tokens válidos: sha256(token) -> (user_id, exp)"""
+
+    def __init__(self, max_size=10000):
+        self.max_size = max(1, max_size)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def get(self, token):
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, token, user_id, exp):
+        with self._lock:
+            self._entries[self._key(token)] = (user_id, exp)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+class TokenVerifier:
+    """
+    Verifica os JWT do Auth Service dentro do gateway. Sem nenhuma chave
+    configurada, ou com `kid` desconhecido e fallback ligado, delega ao
+    Auth Service pela função `remote_verify(token) -> (valido, user_id)`.
+    """
+
+    def __init__(self, keyring, remote_verify, remote_fallback=False, cache_size=10000):
+        self.keyring = keyring
+        self.remote_verify = remote_verify
+        self.remote_fallback = remote_fallback
+        self.cache = TokenCache(cache_size)
+        self._lock = threading.Lock()
+        self._counters = {
+            'cache_hits': 0,
+            'local_verified': 0,
+            'remote_calls': 0,
+            'rejected': 0
+        }
+        if not len(keyring):
+            print("⚠️ No JWT keys configured, verifying tokens with the Auth Service")
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def verify(self, token):
+        """Retorna (valido, user_id)"""
+        user_id = self.cache.get(token)
+        if user_id is not None:
+            self._count('cache_hits')
+            return True, user_id
+
+        if not len(self.keyring):
+            return self._verify_remote(token)
+
+        try:
+            kid = jwt.get_unverified_header(token).get('kid')
+        except jwt.InvalidTokenError:
+            self._count('rejected')
+            return False, None
+
+        secret = self.keyring.get(kid)
+        if secret is None:
+            if self.remote_fallback:
+                return self._verify_remote(token)
+            self._count('rejected')
+            return False, None
+
+        try:
+            payload = jwt.decode(token, secret, algorithms=['HS256'], options={'require': ['exp']})
+        except jwt.InvalidTokenError:
+            self._count('rejected')
+            return False, None
+
+        user_id = payload.get('user_id')
+        if user_id is None:
+            self._count('rejected')
+            return False, None
+
+        self._count('local_verified')
+        self.cache.put(token, user_id, payload['exp'])
+        return True, user_id
+
+    def is_local(self):
+        """True se nenhuma verificação vai ao Auth Service"""
+        return bool(len(self.keyring)) and not self.remote_fallback
+
+    def _verify_remote(self, token):
+        self._count('remote_calls')
+        is_valid, user_id = self.remote_verify(token)
+        if not is_valid:
+            self._count('rejected')
+            return False, None
+        # Assinatura já conferida pelo Auth Service: só falta saber até quando guardar
+        try:
+            exp = jwt.decode(token, options={'verify_signature': False}).get('exp')
+        except jwt.InvalidTokenError:
+            exp = None
+        if exp:
+            self.cache.put(token, user_id, exp)
+        return True, user_id
+
+    def stats(self):
+        """Contadores da verificação de tokens"""
+        with self._lock:
+            counters = dict(self._counters)
+        counters['cached_tokens'] = len(self.cache)
+        counters['kids'] = self.keyring.kids()
+        counters['remote_fallback'] = self.remote_fallback
+        return counters
@@ -0,0 +1,241 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, TimeoutError as FutureTimeout, wait
+import requests
+from requests.adapters import HTTPAdapter
+import resilience
+import routes
+
+# Conexões keep-alive mantidas por microserviço
+UPSTREAM_POOL_SIZE = int(os.environ.get('UPSTREAM_POOL_SIZE', 20))
+# true: com o pool cheio a requisição espera uma conexão; false: abre uma extra (não reaproveitada)
+UPSTREAM_POOL_BLOCK = os.environ.get('UPSTREAM_POOL_BLOCK', 'false').lower() in ('1', 'true', 'yes')
+# Timeout (s) para abrir a conexão (o de leitura vem da tabela de rotas)
+UPSTREAM_CONNECT_TIMEOUT = float(os.environ.get('UPSTREAM_CONNECT_TIMEOUT', 3.05))
+
+def _close_response(future):
+    """Fecha a resposta de uma requisição descartada (se ela chegou a responder)"""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+class UpstreamPool:
+    """
+    Uma requests.Session por microserviço, com pool de conexões keep-alive
+    (evita um handshake TCP/TLS por requisição proxyada) e métricas de uso.
+    call() acrescenta circuit breaker, novas tentativas e hedge (ver resilience.py)
+    """
+
+    def __init__(self, pool_size=20, pool_block=False, connect_timeout=3.05):
+        self.pool_size = max(1, pool_size)
+        self.pool_block = pool_block
+        self.connect_timeout = connect_timeout
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._breakers = {}
+        self._budgets = {}
+        # Threads das requisições com hedge: espaço para a original e a cópia
+        # de cada uma das pool_size conexões do microserviço
+        self._hedge_executor = ThreadPoolExecutor(max_workers=2 * self.pool_size, thread_name_prefix='hedge')
+
+    def session(self, base_url):
+        """Session do microserviço (criada no primeiro uso)"""
+        session = self._sessions.get(base_url)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(base_url)
+                if session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=self.pool_size,
+                        pool_block=self.pool_block
+                    )
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._sessions[base_url] = session
+                    self._breakers[base_url] = resilience.new_breaker(base_url)
+                    self._budgets[base_url] = resilience.new_budget()
+                    self._metrics[base_url] = {
+                        'requests': 0,
+                        'errors': 0,
+                        'timeouts': 0,
+                        'in_flight': 0,
+                        'retries': 0,
+                        'hedges': 0,
+                        'hedges_won': 0,
+                        'total_time': 0.0,
+                        'status_codes': {}
+                    }
+        return session
+
+    def request(self, base_url, method, path, json=None, headers=None, read_timeout=None):
+        """Faz a requisição pelo pool; timeouts de conexão e de leitura (da rota, se omitido)"""
+        if read_timeout is None:
+            read_timeout = routes.resolve(path).timeout
+        session = self.session(base_url)
+        metrics = self._metrics[base_url]
+        with self._lock:
+            metrics['in_flight'] += 1
+        started = time.monotonic()
+        try:
+            response = session.request(
+                method,
+                f'{base_url}{path}',
+                json=json,
+                headers=headers,
+                timeout=(self.connect_timeout, read_timeout)
+            )
+        except requests.exceptions.Timeout:
+            self._record(metrics, started, 'timeouts')
+            raise
+        except requests.exceptions.RequestException:
+            self._record(metrics, started, 'errors')
+            raise
+        self._record(metrics, started, status=response.status_code)
+        return response
+
+    def call(self, base_url, method, path, json=None, headers=None, read_timeout=None):
+        """
+        request() protegido pelo circuit breaker do microserviço, com novas
+        tentativas para GET (dentro do orçamento) e hedge nas rotas
+        configuradas. Levanta resilience.CircuitOpenError com o circuito aberto
+        """
+        self.session(base_url)
+        breaker = self._breakers[base_url]
+        budget = self._budgets[base_url]
+        metrics = self._metrics[base_url]
+        budget.record_request()
+        attempts = 1 + (resilience.UPSTREAM_RETRIES if resilience.can_retry(method) else 0)
+
+        for attempt in range(attempts):
+            trial = breaker.before_request()
+            try:
+                if resilience.should_hedge(method, path):
+                    response = self._hedged(base_url, method, path, headers, read_timeout)
+                else:
+                    response = self.request(base_url, method, path, json=json, headers=headers, read_timeout=read_timeout)
+            except requests.exceptions.RequestException:
+                breaker.record_failure()
+                if attempt + 1 < attempts and budget.try_spend():
+                    self._count(metrics, 'retries')
+                    time.sleep(resilience.RETRY_BACKOFF * (2 ** attempt))
+                    continue
+                raise
+            except BaseException:
+                # Cancelada (cliente desconectou) ou erro do próprio gateway:
+                # sem veredito sobre o microserviço, a vaga de teste é devolvida
+                breaker.release(trial)
+                raise
+
+            # Respostas normais e 503 de excesso de carga (com Retry-After) vão direto ao cliente
+            if not resilience.is_upstream_failure(response.status_code, response.headers):
+                breaker.record_success()
+                return response
+
+            breaker.record_failure()
+            if attempt + 1 < attempts and budget.try_spend():
+                response.close()
+                self._count(metrics, 'retries')
+                time.sleep(resilience.RETRY_BACKOFF * (2 ** attempt))
+                continue
+            return response
+
+    def _hedged(self, base_url, method, path, headers, read_timeout):
+        """Dispara uma segunda cópia se a primeira demorar; vale a primeira resposta"""
+        metrics = self._metrics[base_url]
+        started = threading.Event()
+
+        def primary():
+            started.set()
+            return self.request(base_url, method, path, None, headers, read_timeout)
+
+        first = self._hedge_executor.submit(primary)
+        # HEDGE_DELAY conta do início da original: com o executor cheio, a
+        # espera na fila é saturação do gateway, não lentidão do microserviço
+        started.wait()
+        try:
+            return first.result(timeout=resilience.HEDGE_DELAY)
+        except FutureTimeout:
+            pass
+
+        if not self._budgets[base_url].try_spend():
+            return first.result()
+
+        self._count(metrics, 'hedges')
+        second = self._hedge_executor.submit(self.request, base_url, method, path, None, headers, read_timeout)
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except requests.exceptions.RequestException as e:
+                    error = e
+                    continue
+                if future is second:
+                    self._count(metrics, 'hedges_won')
+                # A cópia que perdeu só devolve a conexão ao pool quando terminar
+                for other in pending:
+                    other.add_done_callback(_close_response)
+                return response
+        raise error
+
+    def _count(self, metrics, name):
+        with self._lock:
+            metrics[name] += 1
+
+    def _record(self, metrics, started, failure=None, status=None):
+        with self._lock:
+            metrics['in_flight'] -= 1
+            metrics['requests'] += 1
+            metrics['total_time'] += time.monotonic() - started
+            if failure:
+                metrics[failure] += 1
+            if status is not None:
+                key = str(status)
+                metrics['status_codes'][key] = metrics['status_codes'].get(key, 0) + 1
+
+    def _pool_stats(self, session):
+        """Conexões do urllib3: abertas no total, ociosas agora e requisições feitas"""
+        # O mesmo adapter atende http:// e https://
+        adapter = session.adapters['http://']
+        opened = idle = served = 0
+        for key in list(adapter.poolmanager.pools.keys()):
+            pool = adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            opened += pool.num_connections
+            served += pool.num_requests
+            idle += sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool else 0
+        return {'connections_opened': opened, 'idle_connections': idle, 'pool_requests': served}
+
+    def stats(self):
+        """Métricas por microserviço"""
+        with self._lock:
+            snapshot = {url: dict(m, status_codes=dict(m['status_codes'])) for url, m in self._metrics.items()}
+            sessions = dict(self._sessions)
+        upstreams = {}
+        for url, metrics in snapshot.items():
+            total_time = metrics.pop('total_time')
+            metrics['avg_latency_ms'] = round(total_time / metrics['requests'] * 1000, 2) if metrics['requests'] else 0.0
+            metrics.update(self._pool_stats(sessions[url]))
+            metrics['circuit'] = self._breakers[url].stats()
+            metrics['retry_budget'] = self._budgets[url].stats()
+            upstreams[url] = metrics
+        return {
+            'pool_size': self.pool_size,
+            'pool_block': self.pool_block,
+            'connect_timeout': self.connect_timeout,
+            'resilience': resilience.settings(),
+            'upstreams': upstreams
+        }
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+        self._hedge_executor.shutdown(wait=False)
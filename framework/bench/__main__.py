@@ -0,0 +1,42 @@
+import argparse
+import json
+import sys
+from framework.bench.runner import DEFAULT_SUITE, DIFFICULTIES, ENGINE_FACTORIES, run_benchmark
+
+# Benchmark dos motores: python -m framework.bench --output bench.json
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m framework.bench", description="Benchmark dos motores de xadrez")
+    parser.add_argument("--engines", default="minimax,random,stockfish",
+                        help=f"motores separados por vírgula ({', '.join(ENGINE_FACTORIES)})")
+    parser.add_argument("--difficulties", default=",".join(DIFFICULTIES))
+    parser.add_argument("--suite", default=DEFAULT_SUITE, help="arquivo EPD com as posições")
+    parser.add_argument("--repeats", type=int, default=1, help="buscas por posição")
+    parser.add_argument("--reference", help="motor de referência para a concordância de lances")
+    parser.add_argument("--no-memory", action="store_true", help="não mede memória com tracemalloc")
+    parser.add_argument("--output", help="arquivo JSON de saída (padrão: stdout)")
+    args = parser.parse_args(argv)
+
+    engines = [name.strip() for name in args.engines.split(",") if name.strip()]
+    unknown = [name for name in engines if name not in ENGINE_FACTORIES]
+    if unknown:
+        parser.error(f"motores desconhecidos: {', '.join(unknown)}")
+
+    report = run_benchmark(
+        engines,
+        difficulties=[d.strip() for d in args.difficulties.split(",") if d.strip()],
+        suite_path=args.suite,
+        repeats=max(1, args.repeats),
+        measure_memory=not args.no_memory,
+        reference=args.reference
+    )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+import chess
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from framework.components.engines.c_minimax_engine import CMinimaxEngine
+from framework.components.engines.c_random_engine import CRandomEngine
+from framework.components.engines.c_stockfish_engine import CStockfishEngine
+
+DIFFICULTIES = ["easy", "medium", "hard"]
+
+# Suíte padrão de posições (EPD com `id` e, nas táticas, `bm`)
+DEFAULT_SUITE = os.path.join(os.path.dirname(__file__), "positions.epd")
+
+# Pasta do AI Service, importado opcionalmente como mais um "motor"
+AI_SERVICE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "services", "ai-service")
+
+# Adaptador do ai_engine do AI Service para a interface usada no benchmark
+class AIServiceEngine:
+
+    def __init__(self):
+        sys.path.insert(0, os.path.abspath(AI_SERVICE_DIR))
+        import ai_engine
+        # Sem livro de aberturas nem cache de lances: cada posição passa pela
+        # busca, como nos outros motores (MoveCache com tamanho 0 não guarda nada)
+        if ai_engine._book is not None:
+            ai_engine._book.close()
+        ai_engine._book, ai_engine._book_loaded = None, True
+        ai_engine._move_cache.close()
+        ai_engine._move_cache = ai_engine.MoveCache(max_size=0)
+        self._ai_engine = ai_engine
+        self.name = "AI Service Engine"
+
+    def get_best_move(self, fen: str, difficulty: str) -> str:
+        return self._ai_engine.get_best_move(fen, difficulty)
+
+    def get_engine_name(self) -> str:
+        return self.name
+
+    def is_available(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        self._ai_engine.cleanup()
+
+# Motores disponíveis pelo nome usado na linha de comando
+ENGINE_FACTORIES = {
+    "minimax": CMinimaxEngine,
+    "random": CRandomEngine,
+    "stockfish": CStockfishEngine,
+    "ai-service": AIServiceEngine
+}
+
+# Lê a suíte EPD: lista de {"id", "fen", "bm"}
+def load_suite(path: str) -> list:
+    positions = []
+    with open(path) as epd:
+        for number, line in enumerate(epd, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            board, ops = chess.Board.from_epd(line)
+            positions.append({
+                "id": ops.get("id", f"position-{number}"),
+                "fen": board.fen(),
+                "bm": [move.uci() for move in ops.get("bm", [])]
+            })
+    return positions
+
+# Percentil pelo método nearest-rank (p em 0..100)
+def percentile(values: list, p: float) -> float:
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+# Nós buscados no último lance, quando o motor expõe essa métrica (minimax e
+# stockfish; o ai-service só devolve o lance e fica sem nós/s)
+def _last_nodes(engine) -> int or None:
+    if hasattr(engine, "get_search_info"):
+        return engine.get_search_info().get("nodes")
+    return None
+
+# Zera o estado entre posições, para que uma não aqueça o hash da outra
+def _reset(engine) -> None:
+    if hasattr(engine, "new_game"):
+        engine.new_game()
+
+# Mede o tempo por lance e os nós de um motor numa dificuldade
+def _time_engine(engine, difficulty: str, suite: list, repeats: int) -> tuple:
+    times = []
+    nodes = 0
+    moves = {}
+    for position in suite:
+        for _ in range(repeats):
+            _reset(engine)
+            start = time.perf_counter()
+            move = engine.get_best_move(position["fen"], difficulty)
+            times.append(time.perf_counter() - start)
+            searched = _last_nodes(engine)
+            if searched is not None:
+                nodes += searched
+        moves[position["id"]] = move
+    return times, nodes, moves
+
+# Pico de memória Python alocada (tracemalloc) durante uma passada da suíte
+def _measure_memory(engine, difficulty: str, suite: list) -> int:
+    tracemalloc.start()
+    try:
+        for position in suite:
+            _reset(engine)
+            engine.get_best_move(position["fen"], difficulty)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+# Percentual de posições com `bm` em que o motor achou um dos lances esperados
+def _bm_accuracy(suite: list, moves: dict) -> float or None:
+    tactical = [position for position in suite if position["bm"]]
+    if not tactical:
+        return None
+    solved = sum(1 for position in tactical if moves.get(position["id"]) in position["bm"])
+    return round(100.0 * solved / len(tactical), 1)
+
+# Percentual de posições em que dois resultados escolheram o mesmo lance
+def _agreement(moves: dict, reference: dict) -> float:
+    common = [key for key in moves if key in reference]
+    if not common:
+        return None
+    same = sum(1 for key in common if moves[key] == reference[key])
+    return round(100.0 * same / len(common), 1)
+
+# Executado no processo isolado de cada motor: resultados por dificuldade,
+# com o pico de RSS do processo e dos filhos (Stockfish, workers do minimax)
+def _bench_engine(engine_name: str, difficulties: list, suite: list, repeats: int, measure_memory: bool) -> list:
+    engine = ENGINE_FACTORIES[engine_name]()
+    if not engine.is_available():
+        print(f"⚠️ {engine.get_engine_name()} indisponível, pulando", file=sys.stderr)
+        return []
+    results = []
+    try:
+        for difficulty in difficulties:
+            times, nodes, moves = _time_engine(engine, difficulty, suite, repeats)
+            total_time = sum(times)
+            results.append({
+                "engine": engine_name,
+                "difficulty": difficulty,
+                "positions": len(suite),
+                "moves_timed": len(times),
+                "nodes": nodes or None,
+                "nps": int(nodes / total_time) if nodes and total_time > 0 else None,
+                "time_to_move": {
+                    "mean": round(total_time / len(times), 6),
+                    "p50": round(percentile(times, 50), 6),
+                    "p95": round(percentile(times, 95), 6),
+                    "p99": round(percentile(times, 99), 6),
+                    "max": round(max(times), 6)
+                },
+                "peak_traced_memory_bytes": _measure_memory(engine, difficulty, suite) if measure_memory else None,
+                "bm_accuracy": _bm_accuracy(suite, moves),
+                "moves": moves
+            })
+            print(f"✅ {engine_name}/{difficulty}: {len(times)} lances", file=sys.stderr)
+    finally:
+        if hasattr(engine, "close"):
+            engine.close()
+
+    # Filhos já encerrados pelo close() entram em RUSAGE_CHILDREN
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_max_rss_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss or None
+    for result in results:
+        result["max_rss_kb"] = max_rss_kb
+        result["children_max_rss_kb"] = children_max_rss_kb
+    return results
+
+def run_benchmark(engines: list, difficulties: list = None, suite_path: str = DEFAULT_SUITE,
+                  repeats: int = 1, measure_memory: bool = True, reference: str = None) -> dict:
+    """
+    Roda a suíte em cada motor e dificuldade e retorna um relatório JSON:
+    nós/s, tempo por lance (p50/p95/p99), memória (tracemalloc e pico de
+    RSS do processo de cada motor), acerto dos `bm` da suíte e concordância
+    de lances com o motor de referência
+    """
+    difficulties = difficulties or DIFFICULTIES
+    suite = load_suite(suite_path)
+    results = []
+
+    for engine_name in engines:
+        # Cada motor roda num processo novo: o pico de RSS é só dele
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            engine_results = executor.submit(
+                _bench_engine, engine_name, difficulties, suite, repeats, measure_memory
+            ).result()
+        results += engine_results
+
+    # Concordância com a referência (padrão: o primeiro motor) na mesma dificuldade
+    reference = reference or (results[0]["engine"] if results else None)
+    reference_moves = {
+        result["difficulty"]: result["moves"]
+        for result in results if result["engine"] == reference
+    }
+    for result in results:
+        if result["difficulty"] in reference_moves:
+            result["agreement_with_reference"] = _agreement(result["moves"], reference_moves[result["difficulty"]])
+        else:
+            result["agreement_with_reference"] = None
+
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "suite": os.path.basename(suite_path),
+        "repeats": repeats,
+        "reference": reference,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "python_chess": chess.__version__
+        },
+        "results": results
+    }
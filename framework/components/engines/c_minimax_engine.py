@@ -1,27 +1,156 @@
 from framework.interfaces.i_chess_engine import IChessEngine
 import chess
-import random
+import chess.polyglot
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Tabelas peça-casa (PST) em centipeões, do ponto de vista das brancas.
+# Cada tabela é escrita como o tabuleiro é visto pelas brancas: a primeira
+# linha é a 8ª fileira (a8..h8) e a última é a 1ª fileira (a1..h1).
+PAWN_TABLE = [
+     0,   0,   0,   0,   0,   0,   0,   0,
+    50,  50,  50,  50,  50,  50,  50,  50,
+    10,  10,  20,  30,  30,  20,  10,  10,
+     5,   5,  10,  25,  25,  10,   5,   5,
+     0,   0,   0,  20,  20,   0,   0,   0,
+     5,  -5, -10,   0,   0, -10,  -5,   5,
+     5,  10,  10, -20, -20,  10,  10,   5,
+     0,   0,   0,   0,   0,   0,   0,   0
+]
+
+KNIGHT_TABLE = [
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20,   0,   0,   0,   0, -20, -40,
+    -30,   0,  10,  15,  15,  10,   0, -30,
+    -30,   5,  15,  20,  20,  15,   5, -30,
+    -30,   0,  15,  20,  20,  15,   0, -30,
+    -30,   5,  10,  15,  15,  10,   5, -30,
+    -40, -20,   0,   5,   5,   0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50
+]
+
+BISHOP_TABLE = [
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,  10,  10,   5,   0, -10,
+    -10,   5,   5,  10,  10,   5,   5, -10,
+    -10,   0,  10,  10,  10,  10,   0, -10,
+    -10,  10,  10,  10,  10,  10,  10, -10,
+    -10,   5,   0,   0,   0,   0,   5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20
+]
+
+ROOK_TABLE = [
+     0,   0,   0,   0,   0,   0,   0,   0,
+     5,  10,  10,  10,  10,  10,  10,   5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+     0,   0,   0,   5,   5,   0,   0,   0
+]
+
+QUEEN_TABLE = [
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,   5,   5,   5,   0, -10,
+     -5,   0,   5,   5,   5,   5,   0,  -5,
+      0,   0,   5,   5,   5,   5,   0,  -5,
+    -10,   5,   5,   5,   5,   5,   0, -10,
+    -10,   0,   5,   0,   0,   0,   0, -10,
+    -20, -10, -10,  -5,  -5, -10, -10, -20
+]
+
+KING_TABLE = [
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+     20,  20,   0,   0,   0,   0,  20,  20,
+     20,  30,  10,   0,   0,  10,  30,  20
+]
+
+# Limite superior dos scores da busca
+INFINITY = 10 ** 9
+
+# Score de mate (descontado da distância em plies até o mate) e de empate
+MATE_SCORE = 10 ** 6
+MATE_THRESHOLD = MATE_SCORE - 1000
+DRAW_SCORE = 0
+
+# Tipos de entrada da tabela de transposição
+TT_EXACT = 0
+TT_LOWER = 1
+TT_UPPER = 2
+
+# Bônus de ordenação de lances
+ORDER_TT_MOVE = 10 ** 7
+ORDER_CAPTURE = 10 ** 6
+ORDER_KILLER = 9 * 10 ** 5
+
+class _SearchTimeout(Exception):
+    """Interrompe a busca quando o orçamento de tempo acaba"""
+    pass
+
+PIECE_SQUARE_TABLES = {
+    chess.PAWN: PAWN_TABLE,
+    chess.KNIGHT: KNIGHT_TABLE,
+    chess.BISHOP: BISHOP_TABLE,
+    chess.ROOK: ROOK_TABLE,
+    chess.QUEEN: QUEEN_TABLE,
+    chess.KING: KING_TABLE
+}
 
 # Implementação de HOTSPOT: Engine de IA simples usando algoritmo Minimax
 class CMinimaxEngine(IChessEngine):
 
-    def __init__(self):
+    def __init__(self, workers: int = 1):
         self.name = "Minimax Engine"
-        # Profundidade configurada para cada nível de dificuldade
+        # Processos da busca paralela na raiz (1 = serial, None = um por núcleo)
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self._executor = None
+        self._game_id = 0
+        # Profundidade máxima do aprofundamento iterativo por dificuldade
         self.depth_config = {
-            "easy": 1,
-            "medium": 2,
-            "hard": 3
+            "easy": 2,
+            "medium": 3,
+            "hard": 5
         }
-        # Valores das peças para avaliação do tabuleiro
+        # Orçamento de tempo (segundos) por lance para cada dificuldade
+        self.time_config = {
+            "easy": 0.5,
+            "medium": 1.5,
+            "hard": 3.0
+        }
+        # Tamanho máximo da tabela de transposição antes de ser esvaziada
+        self.max_tt_entries = 500000
+        # Valores das peças (centipeões) para avaliação do tabuleiro
         self.piece_values = {
-            chess.PAWN: 1,
-            chess.KNIGHT: 3,
-            chess.BISHOP: 3,
-            chess.ROOK: 5,
-            chess.QUEEN: 9,
+            chess.PAWN: 100,
+            chess.KNIGHT: 320,
+            chess.BISHOP: 330,
+            chess.ROOK: 500,
+            chess.QUEEN: 900,
             chess.KING: 0
         }
+        # Material + PST pré-somados por (cor, peça, casa), com sinal:
+        # positivo para as brancas e negativo para as pretas
+        self._square_values = self._build_square_values()
+        # Estado da busca que persiste entre chamadas da mesma partida
+        self._tt = {}
+        self._history = {}
+        self._killers = {}
+        self._last_root_ply = None
+        self._deadline = None
+        # Instrumentação da última busca
+        self.nodes = 0
+        self.qnodes = 0
+        self.tt_hits = 0
+        self.last_search_info = {}
 
     def get_engine_name(self) -> str:
         """Retorna o nome do motor de xadrez"""
@@ -31,81 +160,456 @@ class CMinimaxEngine(IChessEngine):
         """Esta engine baseada em Python está sempre disponível"""
         return True
 
+    def _build_square_values(self) -> dict:
+        """
+        Pré-calcula o valor de cada peça em cada casa. As tabelas estão
+        escritas de a8 a h1, então a casa das brancas é espelhada para achar
+        o índice; para as pretas o índice é a própria casa.
+        """
+        values = {}
+        for piece_type, table in PIECE_SQUARE_TABLES.items():
+            material = self.piece_values[piece_type]
+            values[(chess.WHITE, piece_type)] = [
+                material + table[chess.square_mirror(square)] for square in chess.SQUARES
+            ]
+            values[(chess.BLACK, piece_type)] = [
+                -(material + table[square]) for square in chess.SQUARES
+            ]
+        return values
+
     def _evaluate_board(self, board: chess.Board) -> int:
         """
-        Avalia a posição atual do tabuleiro.
-        Soma o valor das peças brancas e subtrai o das pretas.
+        Avalia a posição atual do tabuleiro (positivo favorece as brancas).
+        Percorre apenas as casas ocupadas de cada bitboard de peças
+        (pieces_mask) em vez de consultar as 64 casas com piece_at().
         """
         score = 0
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if piece:
-                value = self.piece_values.get(piece.piece_type, 0)
-                if piece.color == chess.WHITE:
-                    score += value
-                else:
-                    score -= value
+        for (color, piece_type), values in self._square_values.items():
+            for square in chess.scan_forward(board.pieces_mask(piece_type, color)):
+                score += values[square]
         return score
 
-    def _minimax(self, board: chess.Board, depth: int, maximizing: bool) -> int:
+    def _move_delta(self, board: chess.Board, move: chess.Move) -> int:
         """
-        Algoritmo Minimax simples para busca da melhor jogada.
+        Variação da avaliação causada pelo lance, calculada antes do push.
+        Permite atualizar a avaliação incrementalmente ao longo da busca em
+        vez de reavaliar o tabuleiro inteiro em cada folha.
         """
-        # Caso base: profundidade zero ou fim de jogo
-        if depth == 0 or board.is_game_over():
-            return self._evaluate_board(board)
+        color = board.turn
+        values = self._square_values
+        piece_type = board.piece_type_at(move.from_square)
+
+        delta = values[(color, move.promotion or piece_type)][move.to_square]
+        delta -= values[(color, piece_type)][move.from_square]
 
-        if maximizing:
-            max_eval = float('-inf')
-            for move in board.legal_moves:
-                board.push(move)
-                eval = self._minimax(board, depth - 1, False)
-                board.pop()
-                max_eval = max(max_eval, eval)
-            return max_eval
+        if board.is_en_passant(move):
+            captured_square = move.to_square - 8 if color == chess.WHITE else move.to_square + 8
+            delta -= values[(not color, chess.PAWN)][captured_square]
+        elif board.is_castling(move):
+            rank = chess.square_rank(move.from_square)
+            if chess.square_file(move.to_square) > chess.square_file(move.from_square):
+                rook_from, rook_to = chess.square(7, rank), chess.square(5, rank)
+            else:
+                rook_from, rook_to = chess.square(0, rank), chess.square(3, rank)
+            delta += values[(color, chess.ROOK)][rook_to] - values[(color, chess.ROOK)][rook_from]
         else:
-            min_eval = float('inf')
-            for move in board.legal_moves:
-                board.push(move)
-                eval = self._minimax(board, depth - 1, True)
-                board.pop()
-                min_eval = min(min_eval, eval)
-            return min_eval
+            captured_type = board.piece_type_at(move.to_square)
+            if captured_type:
+                delta -= values[(not color, captured_type)][move.to_square]
 
-    def get_best_move(self, fen: str, difficulty: str) -> str:
+        return delta
+
+    def new_game(self) -> None:
+        """Descarta a tabela de transposição e o histórico da partida anterior"""
+        self._tt.clear()
+        self._history.clear()
+        self._killers.clear()
+        self._last_root_ply = None
+        # Avisa os processos da busca paralela para descartarem suas TTs
+        self._game_id += 1
+
+    def _order_moves(self, board: chess.Board, moves: list, tt_move, ply: int, use_history: bool = True) -> list:
         """
-        Determina o melhor movimento usando Minimax.
-        Escolhe aleatoriamente entre os movimentos com o mesmo melhor score.
+        Ordena os lances para maximizar os cortes alfa-beta: lance da TT,
+        capturas por MVV-LVA (vítima mais valiosa, atacante menos valioso),
+        promoções, killer moves e por fim a heurística de histórico
         """
-        board = chess.Board(fen)
-        depth = self.depth_config.get(difficulty.lower(), 1)
-        
-        best_moves = []
-        is_white = board.turn == chess.WHITE
-        
-        if is_white:
-            best_score = float('-inf')
+        killers = self._killers.get(ply, ()) if use_history else ()
+        color = board.turn
+
+        def score(move):
+            if move == tt_move:
+                return ORDER_TT_MOVE
+            if board.is_capture(move):
+                victim = board.piece_type_at(move.to_square) or chess.PAWN
+                attacker = board.piece_type_at(move.from_square)
+                return ORDER_CAPTURE + 10 * self.piece_values[victim] - self.piece_values[attacker]
+            if move.promotion:
+                return ORDER_CAPTURE + self.piece_values[move.promotion]
+            if move in killers:
+                return ORDER_KILLER
+            if use_history:
+                return self._history.get((color, move.from_square, move.to_square), 0)
+            return 0
+
+        return sorted(moves, key=score, reverse=True)
+
+    def _store_killer(self, board: chess.Board, move: chess.Move, ply: int, depth: int) -> None:
+        """Registra um lance quieto que causou corte (killer + histórico)"""
+        killers = self._killers.setdefault(ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        key = (board.turn, move.from_square, move.to_square)
+        self._history[key] = self._history.get(key, 0) + depth * depth
+
+    def _check_time(self) -> None:
+        """Verifica o orçamento de tempo a cada 1024 nós"""
+        if self._deadline is not None and self.nodes & 1023 == 0 and time.monotonic() > self._deadline:
+            raise _SearchTimeout()
+
+    def _is_rule_draw(self, board: chess.Board) -> bool:
+        """Empate por material insuficiente, regra dos 50 lances ou repetição"""
+        if board.halfmove_clock >= 100 or board.is_insufficient_material():
+            return True
+        # Repetição só é possível depois de alguns lances sem captura/peão
+        return board.halfmove_clock >= 4 and board.is_repetition(2)
+
+    def _to_tt_score(self, score: int, ply: int) -> int:
+        """Mates são guardados relativos ao nó, não à raiz"""
+        if score >= MATE_THRESHOLD:
+            return score + ply
+        if score <= -MATE_THRESHOLD:
+            return score - ply
+        return score
+
+    def _from_tt_score(self, score: int, ply: int) -> int:
+        if score >= MATE_THRESHOLD:
+            return score - ply
+        if score <= -MATE_THRESHOLD:
+            return score + ply
+        return score
+
+    def _negamax(self, board: chess.Board, depth: int, alpha: int, beta: int, ply: int, evaluation: int) -> int:
+        """
+        Busca negamax com poda alfa-beta e tabela de transposição.
+        `evaluation` é a avaliação (brancas) mantida incrementalmente; o
+        retorno é sempre do ponto de vista de quem joga.
+        """
+        self.nodes += 1
+        self._check_time()
+
+        if self._is_rule_draw(board):
+            return DRAW_SCORE
+
+        # Na profundidade zero a busca continua só nas capturas
+        if depth == 0:
+            return self._quiescence(board, alpha, beta, ply, evaluation, True)
+
+        key = chess.polyglot.zobrist_hash(board)
+        entry = self._tt.get(key)
+        tt_move = None
+        if entry is not None:
+            entry_depth, entry_score, entry_flag, tt_move = entry
+            if entry_depth >= depth:
+                self.tt_hits += 1
+                entry_score = self._from_tt_score(entry_score, ply)
+                if entry_flag == TT_EXACT:
+                    return entry_score
+                if entry_flag == TT_LOWER:
+                    alpha = max(alpha, entry_score)
+                elif entry_flag == TT_UPPER:
+                    beta = min(beta, entry_score)
+                if alpha >= beta:
+                    return entry_score
+
+        moves = list(board.legal_moves)
+        if not moves:
+            # Mate mais próximo vale mais; afogamento é empate
+            return -(MATE_SCORE - ply) if board.is_check() else DRAW_SCORE
+
+        alpha_original = alpha
+        best_score = -INFINITY
+        best_move = None
+
+        for move in self._order_moves(board, moves, tt_move, ply):
+            child_evaluation = evaluation + self._move_delta(board, move)
+            board.push(move)
+            score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1, child_evaluation)
+            board.pop()
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                if not board.is_capture(move):
+                    self._store_killer(board, move, ply, depth)
+                break
+
+        if best_score <= alpha_original:
+            flag = TT_UPPER
+        elif best_score >= beta:
+            flag = TT_LOWER
         else:
-            best_score = float('inf')
+            flag = TT_EXACT
+        self._tt[key] = (depth, self._to_tt_score(best_score, ply), flag, best_move)
 
-        for move in board.legal_moves:
+        return best_score
+
+    def _quiescence(self, board: chess.Board, alpha: int, beta: int, ply: int, evaluation: int, include_checks: bool) -> int:
+        """
+        Busca de quiescência: estende as folhas com capturas e promoções
+        (e, no primeiro nível, lances que dão xeque) até a posição ficar
+        calma, evitando avaliar no meio de uma troca de peças.
+        """
+        self.nodes += 1
+        self.qnodes += 1
+        self._check_time()
+
+        if board.is_check():
+            # Em xeque não há "ficar parado": todas as evasões são buscadas
+            moves = list(board.legal_moves)
+            if not moves:
+                return -(MATE_SCORE - ply)
+            best_score = -INFINITY
+        else:
+            if self._is_rule_draw(board):
+                return DRAW_SCORE
+
+            stand_pat = evaluation if board.turn == chess.WHITE else -evaluation
+            if stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+            best_score = stand_pat
+
+            moves = [
+                move for move in board.legal_moves
+                if move.promotion or board.is_capture(move)
+                or (include_checks and board.gives_check(move))
+            ]
+            if not moves:
+                # Sem lances táticos: confirma afogamento antes de confiar na avaliação
+                return stand_pat if any(board.legal_moves) else DRAW_SCORE
+
+        for move in self._order_moves(board, moves, None, ply, use_history=False):
+            child_evaluation = evaluation + self._move_delta(board, move)
             board.push(move)
-            # A próxima camada do minimax será do oponente
-            score = self._minimax(board, depth - 1, not is_white)
+            score = -self._quiescence(board, -beta, -alpha, ply + 1, child_evaluation, False)
             board.pop()
 
-            if is_white:
-                if score > best_score:
-                    best_score = score
-                    best_moves = [move.uci()]
-                elif score == best_score:
-                    best_moves.append(move.uci())
-            else:
-                if score < best_score:
-                    best_score = score
-                    best_moves = [move.uci()]
-                elif score == best_score:
-                    best_moves.append(move.uci())
-
-        # Retorna um movimento aleatório entre os melhores encontrados
-        return random.choice(best_moves) if best_moves else None
+            if score > best_score:
+                best_score = score
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+
+        return best_score
+
+    def _search_root(self, board: chess.Board, depth: int, evaluation: int, previous_best) -> tuple:
+        """
+        Busca uma iteração completa a partir da raiz. Os lances da raiz usam
+        só ordenação estática (melhor lance da iteração anterior + MVV-LVA),
+        então o resultado não depende do histórico acumulado.
+        """
+        alpha = -INFINITY
+        best_move = None
+        moves = self._order_moves(board, list(board.legal_moves), previous_best, 0, use_history=False)
+
+        for move in moves:
+            child_evaluation = evaluation + self._move_delta(board, move)
+            board.push(move)
+            score = -self._negamax(board, depth - 1, -INFINITY, -alpha, 1, child_evaluation)
+            board.pop()
+
+            if score > alpha or best_move is None:
+                alpha = score
+                best_move = move
+
+        return best_move, alpha
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Cria sob demanda o pool de processos da busca paralela"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _search_root_parallel(self, board: chess.Board, depth: int, previous_best) -> tuple:
+        """
+        Versão paralela de _search_root. O primeiro lance (o melhor da
+        iteração anterior) é buscado antes com janela completa; os demais
+        rodam em paralelo nos processos do pool com alfa igual ao score dele.
+        Como só lances estritamente melhores superam alfa (e aí o score é
+        exato), o escolhido é o primeiro de maior score na mesma ordem
+        estática da busca serial: na profundidade fixa, mesmo lance e score.
+        """
+        moves = self._order_moves(board, list(board.legal_moves), previous_best, 0, use_history=False)
+        fen = board.fen()
+        executor = self._get_executor()
+
+        best_move = moves[0]
+        best_score = self._collect_root_result(
+            executor.submit(_search_root_move, fen, best_move.uci(), depth, -INFINITY, self._deadline, self._game_id)
+        )
+        alpha = best_score
+        futures = [
+            executor.submit(_search_root_move, fen, move.uci(), depth, alpha, self._deadline, self._game_id)
+            for move in moves[1:]
+        ]
+
+        timed_out = False
+        for move, future in zip(moves[1:], futures):
+            try:
+                score = self._collect_root_result(future)
+            except _SearchTimeout:
+                timed_out = True
+                continue
+            if score > best_score:
+                best_score = score
+                best_move = move
+
+        if timed_out:
+            raise _SearchTimeout()
+        return best_move, best_score
+
+    def _collect_root_result(self, future) -> int:
+        """Soma as métricas do processo e retorna o score do lance da raiz"""
+        score, nodes, qnodes, tt_hits = future.result()
+        self.nodes += nodes
+        self.qnodes += qnodes
+        self.tt_hits += tt_hits
+        if score is None:
+            raise _SearchTimeout()
+        return score
+
+    def close(self) -> None:
+        """Encerra os processos da busca paralela"""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def _prepare_search(self, board: chess.Board) -> None:
+        """Reaproveita a TT da mesma partida e limpa o que é por chamada"""
+        # Uma raiz "anterior" à última buscada indica uma partida nova
+        if self._last_root_ply is not None and board.ply() < self._last_root_ply:
+            self.new_game()
+        if len(self._tt) > self.max_tt_entries:
+            self._tt.clear()
+        self._last_root_ply = board.ply()
+        self._killers = {}
+        # Envelhece o histórico para privilegiar informação recente
+        self._history = {key: value // 2 for key, value in self._history.items() if value > 1}
+        self.nodes = 0
+        self.qnodes = 0
+        self.tt_hits = 0
+
+    def get_best_move(self, fen: str, difficulty: str) -> str:
+        """
+        Determina o melhor movimento com aprofundamento iterativo: busca as
+        profundidades 1, 2, ... até a máxima da dificuldade ou até acabar o
+        orçamento de tempo, ficando com o resultado da última iteração
+        completa.
+        """
+        board = chess.Board(fen)
+        if not any(board.legal_moves):
+            return None
+
+        difficulty = difficulty.lower()
+        max_depth = self.depth_config.get(difficulty, 1)
+        time_limit = self.time_config.get(difficulty, 1.0)
+        evaluation = self._evaluate_board(board)
+
+        self._prepare_search(board)
+        best_move = None
+        start = time.monotonic()
+        iterations = []
+
+        parallel = self.workers > 1 and board.legal_moves.count() > 1
+
+        for depth in range(1, max_depth + 1):
+            # A profundidade 1 sempre termina, garantindo um lance válido
+            self._deadline = start + time_limit if depth > 1 else None
+            try:
+                if parallel and depth > 1:
+                    best_move, score = self._search_root_parallel(board, depth, best_move)
+                else:
+                    best_move, score = self._search_root(board, depth, evaluation, best_move)
+            except _SearchTimeout:
+                break
+            iterations.append({
+                'depth': depth,
+                'move': best_move.uci(),
+                'score': score,
+                'nodes': self.nodes,
+                'time': round(time.monotonic() - start, 4)
+            })
+            # Mate encontrado: buscar mais fundo não muda o lance
+            if abs(score) >= MATE_THRESHOLD:
+                break
+
+        self._deadline = None
+        self._record_search_info(iterations, time.monotonic() - start)
+        return best_move.uci()
+
+    def _record_search_info(self, iterations: list, elapsed: float) -> None:
+        """Guarda as métricas da última busca (nós, quiescência, TT, nps)"""
+        last = iterations[-1]
+        score = last['score']
+        self.last_search_info = {
+            'depth': last['depth'],
+            'move': last['move'],
+            'score': score,
+            'mate_in': (MATE_SCORE - abs(score) + 1) // 2 * (1 if score > 0 else -1) if abs(score) >= MATE_THRESHOLD else None,
+            'nodes': self.nodes,
+            'qnodes': self.qnodes,
+            'tt_hits': self.tt_hits,
+            'tt_size': len(self._tt),
+            'time': round(elapsed, 4),
+            'nps': int(self.nodes / elapsed) if elapsed > 0 else 0,
+            'iterations': iterations
+        }
+
+    def get_search_info(self) -> dict:
+        """Retorna as métricas da última chamada a get_best_move"""
+        return dict(self.last_search_info)
+
+# Engine de cada processo da busca paralela, reaproveitado entre chamadas
+# para que a TT do processo sirva às próximas iterações da mesma partida
+_worker_engine = None
+_worker_game_id = None
+
+def _search_root_move(fen: str, move_uci: str, depth: int, alpha: int, deadline, game_id: int) -> tuple:
+    """
+    Executado nos processos do pool: busca um lance da raiz com a janela
+    (alpha, +inf) e retorna (score, nós, nós de quiescência, acertos na TT).
+    O score é None se o prazo acabou antes do fim da busca.
+    """
+    global _worker_engine, _worker_game_id
+
+    if _worker_engine is None:
+        _worker_engine = CMinimaxEngine()
+    engine = _worker_engine
+    if game_id != _worker_game_id:
+        engine.new_game()
+        _worker_game_id = game_id
+    if len(engine._tt) > engine.max_tt_entries:
+        engine._tt.clear()
+    engine._killers = {}
+    engine.nodes = engine.qnodes = engine.tt_hits = 0
+    # time.monotonic é o mesmo relógio do sistema em todos os processos
+    engine._deadline = deadline
+
+    board = chess.Board(fen)
+    move = chess.Move.from_uci(move_uci)
+    evaluation = engine._evaluate_board(board) + engine._move_delta(board, move)
+    board.push(move)
+    try:
+        score = -engine._negamax(board, depth - 1, -INFINITY, -alpha, 1, evaluation)
+    except _SearchTimeout:
+        score = None
+    finally:
+        engine._deadline = None
+
+    return score, engine.nodes, engine.qnodes, engine.tt_hits
@@ -1,17 +1,53 @@
+import atexit
 import chess
 import chess.engine
 import shutil
 import random
 import os
+import threading
+import weakref
 from framework.interfaces.i_chess_engine import IChessEngine
 
+# Erros que indicam um processo Stockfish morto ou em estado inválido
+ENGINE_FAILURES = (chess.engine.EngineError, chess.engine.EngineTerminatedError, OSError)
+
+# Instâncias vivas, encerradas na saída do interpretador: a thread do
+# python-chess não é daemon e seguraria o processo até o timer de ociosidade
+_instances = weakref.WeakSet()
+
+def _close_all() -> None:
+    for engine in list(_instances):
+        engine.close()
+
+# O gancho do threading roda antes do join das threads não daemon; o atexit
+# fica como reserva (close() pode ser chamado mais de uma vez)
+if hasattr(threading, '_register_atexit'):
+    threading._register_atexit(_close_all)
+atexit.register(_close_all)
+
 # Componente concreto de motor de xadrez usando Stockfish
 # ESTA É UMA IMPLEMENTAÇÃO DE HOTSPOT: Fornece inteligência artificial ao framework
 class CStockfishEngine(IChessEngine):
 
-    def __init__(self):
+    def __init__(self, idle_timeout: float = 300.0):
         self.name = "Stockfish Engine"
         self._engine_path = self._find_stockfish()
+        # Processo Stockfish mantido entre chamadas (iniciado sob demanda)
+        self._engine = None
+        self._options = {}
+        self._lock = threading.RLock()
+        # Encerra o processo depois de `idle_timeout` segundos sem uso (None = nunca)
+        self.idle_timeout = idle_timeout
+        self._idle_timer = None
+        # Chave da partida atual: quando muda, o python-chess envia `ucinewgame`
+        self._game_key = None
+        self._game_id = None
+        self._last_ply = None
+        # Métricas da última busca (nós, profundidade, nós/s) informadas pelo Stockfish
+        self.last_search_info = {}
+        self.starts = 0
+        self.restarts = 0
+        _instances.add(self)
 
     # Busca o executável do Stockfish no sistema
     def _find_stockfish(self) -> str or None:
@@ -21,9 +57,81 @@ class CStockfishEngine(IChessEngine):
                 return shutil.which(path)
         return None
 
+    # Inicia o processo na primeira jogada (ou depois de um encerramento)
+    def _ensure_engine(self) -> chess.engine.SimpleEngine:
+        if self._engine is None:
+            self._engine = chess.engine.SimpleEngine.popen_uci(self._engine_path)
+            self._options = {}
+            self._game_key = None
+            self.starts += 1
+        return self._engine
+
+    # Envia ao Stockfish apenas as opções que mudaram desde a última jogada
+    def _configure(self, options: dict) -> None:
+        changed = {name: value for name, value in options.items() if self._options.get(name) != value}
+        if changed:
+            self._engine.configure(changed)
+            self._options.update(changed)
+
+    # Identifica a partida: pelo game_id informado ou, sem ele, por uma
+    # posição com menos lances que a anterior (sinal de partida nova)
+    def _game_for(self, board: chess.Board, game_id) -> object:
+        if game_id is not None:
+            if game_id != self._game_id:
+                self._game_id = game_id
+                self._game_key = None
+        elif self._last_ply is not None and board.ply() < self._last_ply:
+            self._game_key = None
+        self._last_ply = board.ply()
+
+        if self._game_key is None:
+            self._game_key = object()
+        return self._game_key
+
+    # Reagenda o encerramento do processo ocioso
+    def _schedule_idle_shutdown(self) -> None:
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+        if self.idle_timeout:
+            self._idle_timer = threading.Timer(self.idle_timeout, self.close)
+            self._idle_timer.daemon = True
+            self._idle_timer.start()
+
+    # Descarta um processo que falhou, sem propagar novos erros
+    def _discard_engine(self) -> None:
+        engine, self._engine = self._engine, None
+        if engine is not None:
+            try:
+                engine.close()
+            except Exception:
+                pass
+
+    # Joga com o processo persistente; se ele morreu, sobe outro e tenta de novo
+    def _play(self, board: chess.Board, config: dict, game_id) -> str:
+        limit = chess.engine.Limit(time=config["time"], depth=config["depth"])
+        for attempt in range(2):
+            try:
+                engine = self._ensure_engine()
+                self._configure({"Skill Level": config["skill_level"]})
+                result = engine.play(board, limit, game=self._game_for(board, game_id), info=chess.engine.INFO_BASIC)
+                self.last_search_info = {
+                    "nodes": result.info.get("nodes"),
+                    "depth": result.info.get("depth"),
+                    "nps": result.info.get("nps")
+                }
+                return result.move.uci()
+            except ENGINE_FAILURES:
+                self._discard_engine()
+                if attempt:
+                    raise
+                self.restarts += 1
+                print("♻️  Stockfish reiniciado após falha")
+
     # Implementa a lógica para obter a melhor jogada
     # HOTSPOT: Define como a IA deve se comportar em cada dificuldade
-    def get_best_move(self, fen: str, difficulty: str) -> str:
+    # game_id (opcional) identifica a partida para reaproveitar o hash do motor
+    def get_best_move(self, fen: str, difficulty: str, game_id=None) -> str:
+        self.last_search_info = {}
         if not self.is_available():
             # Fallback: Se o Stockfish não estiver disponível, faz um movimento aleatório
             board = chess.Board(fen)
@@ -38,21 +146,46 @@ class CStockfishEngine(IChessEngine):
             "medium": {"depth": 10, "skill_level": 10, "time": 0.5},
             "hard":   {"depth": 15, "skill_level": 20, "time": 1.0}
         }
-        
+
         config = configs.get(difficulty, configs["medium"])
 
         try:
-            # Inicia o motor, calcula o movimento e encerra
-            with chess.engine.SimpleEngine.popen_uci(self._engine_path) as engine:
-                engine.configure({"Skill Level": config["skill_level"]})
-                result = engine.play(chess.Board(fen), chess.engine.Limit(time=config["time"], depth=config["depth"]))
-                return result.move.uci()
+            # Usa o motor persistente: sem novo processo nem handshake UCI por lance
+            with self._lock:
+                try:
+                    return self._play(chess.Board(fen), config, game_id)
+                finally:
+                    self._schedule_idle_shutdown()
         except Exception as e:
             print(f"Erro ao usar Stockfish: {e}")
             # Fallback em caso de erro técnico
             board = chess.Board(fen)
             return random.choice(list(board.legal_moves)).uci()
 
+    # Retorna as métricas da última chamada a get_best_move (vazio no fallback)
+    def get_search_info(self) -> dict:
+        return dict(self.last_search_info)
+
+    # Inicia uma nova partida explicitamente (o próximo lance envia ucinewgame)
+    def new_game(self, game_id=None) -> None:
+        with self._lock:
+            self._game_id = game_id
+            self._game_key = None
+            self._last_ply = None
+
+    # Encerra o processo Stockfish (chamado também pelo timer de ociosidade)
+    def close(self) -> None:
+        with self._lock:
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+            if self._engine is not None:
+                try:
+                    self._engine.quit()
+                except Exception:
+                    self._engine.close()
+                self._engine = None
+
     # Retorna o nome amigável do motor
     def get_engine_name(self) -> str:
         return self.name
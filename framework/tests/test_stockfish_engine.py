@@ -0,0 +1,62 @@
+import os
+import stat
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# Motor UCI mínimo: responde ao handshake e sempre joga e2e4
+FAKE_UCI = textwrap.dedent("""
+    import sys
+    for line in sys.stdin:
+        cmd = line.split()
+        if not cmd:
+            continue
+        if cmd[0] == "uci":
+            print("id name Fake", flush=True)
+            print("option name Skill Level type spin default 20 min 0 max 20", flush=True)
+            print("uciok", flush=True)
+        elif cmd[0] == "isready":
+            print("readyok", flush=True)
+        elif cmd[0] == "go":
+            print("info depth 1 nodes 42 nps 1000 score cp 10 pv e2e4", flush=True)
+            print("bestmove e2e4", flush=True)
+        elif cmd[0] == "quit":
+            break
+""")
+
+# Script que usa o motor persistente uma vez e retorna
+CLIENT = textwrap.dedent("""
+    import sys
+    from framework.components.engines.c_stockfish_engine import CStockfishEngine
+    engine = CStockfishEngine()
+    engine._engine_path = sys.argv[1]
+    print(engine.get_best_move("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", "easy"))
+""")
+
+class StockfishEngineShutdownTest(unittest.TestCase):
+
+    # O processo termina logo depois do último lance, sem esperar o timer de ociosidade
+    def test_process_exits_with_engine_open(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            fake = os.path.join(tmp, "fake_uci.py")
+            with open(fake, "w") as f:
+                f.write(f"#!{sys.executable}\n{FAKE_UCI}")
+            os.chmod(fake, os.stat(fake).st_mode | stat.S_IEXEC)
+
+            result = subprocess.run(
+                [sys.executable, "-c", CLIENT, fake],
+                cwd=REPO_ROOT,
+                capture_output=True,
+                text=True,
+                timeout=20
+            )
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), "e2e4")
+
+if __name__ == "__main__":
+    unittest.main()
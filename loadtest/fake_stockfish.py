@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+import chess
+import os
+import random
+import sys
+import time
+
+# Stockfish falso para testes de carga: fala UCI o suficiente para o
+# python-chess (uci, isready, setoption, ucinewgame, position, go, stop,
+# quit) e responde um lance legal aleatório depois de um "tempo de
+# pensamento" configurável, sem gastar CPU como o motor de verdade.
+# Uso: STOCKFISH_PATH=/caminho/fake_stockfish.py
+
+# Tempo (s) gasto em cada `go` (limitado pelo movetime pedido)
+THINK_TIME = float(os.environ.get('FAKE_STOCKFISH_THINK_TIME', 0.05))
+
+OPTIONS = [
+    'option name Hash type spin default 16 min 1 max 33554432',
+    'option name Threads type spin default 1 min 1 max 1024',
+    'option name MultiPV type spin default 1 min 1 max 500',
+    'option name Skill Level type spin default 20 min 0 max 20',
+]
+
+def send(line):
+    sys.stdout.write(line + '\n')
+    sys.stdout.flush()
+
+def parse_position(parts):
+    """position startpos|fen <fen> [moves ...]"""
+    if parts[1] == 'startpos':
+        board = chess.Board()
+        rest = parts[2:]
+    else:
+        end = parts.index('moves') if 'moves' in parts else len(parts)
+        board = chess.Board(' '.join(parts[2:end]))
+        rest = parts[end:]
+    if rest and rest[0] == 'moves':
+        for move in rest[1:]:
+            board.push_uci(move)
+    return board
+
+def think_time(parts):
+    """Tempo do `go`: movetime ou THINK_TIME, o que for menor"""
+    if 'movetime' in parts:
+        return min(THINK_TIME, int(parts[parts.index('movetime') + 1]) / 1000)
+    return THINK_TIME
+
+def best_move(board, multipv=1):
+    """Emite linhas `info` (uma por multipv) e retorna o lance escolhido"""
+    moves = list(board.legal_moves)
+    if not moves:
+        return None
+    random.shuffle(moves)
+    for index, move in enumerate(moves[:multipv], 1):
+        send(f'info depth 1 seldepth 1 multipv {index} score cp {random.randint(-50, 50)} '
+             f'nodes 1000 nps 1000000 time 1 pv {move.uci()}')
+    return moves[0]
+
+def main():
+    board = chess.Board()
+    multipv = 1
+    pending = False
+
+    for line in sys.stdin:
+        parts = line.split()
+        if not parts:
+            continue
+        command = parts[0]
+
+        if command == 'uci':
+            send('id name FakeStockfish')
+            send('id author loadtest')
+            for option in OPTIONS:
+                send(option)
+            send('uciok')
+        elif command == 'isready':
+            send('readyok')
+        elif command == 'setoption' and 'MultiPV' in parts:
+            multipv = int(parts[-1])
+        elif command == 'ucinewgame':
+            board = chess.Board()
+        elif command == 'position':
+            board = parse_position(parts)
+        elif command == 'go':
+            if 'infinite' in parts:
+                # Análise sem limite: responde só quando chegar o `stop`
+                pending = True
+                best_move(board, multipv)
+                continue
+            time.sleep(think_time(parts))
+            move = best_move(board, multipv)
+            send(f'bestmove {move.uci() if move else "(none)"}')
+        elif command == 'stop' and pending:
+            pending = False
+            move = best_move(board, multipv)
+            send(f'bestmove {move.uci() if move else "(none)"}')
+        elif command == 'quit':
+            break
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+import argparse
+import chess
+import chess.pgn
+import json
+import random
+import re
+import requests
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Gerador de carga ponta a ponta: cada sessão simula um jogador real passando
+# pelo API Gateway (registro, login, partida contra a IA, N lances com a
+# resposta da IA e gravação no histórico) e cada chamada é medida por rota.
+# Uso: python loadtest/run.py --gateway http://localhost:8000 --sessions 200 --concurrency 20
+
+# Limites (ms) dos baldes do histograma de latência
+HISTOGRAM_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+# Normaliza o path para agrupar métricas por rota (ids viram placeholders)
+ROUTE_PATTERNS = [
+    (re.compile(r'^/games/[^/]+/'), '/games/<id>/'),
+    (re.compile(r'^/games/[^/]+$'), '/games/<id>'),
+    (re.compile(r'^/history/users/\d+'), '/history/users/<id>'),
+]
+
+def route_name(method, path):
+    for pattern, replacement in ROUTE_PATTERNS:
+        path = pattern.sub(replacement, path)
+    return f'{method} {path}'
+
+def percentile(values, p):
+    """Percentil pelo método nearest-rank (p em 0..100)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+class RouteStats:
+    """Latências e códigos de status de todas as chamadas, por rota"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._statuses = {}
+        self._errors = {}
+
+    def record(self, route, elapsed_ms, status):
+        with self._lock:
+            self._latencies.setdefault(route, []).append(elapsed_ms)
+            statuses = self._statuses.setdefault(route, {})
+            statuses[status] = statuses.get(status, 0) + 1
+
+    def record_error(self, route, error):
+        with self._lock:
+            errors = self._errors.setdefault(route, {})
+            name = type(error).__name__
+            errors[name] = errors.get(name, 0) + 1
+
+    def report(self, wall_time):
+        """Throughput, percentis e histograma por rota"""
+        with self._lock:
+            routes = {}
+            for route in sorted(set(self._latencies) | set(self._errors)):
+                latencies = self._latencies.get(route, [])
+                histogram = {}
+                for bound in HISTOGRAM_BUCKETS_MS:
+                    histogram[f'le_{bound}ms'] = sum(1 for value in latencies if value <= bound)
+                histogram['inf'] = len(latencies)
+                routes[route] = {
+                    'requests': len(latencies),
+                    'throughput_rps': round(len(latencies) / wall_time, 2) if wall_time > 0 else 0.0,
+                    'status_codes': {str(code): n for code, n in sorted(self._statuses.get(route, {}).items())},
+                    'errors': dict(self._errors.get(route, {})),
+                    'latency_ms': {
+                        'mean': round(sum(latencies) / len(latencies), 2) if latencies else None,
+                        'p50': percentile(latencies, 50),
+                        'p95': percentile(latencies, 95),
+                        'p99': percentile(latencies, 99),
+                        'max': max(latencies) if latencies else None
+                    },
+                    'histogram': histogram
+                }
+            return routes
+
+class Session:
+    """Um jogador: sessão HTTP própria, token JWT e uma partida contra a IA"""
+
+    def __init__(self, gateway, stats, moves, difficulty, timeout):
+        self.gateway = gateway.rstrip('/')
+        self.stats = stats
+        self.moves = moves
+        self.difficulty = difficulty
+        self.timeout = timeout
+        self.http = requests.Session()
+        self.token = None
+        self.user_id = None
+
+    def call(self, method, path, body=None):
+        """Faz a chamada pelo gateway e registra latência e status"""
+        route = route_name(method, path)
+        headers = {'Authorization': f'Bearer {self.token}'} if self.token else {}
+        start = time.perf_counter()
+        try:
+            response = self.http.request(method, self.gateway + path, json=body, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            self.stats.record_error(route, e)
+            raise
+        self.stats.record(route, round((time.perf_counter() - start) * 1000, 2), response.status_code)
+        try:
+            return response.status_code, response.json()
+        except ValueError:
+            return response.status_code, {}
+
+    def run(self):
+        """Roteiro completo de uma sessão; retorna True se chegou ao fim"""
+        email = f'load-{uuid.uuid4().hex[:12]}@loadtest.local'
+        password = 'loadtest123'
+
+        status, body = self.call('POST', '/auth/register', {'name': 'Load Test', 'email': email, 'password': password})
+        if status != 201:
+            return False
+        status, body = self.call('POST', '/auth/login', {'email': email, 'password': password})
+        if status != 200:
+            return False
+        self.token = body['token']
+        self.user_id = body['user_id']
+
+        status, body = self.call('POST', '/games', {'mode': 'ai', 'white_player_id': self.user_id, 'black_player_id': None})
+        if status != 201:
+            return False
+        game_id = body['game_id']
+
+        board = chess.Board()
+        started = time.monotonic()
+        for _ in range(self.moves):
+            if board.is_game_over():
+                break
+            # Lance do "jogador": aleatório entre os legais
+            if not self._play(game_id, board, random.choice(list(board.legal_moves))):
+                return False
+            if board.is_game_over():
+                break
+            # Resposta da IA, aplicada na partida como o frontend faz
+            status, body = self.call('POST', '/ai/move', {'fen': board.fen(), 'difficulty': self.difficulty})
+            if status != 200:
+                return False
+            if not self._play(game_id, board, chess.Move.from_uci(body['move']['uci'])):
+                return False
+
+        self.call('GET', f'/games/{game_id}')
+        status, _ = self.call('POST', '/history/games', {
+            'game_id': game_id,
+            'mode': 'ai',
+            'white_player_id': self.user_id,
+            'black_player_id': None,
+            'winner': None,
+            'status': 'completed',
+            'moves_count': len(board.move_stack),
+            'duration_seconds': int(time.monotonic() - started),
+            'pgn': str(chess.pgn.Game.from_board(board).mainline_moves())
+        })
+        self.call('GET', f'/history/users/{self.user_id}')
+        return status == 201
+
+    def _play(self, game_id, board, move):
+        """Envia o lance para o Game Service e aplica no tabuleiro local"""
+        body = {'from': chess.square_name(move.from_square), 'to': chess.square_name(move.to_square)}
+        if move.promotion:
+            body['promotion'] = chess.piece_symbol(move.promotion)
+        status, _ = self.call('POST', f'/games/{game_id}/move', body)
+        if status != 200:
+            return False
+        board.push(move)
+        return True
+
+def run_load(gateway, sessions, concurrency, moves, difficulty, timeout):
+    """Executa `sessions` sessões com até `concurrency` simultâneas"""
+    stats = RouteStats()
+    completed = 0
+    failed = 0
+
+    def one_session(_):
+        try:
+            return Session(gateway, stats, moves, difficulty, timeout).run()
+        except requests.RequestException:
+            return False
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for ok in executor.map(one_session, range(sessions)):
+            if ok:
+                completed += 1
+            else:
+                failed += 1
+    wall_time = time.monotonic() - start
+
+    routes = stats.report(wall_time)
+    total_requests = sum(route['requests'] for route in routes.values())
+    return {
+        'gateway': gateway,
+        'sessions': sessions,
+        'concurrency': concurrency,
+        'moves_per_session': moves,
+        'difficulty': difficulty,
+        'completed_sessions': completed,
+        'failed_sessions': failed,
+        'wall_time_seconds': round(wall_time, 3),
+        'total_requests': total_requests,
+        'throughput_rps': round(total_requests / wall_time, 2) if wall_time > 0 else 0.0,
+        'routes': routes
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Teste de carga ponta a ponta pelo API Gateway')
+    parser.add_argument('--gateway', default='http://localhost:8000')
+    parser.add_argument('--sessions', type=int, default=50, help='total de sessões (jogadores)')
+    parser.add_argument('--concurrency', type=int, default=10, help='sessões simultâneas')
+    parser.add_argument('--moves', type=int, default=10, help='lances do jogador por partida')
+    parser.add_argument('--difficulty', default='easy', choices=['easy', 'medium', 'hard'])
+    parser.add_argument('--timeout', type=float, default=30.0, help='timeout (s) de cada chamada')
+    parser.add_argument('--output', help='arquivo JSON de saída (padrão: stdout)')
+    args = parser.parse_args(argv)
+
+    report = run_load(args.gateway, args.sessions, max(1, args.concurrency), args.moves, args.difficulty, args.timeout)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    print(f"✅ {report['completed_sessions']}/{args.sessions} sessões, "
+          f"{report['total_requests']} requisições, {report['throughput_rps']} req/s", file=sys.stderr)
+    return 0 if report['failed_sessions'] == 0 else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,161 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Prioridades (menor = mais urgente)
+PRIORITY_MOVE = 0    # lance da IA numa partida em andamento
+PRIORITY_HINT = 1    # dica pedida pelo jogador
+PRIORITY_BATCH = 2   # análise em lote
+
+PRIORITY_NAMES = {
+    PRIORITY_MOVE: 'move',
+    PRIORITY_HINT: 'hint',
+    PRIORITY_BATCH: 'batch'
+}
+
+class AdmissionRejected(Exception):
+    """Requisição recusada pelo controle de admissão"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class QueueFull(AdmissionRejected):
+    """Fila cheia (ou requisição descartada por outra mais prioritária)"""
+    pass
+
+class DeadlineExceeded(AdmissionRejected):
+    """A requisição esperou mais que o seu prazo e já não vale a pena atender"""
+    pass
+
+class _Ticket:
+    """Entrada da fila: ordenada por prioridade e depois por chegada"""
+    __slots__ = ('priority', 'seq', 'deadline', 'enqueued_at', 'shed')
+
+    def __init__(self, priority, seq, deadline, enqueued_at):
+        self.priority = priority
+        self.seq = seq
+        self.deadline = deadline
+        self.enqueued_at = enqueued_at
+        self.shed = False
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+class AdmissionController:
+    """
+    Fila de prioridade limitada na frente do motor. No máximo `capacity`
+    buscas rodam ao mesmo tempo; as demais esperam por prioridade. Com a
+    fila cheia, uma requisição mais prioritária descarta a menos
+    prioritária da fila; caso contrário é recusada (429). Quem passa do
+    prazo esperando é descartado sem ocupar o motor.
+    """
+
+    def __init__(self, capacity, max_queue):
+        self.capacity = max(1, capacity)
+        self.max_queue = max(0, max_queue)
+        self._cond = threading.Condition()
+        self._queue = []
+        self._running = 0
+        self._seq = itertools.count()
+        self._service_time = 0.5
+        self._admitted = {p: 0 for p in PRIORITY_NAMES}
+        self._rejected = {p: 0 for p in PRIORITY_NAMES}
+        self._expired = {p: 0 for p in PRIORITY_NAMES}
+        self._total_wait = 0.0
+        self._max_depth = 0
+
+    @contextmanager
+    def admit(self, priority, timeout):
+        """Ocupa uma vaga do motor pelo tempo do bloco `with`"""
+        self._enter(priority, timeout)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._leave(time.monotonic() - started)
+
+    def _enter(self, priority, timeout):
+        now = time.monotonic()
+        with self._cond:
+            if self._running < self.capacity and not self._queue:
+                self._running += 1
+                self._admitted[priority] += 1
+                return
+
+            if len(self._queue) >= self.max_queue:
+                worst = max(self._queue) if self._queue else None
+                if worst is None or worst.priority <= priority:
+                    self._rejected[priority] += 1
+                    raise QueueFull('AI engine queue is full', self.retry_after())
+                # Abre espaço descartando a requisição menos prioritária
+                self._remove(worst)
+                worst.shed = True
+
+            ticket = _Ticket(priority, next(self._seq), now + timeout, now)
+            heapq.heappush(self._queue, ticket)
+            self._max_depth = max(self._max_depth, len(self._queue))
+
+            while True:
+                if ticket.shed:
+                    self._rejected[priority] += 1
+                    raise QueueFull('Request displaced by higher priority work', self.retry_after())
+
+                if self._queue[0] is ticket and self._running < self.capacity:
+                    heapq.heappop(self._queue)
+                    self._running += 1
+                    self._admitted[priority] += 1
+                    self._total_wait += time.monotonic() - ticket.enqueued_at
+                    # O próximo da fila pode ter vaga também
+                    self._cond.notify_all()
+                    return
+
+                remaining = ticket.deadline - time.monotonic()
+                if remaining <= 0:
+                    self._remove(ticket)
+                    self._expired[priority] += 1
+                    raise DeadlineExceeded('Request expired while waiting for the AI engine', self.retry_after())
+
+                self._cond.wait(remaining)
+
+    def _remove(self, ticket):
+        """Tira um ticket do meio da fila e acorda quem espera"""
+        self._queue.remove(ticket)
+        heapq.heapify(self._queue)
+        self._cond.notify_all()
+
+    def _leave(self, elapsed):
+        with self._cond:
+            self._running -= 1
+            # Média móvel do tempo de serviço, usada no Retry-After
+            self._service_time = 0.8 * self._service_time + 0.2 * elapsed
+            self._cond.notify_all()
+
+    def retry_after(self):
+        """Segundos estimados até a fila esvaziar (mínimo 1)"""
+        backlog = len(self._queue) + self._running
+        return max(1, math.ceil(backlog / self.capacity * self._service_time))
+
+    def stats(self):
+        """Profundidade da fila e contadores por prioridade"""
+        with self._cond:
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for ticket in self._queue:
+                depth[PRIORITY_NAMES[ticket.priority]] += 1
+            admitted = sum(self._admitted.values())
+            return {
+                'capacity': self.capacity,
+                'max_queue': self.max_queue,
+                'running': self._running,
+                'queue_depth': len(self._queue),
+                'queue_depth_by_priority': depth,
+                'max_queue_depth': self._max_depth,
+                'admitted': {PRIORITY_NAMES[p]: n for p, n in self._admitted.items()},
+                'rejected': {PRIORITY_NAMES[p]: n for p, n in self._rejected.items()},
+                'expired': {PRIORITY_NAMES[p]: n for p, n in self._expired.items()},
+                'avg_service_time': round(self._service_time, 3),
+                'avg_wait_time': round(self._total_wait / admitted, 3) if admitted else 0.0
+            }
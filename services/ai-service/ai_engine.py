@@ -1,28 +1,84 @@
 import chess
 import chess.engine
+import chess.polyglot
 import random
+import threading
 import os
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from engine_pool import EnginePool, PoolTimeout
+from move_cache import MoveCache, position_key
+from search_budget import SearchBudget
+from admission import (
+    AdmissionController, AdmissionRejected, QueueFull,
+    PRIORITY_MOVE, PRIORITY_HINT, PRIORITY_BATCH
+)
 
 # Configurações de dificuldade
 DIFFICULTY_SETTINGS = {
     'easy': {
         'depth': 5,
         'skill_level': 5,
-        'time_limit': 0.1
+        'time_limit': 0.1,
+        'book_moves': None   # sorteio ponderado entre todos os lances do livro
     },
     'medium': {
         'depth': 10,
         'skill_level': 10,
-        'time_limit': 0.5
+        'time_limit': 0.5,
+        'book_moves': 3      # sorteio ponderado entre os 3 mais jogados
     },
     'hard': {
         'depth': 15,
         'skill_level': 20,
-        'time_limit': 1.0
+        'time_limit': 1.0,
+        'book_moves': 1      # sempre o lance de maior peso
     }
 }
 
+# Tamanho do pool de processos Stockfish (padrão: um por núcleo)
+ENGINE_POOL_SIZE = int(os.environ.get('ENGINE_POOL_SIZE', os.cpu_count() or 1))
+# Intervalo (s) do health check dos workers ociosos; 0 desativa
+ENGINE_HEALTH_INTERVAL = float(os.environ.get('ENGINE_HEALTH_INTERVAL', 30))
+# Tempo máximo (s) esperando um worker livre antes de cair no fallback
+ENGINE_CHECKOUT_TIMEOUT = float(os.environ.get('ENGINE_CHECKOUT_TIMEOUT', 10))
+
+# Controle de admissão: tamanho máximo da fila de espera pelo motor e
+# prazo (s) que cada tipo de requisição aceita esperar antes de ser descartada
+ADMISSION_MAX_QUEUE = int(os.environ.get('ADMISSION_MAX_QUEUE', ENGINE_POOL_SIZE * 8))
+ADMISSION_TIMEOUTS = {
+    PRIORITY_MOVE: float(os.environ.get('ADMISSION_MOVE_TIMEOUT', 20)),
+    PRIORITY_HINT: float(os.environ.get('ADMISSION_HINT_TIMEOUT', 10)),
+    PRIORITY_BATCH: float(os.environ.get('ADMISSION_BATCH_TIMEOUT', 60))
+}
+
+# Cache de melhores lances por posição: tamanho (0 desativa), TTL em
+# segundos (0 = sem expiração) e arquivo SQLite opcional da camada em disco
+MOVE_CACHE_SIZE = int(os.environ.get('MOVE_CACHE_SIZE', 10000))
+MOVE_CACHE_TTL = float(os.environ.get('MOVE_CACHE_TTL', 0))
+MOVE_CACHE_DB = os.environ.get('MOVE_CACHE_DB')
+
+_move_cache = MoveCache(MOVE_CACHE_SIZE, MOVE_CACHE_TTL, MOVE_CACHE_DB)
+
+# Máximo de posições aceitas por requisição de análise em lote
+BATCH_MAX_POSITIONS = int(os.environ.get('BATCH_MAX_POSITIONS', 200))
+
+# Teto de profundidade e de tempo (s) por posição pedidos pelo cliente na
+# análise (o padrão é o limite da dificuldade 'hard')
+ANALYSIS_MAX_DEPTH = int(os.environ.get('ANALYSIS_MAX_DEPTH', DIFFICULTY_SETTINGS['hard']['depth']))
+ANALYSIS_MAX_TIME = float(os.environ.get('ANALYSIS_MAX_TIME', DIFFICULTY_SETTINGS['hard']['time_limit']))
+
+# Análise em streaming: duração máxima (s), máximo de linhas (MultiPV) e
+# quantas análises podem ocupar workers do pool ao mesmo tempo
+STREAM_MAX_TIME = float(os.environ.get('STREAM_MAX_TIME', 30))
+STREAM_MAX_MULTIPV = int(os.environ.get('STREAM_MAX_MULTIPV', 5))
+STREAM_MAX_CONCURRENT = int(os.environ.get('STREAM_MAX_CONCURRENT', max(1, ENGINE_POOL_SIZE // 2)))
+
+_stream_slots = threading.BoundedSemaphore(STREAM_MAX_CONCURRENT)
+
+# Livro de aberturas Polyglot (.bin) consultado antes do Stockfish
+OPENING_BOOK_PATH = os.environ.get('OPENING_BOOK_PATH')
+
 # Possíveis caminhos do Stockfish
 STOCKFISH_PATHS = [
     '/usr/games/stockfish',
@@ -34,6 +90,10 @@ STOCKFISH_PATHS = [
 
 def find_stockfish():
     """Procura pelo executável do Stockfish"""
+    env_path = os.environ.get('STOCKFISH_PATH')
+    if env_path and Path(env_path).exists():
+        return env_path
+
     for path in STOCKFISH_PATHS:
         if Path(path).exists():
             return path
@@ -45,37 +105,131 @@ def find_stockfish():
     
     return None
 
-_engine = None
+_pool = None
 _engine_path = None
+_pool_lock = threading.Lock()
+_budget = SearchBudget(ENGINE_POOL_SIZE)
+_admission = AdmissionController(ENGINE_POOL_SIZE, ADMISSION_MAX_QUEUE)
+
+def get_pool():
+    """Retorna o pool de processos Stockfish (singleton, criado sob demanda)"""
+    global _pool, _engine_path
+    
+    if _pool is not None:
+        return _pool
+    
+    with _pool_lock:
+        if _pool is not None:
+            return _pool
+        
+        if _engine_path is None:
+            _engine_path = find_stockfish()
+        
+        if _engine_path is None:
+            return None
+        
+        try:
+            _pool = EnginePool(
+                _engine_path,
+                ENGINE_POOL_SIZE,
+                health_interval=ENGINE_HEALTH_INTERVAL
+            ).start()
+            return _pool
+        except Exception as e:
+            print(f"❌ Error loading Stockfish: {e}")
+            return None
+
+_book = None
+_book_loaded = False
+_book_hits = 0
+# Protege o contador do livro (incrementado pelas threads do Flask)
+_stats_lock = threading.Lock()
 
-def get_engine():
-    """Retorna instância do Stockfish (singleton)"""
-    global _engine, _engine_path
+def get_opening_book():
+    """Retorna o livro de aberturas mapeado em memória (ou None)"""
+    global _book, _book_loaded
     
-    if _engine is not None:
-        return _engine
+    if _book_loaded:
+        return _book
     
-    if _engine_path is None:
-        _engine_path = find_stockfish()
+    with _pool_lock:
+        if not _book_loaded:
+            if OPENING_BOOK_PATH and Path(OPENING_BOOK_PATH).exists():
+                try:
+                    _book = chess.polyglot.open_reader(OPENING_BOOK_PATH)
+                    print(f"📖 Opening book loaded from: {OPENING_BOOK_PATH}")
+                except Exception as e:
+                    print(f"❌ Error loading opening book: {e}")
+            _book_loaded = True
+    return _book
+
+def _get_book_move(board, settings):
+    """Sorteia um lance do livro, ponderado pelo peso, conforme a dificuldade"""
+    global _book_hits
     
-    if _engine_path is None:
+    book = get_opening_book()
+    if book is None:
         return None
     
     try:
-        _engine = chess.engine.SimpleEngine.popen_uci(_engine_path)
-        print(f"✅ Stockfish loaded from: {_engine_path}")
-        return _engine
+        entries = sorted(book.find_all(board), key=lambda e: e.weight, reverse=True)
     except Exception as e:
-        print(f"❌ Error loading Stockfish: {e}")
+        print(f"Error reading opening book: {e}")
+        return None
+    
+    if settings.get('book_moves'):
+        entries = entries[:settings['book_moves']]
+    if not entries:
         return None
+    
+    weights = [entry.weight for entry in entries]
+    if sum(weights) > 0:
+        entry = random.choices(entries, weights=weights)[0]
+    else:
+        entry = random.choice(entries)
+    
+    with _stats_lock:
+        _book_hits += 1
+    return entry.move.uci()
+
+def get_fast_move(board, settings):
+    """
+    Caminho rápido antes do Stockfish: livro de aberturas e depois o cache
+    de posições repetidas. Retorna None se nenhum dos dois responder.
+    """
+    # Na abertura o livro responde sem tocar no Stockfish
+    book_move = _get_book_move(board, settings)
+    if book_move:
+        return book_move
+    
+    # Posições repetidas (aberturas, linhas populares) saem do cache
+    cached_move = _move_cache.get(position_key(board, settings))
+    if cached_move and chess.Move.from_uci(cached_move) in board.legal_moves:
+        return cached_move
+    
+    return None
+
+def remember_move(board, settings, move, think_time):
+    """
+    Guarda no cache o lance calculado pelo Stockfish. Buscas encurtadas
+    pelo orçamento (relógio curto, fila cheia) não entram: o lance apressado
+    seria devolvido a todos os pedidos seguintes da mesma posição.
+    """
+    if think_time < settings['time_limit']:
+        return
+    _move_cache.set(position_key(board, settings), move)
 
 def is_stockfish_available():
     """Verifica se o Stockfish está disponível"""
-    return get_engine() is not None
+    return get_pool() is not None
 
-def get_best_move(fen, difficulty='medium'):
+def get_best_move(fen, difficulty='medium', clock=None, priority=PRIORITY_MOVE):
     """
     Calcula o melhor movimento usando Stockfish
+    clock: relógio opcional de quem joga ({"remaining", "increment"}),
+    usado para dimensionar o tempo de busca
+    priority: prioridade na fila do motor (lance > dica > lote).
+    Lança AdmissionRejected se a fila estiver cheia ou o prazo acabar.
     """
     try:
         board = chess.Board(fen)
@@ -83,25 +237,39 @@ def get_best_move(fen, difficulty='medium'):
         if board.is_game_over():
             return None
         
-        engine = get_engine()
-        
-        if engine is None:
-            return _get_random_move(board)
+        # Lance forçado: não há o que buscar
+        forced_move = _get_forced_move(board)
+        if forced_move:
+            return forced_move
         
         settings = DIFFICULTY_SETTINGS.get(difficulty, DIFFICULTY_SETTINGS['medium'])
         
-        engine.configure({"Skill Level": settings['skill_level']})
+        fast_move = get_fast_move(board, settings)
+        if fast_move:
+            return fast_move
         
-        result = engine.play(
-            board,
-            chess.engine.Limit(
-                time=settings['time_limit'],
-                depth=settings['depth']
-            )
-        )
+        pool = get_pool()
         
-        return result.move.uci()
+        if pool is None:
+            return _get_random_move(board)
+        
+        with _budget.track(), \
+                _admission.admit(priority, ADMISSION_TIMEOUTS[priority]), \
+                pool.worker(timeout=ENGINE_CHECKOUT_TIMEOUT) as worker:
+            worker.configure({"Skill Level": settings['skill_level']})
+            
+            limit = _budget.limit(board, settings, clock)
+            result = worker.engine.play(board, limit)
+        
+        best_move = result.move.uci()
+        remember_move(board, settings, best_move, limit.time)
+        return best_move
     
+    except AdmissionRejected:
+        raise
+    except PoolTimeout:
+        print("⚠️ All Stockfish workers busy, using fallback move")
+        return _get_random_move(chess.Board(fen))
     except Exception as e:
         print(f"Error calculating move: {e}")
         try:
@@ -110,6 +278,146 @@ def get_best_move(fen, difficulty='medium'):
         except:
             return None
 
+def _format_score(score):
+    """Converte o score do python-chess (ponto de vista das brancas) em dict"""
+    if score is None:
+        return None
+    white = score.white()
+    return {'cp': white.score(), 'mate': white.mate()}
+
+def analyze_position(fen, difficulty='medium', depth=None, time_limit=None):
+    """
+    Analisa uma posição e retorna o melhor lance, a avaliação e a variante
+    principal. depth/time_limit sobrescrevem os limites da dificuldade,
+    até ANALYSIS_MAX_DEPTH/ANALYSIS_MAX_TIME.
+    """
+    board = chess.Board(fen)
+    
+    if board.is_game_over():
+        return {'fen': fen, 'move': None, 'score': None, 'pv': [], 'game_over': True}
+    
+    settings = DIFFICULTY_SETTINGS.get(difficulty, DIFFICULTY_SETTINGS['medium'])
+    limit = chess.engine.Limit(
+        time=min(time_limit or settings['time_limit'], ANALYSIS_MAX_TIME),
+        depth=min(int(depth or settings['depth']), ANALYSIS_MAX_DEPTH)
+    )
+    
+    pool = get_pool()
+    if pool is None:
+        return {'fen': fen, 'move': _get_random_move(board), 'score': None, 'pv': []}
+    
+    with _admission.admit(PRIORITY_BATCH, ADMISSION_TIMEOUTS[PRIORITY_BATCH]), \
+            pool.worker(timeout=ENGINE_CHECKOUT_TIMEOUT) as worker:
+        worker.configure({"Skill Level": settings['skill_level']})
+        info = worker.engine.analyse(board, limit)
+    
+    pv = [move.uci() for move in info.get('pv', [])]
+    return {
+        'fen': fen,
+        'move': pv[0] if pv else None,
+        'score': _format_score(info.get('score')),
+        'depth': info.get('depth'),
+        'pv': pv
+    }
+
+class StreamBusy(Exception):
+    """Todas as vagas de análise em streaming estão ocupadas"""
+    pass
+
+def stream_analysis(fen, multipv=1, max_time=None):
+    """
+    Gera as linhas `info` de uma análise contínua à medida que a busca se
+    aprofunda. O worker do pool é liberado assim que o gerador é fechado
+    (cliente desconectou ou pediu outra posição) ou o tempo máximo acaba.
+    """
+    board = chess.Board(fen)
+    multipv = max(1, min(multipv, STREAM_MAX_MULTIPV))
+    max_time = min(max_time or STREAM_MAX_TIME, STREAM_MAX_TIME)
+    
+    if board.is_game_over():
+        return
+    
+    pool = get_pool()
+    if pool is None:
+        yield {'depth': 0, 'multipv': 1, 'score': None, 'pv': [_get_random_move(board)]}
+        return
+    
+    if not _stream_slots.acquire(blocking=False):
+        raise StreamBusy('Too many streaming analyses in progress')
+    
+    try:
+        with _admission.admit(PRIORITY_HINT, ADMISSION_TIMEOUTS[PRIORITY_HINT]), \
+                pool.worker(timeout=ENGINE_CHECKOUT_TIMEOUT) as worker:
+            worker.configure({"Skill Level": DIFFICULTY_SETTINGS['hard']['skill_level']})
+            
+            with worker.engine.analysis(board, chess.engine.Limit(time=max_time), multipv=multipv) as analysis:
+                for info in analysis:
+                    if 'pv' not in info or 'score' not in info:
+                        continue
+                    yield {
+                        'depth': info.get('depth'),
+                        'seldepth': info.get('seldepth'),
+                        'multipv': info.get('multipv', 1),
+                        'score': _format_score(info['score']),
+                        'pv': [move.uci() for move in info['pv']],
+                        'nodes': info.get('nodes'),
+                        'nps': info.get('nps'),
+                        'time': info.get('time')
+                    }
+    finally:
+        _stream_slots.release()
+
+_batch_executor = None
+
+def analyze_batch(items):
+    """
+    Distribui as posições entre os workers do pool e gera os resultados
+    (com o índice original) na ordem em que ficam prontos
+    """
+    global _batch_executor
+    
+    # Criado sob o lock: dois lotes simultâneos não abrem dois executores
+    with _pool_lock:
+        if _batch_executor is None:
+            _batch_executor = ThreadPoolExecutor(
+                max_workers=ENGINE_POOL_SIZE,
+                thread_name_prefix='ai-batch'
+            )
+        executor = _batch_executor
+    
+    futures = {
+        executor.submit(
+            analyze_position,
+            item['fen'],
+            item.get('difficulty', 'medium'),
+            item.get('depth'),
+            item.get('time_limit')
+        ): index
+        for index, item in enumerate(items)
+    }
+    
+    try:
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'fen': items[index]['fen'], 'error': str(e)}
+            result['index'] = index
+            yield result
+    finally:
+        # Cliente desconectou: descarta o que ainda não começou
+        for future in futures:
+            future.cancel()
+
+def _get_forced_move(board):
+    """Retorna o único lance legal, se a posição só tiver um"""
+    legal_moves = iter(board.legal_moves)
+    first = next(legal_moves, None)
+    if first is not None and next(legal_moves, None) is None:
+        return first.uci()
+    return None
+
 def _get_random_move(board):
     """Fallback: retorna um movimento aleatório legal"""
     legal_moves = list(board.legal_moves)
@@ -143,10 +451,35 @@ def get_move_details(fen, move_uci):
             'piece': None
         }
 
+def get_stats():
+    """Métricas do motor de IA"""
+    pool = _pool
+    with _stats_lock:
+        book_hits = _book_hits
+    return {
+        'stockfish_path': _engine_path,
+        'engine_pool': pool.stats() if pool is not None else None,
+        'move_cache': _move_cache.stats(),
+        'search_budget': _budget.stats(),
+        'admission': _admission.stats(),
+        'opening_book': {
+            'path': OPENING_BOOK_PATH if _book is not None else None,
+            'hits': book_hits
+        }
+    }
+
 def cleanup():
-    """Fecha a engine do Stockfish"""
-    global _engine
-    if _engine is not None:
-        _engine.quit()
-        _engine = None
-        print("🔴 Stockfish engine closed")
\ No newline at end of file
+    """Fecha os processos do Stockfish"""
+    global _pool, _batch_executor, _book
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+        print("🔴 Stockfish engine pool closed")
+    with _pool_lock:
+        executor, _batch_executor = _batch_executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+    _move_cache.close()
+    if _book is not None:
+        _book.close()
+        _book = None
\ No newline at end of file
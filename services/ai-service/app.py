@@ -1,7 +1,11 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import ai_engine
+import search_budget
+import atexit
+import json
 import os
+import threading
 
 app = Flask(__name__)
 
@@ -11,18 +15,37 @@ CORS(app, origins=[
     "https://*.onrender.com"  # Permitir chamadas entre serviços Render
 ])
 
+# Encerra os processos do Stockfish quando o serviço termina. As threads do
+# python-chess não são daemon e o atexit só roda depois do join delas: o
+# gancho do threading roda antes (é o mesmo que o concurrent.futures usa)
+if hasattr(threading, '_register_atexit'):
+    threading._register_atexit(ai_engine.cleanup)
+atexit.register(ai_engine.cleanup)
+
 @app.route('/health', methods=['GET'])
 def health():
     """Endpoint para verificar se o serviço está funcionando"""
     return jsonify({'status': 'AI Service is running!'}), 200
 
+@app.route('/ai/stats', methods=['GET'])
+def get_stats():
+    """Métricas do motor de IA (pool de Stockfish)"""
+    return jsonify(ai_engine.get_stats()), 200
+
+def _rejected_response(error):
+    """429 com a fila cheia, 503 quando o prazo de espera acabou"""
+    status = 429 if isinstance(error, ai_engine.QueueFull) else 503
+    return jsonify({'error': str(error)}), status, {'Retry-After': str(error.retry_after)}
+
 @app.route('/ai/move', methods=['POST'])
 def get_ai_move():
     """
     Retorna a melhor jogada calculada pela IA
     Body: {
         "fen": "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
-        "difficulty": "easy" | "medium" | "hard" (opcional, padrão: medium)
+        "difficulty": "easy" | "medium" | "hard" (opcional, padrão: medium),
+        "remaining_time": 180.0 (opcional, segundos no relógio da IA),
+        "increment": 2.0 (opcional, incremento por lance em segundos)
     }
     """
     data = request.json
@@ -37,7 +60,12 @@ def get_ai_move():
         return jsonify({'error': 'Difficulty must be easy, medium or hard'}), 400
     
     try:
-        best_move = ai_engine.get_best_move(fen, difficulty)
+        clock = search_budget.parse_clock(data)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'remaining_time, increment and moves_to_go must be valid numbers'}), 400
+    
+    try:
+        best_move = ai_engine.get_best_move(fen, difficulty, clock)
         
         if not best_move:
             return jsonify({'error': 'No legal moves available or game is over'}), 400
@@ -58,6 +86,8 @@ def get_ai_move():
             'evaluation': move_info.get('evaluation'),
             'fen': fen
         }), 200
+    except ai_engine.AdmissionRejected as e:
+        return _rejected_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -77,7 +107,7 @@ def get_hint():
     fen = data['fen']
     
     try:
-        best_move = ai_engine.get_best_move(fen, 'hard')
+        best_move = ai_engine.get_best_move(fen, 'hard', priority=ai_engine.PRIORITY_HINT)
         
         if not best_move:
             return jsonify({'error': 'No legal moves available'}), 400
@@ -93,9 +123,101 @@ def get_hint():
                 'piece': move_info['piece']
             }
         }), 200
+    except ai_engine.AdmissionRejected as e:
+        return _rejected_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/ai/analyze-batch', methods=['POST'])
+def analyze_batch():
+    """
+    Analisa várias posições numa única requisição
+    Body: {
+        "positions": [
+            "fen...",
+            {"fen": "...", "difficulty": "hard", "depth": 12, "time_limit": 0.5}
+        ],
+        "difficulty": "medium" (opcional, padrão para itens sem dificuldade)
+    }
+    Resposta: NDJSON, uma linha por posição na ordem em que terminam
+    """
+    data = request.json
+    
+    if not data or not isinstance(data.get('positions'), list) or not data['positions']:
+        return jsonify({'error': 'positions must be a non-empty list'}), 400
+    
+    if len(data['positions']) > ai_engine.BATCH_MAX_POSITIONS:
+        return jsonify({'error': f'At most {ai_engine.BATCH_MAX_POSITIONS} positions per request'}), 400
+    
+    default_difficulty = data.get('difficulty', 'medium')
+    items = []
+    for position in data['positions']:
+        if isinstance(position, str):
+            position = {'fen': position}
+        if not isinstance(position, dict):
+            return jsonify({'error': 'Every position must be a FEN string or an object'}), 400
+        item = dict(position)
+        item.setdefault('difficulty', default_difficulty)
+        
+        if not isinstance(item.get('fen'), str) or not item['fen']:
+            return jsonify({'error': 'Every position needs a FEN'}), 400
+        if item['difficulty'] not in ['easy', 'medium', 'hard']:
+            return jsonify({'error': 'Difficulty must be easy, medium or hard'}), 400
+        for field in ('depth', 'time_limit'):
+            value = item.get(field)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0):
+                return jsonify({'error': f'{field} must be a positive number'}), 400
+        items.append(item)
+    
+    def generate():
+        for result in ai_engine.analyze_batch(items):
+            yield json.dumps(result) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/ai/analyze/stream', methods=['GET'])
+def stream_analysis():
+    """
+    Análise contínua via Server-Sent Events
+    Query: ?fen=...&multipv=3&max_time=20
+    Cada evento `info` traz profundidade, score e variante de uma linha
+    (MultiPV). A busca para quando o cliente fecha a conexão.
+    """
+    fen = request.args.get('fen')
+    
+    if not fen:
+        return jsonify({'error': 'FEN board state is required'}), 400
+    
+    multipv = request.args.get('multipv', 1, type=int)
+    max_time = request.args.get('max_time', type=float)
+    
+    try:
+        stream = ai_engine.stream_analysis(fen, multipv, max_time)
+        first = next(stream, None)
+    except ValueError:
+        return jsonify({'error': 'Invalid FEN'}), 400
+    except ai_engine.StreamBusy as e:
+        return jsonify({'error': str(e)}), 429, {'Retry-After': '5'}
+    except ai_engine.AdmissionRejected as e:
+        return _rejected_response(e)
+    
+    def generate():
+        try:
+            if first is not None:
+                yield f'event: info\ndata: {json.dumps(first)}\n\n'
+                for info in stream:
+                    yield f'event: info\ndata: {json.dumps(info)}\n\n'
+            yield 'event: done\ndata: {}\n\n'
+        finally:
+            # Fecha o gerador do motor (para a busca e devolve o worker)
+            stream.close()
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8004))
     app.run(host='0.0.0.0', port=port, debug=False)  # debug=False para produção
@@ -0,0 +1,145 @@
+from quart import Quart, request, jsonify
+from quart_cors import cors
+import asyncio
+import re
+import async_engine
+import ai_engine
+import search_budget
+import os
+
+# Modo assíncrono do AI Service (ASGI): mesmas rotas de /ai/move e /ai/hint,
+# mas cada busca é uma corrotina, então um único processo atende centenas
+# de requisições concorrentes sem uma thread por requisição.
+# Execução: hypercorn asgi_app:app --bind 0.0.0.0:8004
+app = Quart(__name__)
+
+# Mesmas origens do app.py (quart_cors aceita regex no lugar do curinga)
+app = cors(app, allow_origin=[
+    "https://chess-microservices.vercel.app",
+    "http://localhost:3000",
+    re.compile(r"https://[\w.-]+\.onrender\.com$")  # Permitir chamadas entre serviços Render
+])
+
+@app.before_serving
+async def startup():
+    await async_engine.start_pool()
+
+@app.after_serving
+async def shutdown():
+    await async_engine.stop_pool()
+
+async def _search(fen, difficulty, clock=None):
+    """Executa a busca com prazo; estourado o prazo, a busca é cancelada"""
+    return await asyncio.wait_for(
+        async_engine.get_best_move(fen, difficulty, clock),
+        timeout=async_engine.AI_REQUEST_TIMEOUT
+    )
+
+@app.route('/health', methods=['GET'])
+async def health():
+    """Endpoint para verificar se o serviço está funcionando"""
+    return jsonify({'status': 'AI Service is running!'}), 200
+
+@app.route('/ai/stats', methods=['GET'])
+async def get_stats():
+    """Métricas do motor de IA (pool assíncrono de Stockfish)"""
+    return jsonify(async_engine.get_stats()), 200
+
+@app.route('/ai/move', methods=['POST'])
+async def get_ai_move():
+    """
+    Retorna a melhor jogada calculada pela IA
+    Body: {
+        "fen": "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+        "difficulty": "easy" | "medium" | "hard" (opcional, padrão: medium),
+        "remaining_time": 180.0 (opcional, segundos no relógio da IA),
+        "increment": 2.0 (opcional, incremento por lance em segundos)
+    }
+    """
+    data = await request.get_json()
+
+    if not data or not data.get('fen'):
+        return jsonify({'error': 'FEN board state is required'}), 400
+
+    fen = data['fen']
+    difficulty = data.get('difficulty', 'medium')
+
+    if difficulty not in ['easy', 'medium', 'hard']:
+        return jsonify({'error': 'Difficulty must be easy, medium or hard'}), 400
+
+    try:
+        clock = search_budget.parse_clock(data)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'remaining_time, increment and moves_to_go must be valid numbers'}), 400
+
+    try:
+        best_move = await _search(fen, difficulty, clock)
+
+        if not best_move:
+            return jsonify({'error': 'No legal moves available or game is over'}), 400
+
+        move_info = ai_engine.get_move_details(fen, best_move)
+
+        return jsonify({
+            'success': True,
+            'move': {
+                'from': best_move[:2],
+                'to': best_move[2:4],
+                'promotion': best_move[4] if len(best_move) > 4 else None,
+                'uci': best_move,
+                'san': move_info['san'],
+                'piece': move_info['piece']
+            },
+            'difficulty': difficulty,
+            'evaluation': move_info.get('evaluation'),
+            'fen': fen
+        }), 200
+    except ValueError:
+        return jsonify({'error': 'Invalid FEN'}), 400
+    except asyncio.TimeoutError:
+        return jsonify({'error': 'AI search timed out'}), 504
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/ai/hint', methods=['POST'])
+async def get_hint():
+    """
+    Retorna uma dica de movimento (melhor jogada)
+    Body: {
+        "fen": "..."
+    }
+    """
+    data = await request.get_json()
+
+    if not data or not data.get('fen'):
+        return jsonify({'error': 'FEN board state is required'}), 400
+
+    fen = data['fen']
+
+    try:
+        best_move = await _search(fen, 'hard')
+
+        if not best_move:
+            return jsonify({'error': 'No legal moves available'}), 400
+
+        move_info = ai_engine.get_move_details(fen, best_move)
+
+        return jsonify({
+            'success': True,
+            'hint': {
+                'from': best_move[:2],
+                'to': best_move[2:4],
+                'san': move_info['san'],
+                'piece': move_info['piece']
+            }
+        }), 200
+    except ValueError:
+        return jsonify({'error': 'Invalid FEN'}), 400
+    except asyncio.TimeoutError:
+        return jsonify({'error': 'AI search timed out'}), 504
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+if __name__ == '__main__':
+    port = int(os.environ.get('PORT', 8004))
+    app.run(host='0.0.0.0', port=port, debug=False)
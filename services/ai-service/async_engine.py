@@ -0,0 +1,286 @@
+import asyncio
+import chess
+import chess.engine
+import os
+import time
+from contextlib import asynccontextmanager
+import ai_engine
+from engine_pool import ENGINE_FAILURES, PoolTimeout
+from search_budget import SearchBudget
+
+# Tamanho do pool no modo assíncrono (padrão: o mesmo do modo Flask)
+ASYNC_ENGINE_POOL_SIZE = int(os.environ.get('ASYNC_ENGINE_POOL_SIZE', ai_engine.ENGINE_POOL_SIZE))
+# Tempo máximo (s) de uma requisição; depois disso a busca é cancelada
+AI_REQUEST_TIMEOUT = float(os.environ.get('AI_REQUEST_TIMEOUT', 25))
+
+# Livro Polyglot e cache em SQLite fazem I/O bloqueante: com algum dos dois
+# configurado, o caminho rápido roda numa thread (só memória fica no loop)
+FAST_PATH_BLOCKS = bool(ai_engine.OPENING_BOOK_PATH or ai_engine.MOVE_CACHE_DB)
+
+class AsyncEngineWorker:
+    """Um processo Stockfish dirigido por corrotinas (chess.engine.popen_uci)"""
+
+    def __init__(self, worker_id, engine_path):
+        self.worker_id = worker_id
+        self.engine_path = engine_path
+        self.transport = None
+        self.engine = None
+        self.options = {}
+        self.searches = 0
+        self.restarts = 0
+        self.last_used = time.monotonic()
+
+    async def start(self):
+        """Inicia o processo UCI e limpa o cache de opções"""
+        self.transport, self.engine = await chess.engine.popen_uci(self.engine_path)
+        self.options = {}
+
+    async def configure(self, options):
+        """Envia ao Stockfish apenas as opções que mudaram desde o último uso"""
+        changed = {
+            name: value for name, value in options.items()
+            if self.options.get(name) != value
+        }
+        if changed:
+            await self.engine.configure(changed)
+            self.options.update(changed)
+
+    async def is_alive(self):
+        """Health check: o processo responde ao isready?"""
+        if self.engine is None:
+            return False
+        try:
+            await asyncio.wait_for(self.engine.ping(), timeout=5)
+            return True
+        except Exception:
+            return False
+
+    async def restart(self):
+        """Encerra o processo atual (se houver) e sobe um novo"""
+        await self.close()
+        await self.start()
+        self.restarts += 1
+        print(f"♻️  Async Stockfish worker {self.worker_id} restarted")
+
+    async def close(self):
+        """Encerra o processo sem propagar erros de um engine já morto"""
+        if self.engine is None:
+            return
+        try:
+            await asyncio.wait_for(self.engine.quit(), timeout=5)
+        except Exception:
+            self.transport.close()
+        self.engine = None
+        self.transport = None
+
+class AsyncEnginePool:
+    """
+    Pool de processos Stockfish para o modo asyncio. Requisições esperando
+    um worker ficam numa fila do event loop, sem ocupar uma thread cada.
+    """
+
+    def __init__(self, engine_path, size, health_interval=30):
+        self.engine_path = engine_path
+        self.size = max(1, size)
+        self.health_interval = health_interval
+        self._workers = []
+        self._idle = asyncio.Queue()
+        self._health_task = None
+        self._checkouts = 0
+        self._waits = 0
+        self._waiting = 0
+        self._failures = 0
+        self._cancelled = 0
+
+    async def start(self):
+        """Sobe todos os workers; falha apenas se nenhum conseguir iniciar"""
+        for worker_id in range(self.size):
+            worker = AsyncEngineWorker(worker_id, self.engine_path)
+            try:
+                await worker.start()
+            except Exception as e:
+                print(f"❌ Error starting async Stockfish worker {worker_id}: {e}")
+                continue
+            self._workers.append(worker)
+            self._idle.put_nowait(worker)
+
+        if not self._workers:
+            raise RuntimeError(f"Could not start Stockfish from {self.engine_path}")
+
+        if self.health_interval:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+        print(f"✅ Async Stockfish pool started with {len(self._workers)} workers from: {self.engine_path}")
+        return self
+
+    async def checkout(self, timeout=None):
+        """Retira um worker livre do pool, esperando até `timeout` segundos"""
+        if self._idle.empty():
+            self._waits += 1
+        self._waiting += 1
+        try:
+            worker = await asyncio.wait_for(self._idle.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            raise PoolTimeout('No engine worker available')
+        finally:
+            self._waiting -= 1
+        self._checkouts += 1
+        return worker
+
+    async def checkin(self, worker, healthy=True):
+        """Devolve o worker ao pool, reiniciando-o se ele falhou"""
+        worker.last_used = time.monotonic()
+        if not healthy or not await worker.is_alive():
+            self._failures += 1
+            try:
+                await worker.restart()
+            except Exception as e:
+                print(f"❌ Error restarting async Stockfish worker {worker.worker_id}: {e}")
+        self._idle.put_nowait(worker)
+
+    @asynccontextmanager
+    async def worker(self, timeout=None):
+        """Context manager de checkout/checkin usado por quem faz buscas"""
+        worker = await self.checkout(timeout)
+        healthy = True
+        try:
+            yield worker
+            worker.searches += 1
+        except ENGINE_FAILURES:
+            healthy = False
+            raise
+        except asyncio.CancelledError:
+            # Cliente desistiu: o python-chess envia `stop` ao Stockfish e o
+            # worker volta ao pool assim que o bestmove chega
+            self._cancelled += 1
+            raise
+        finally:
+            # Blindado contra o cancelamento para o worker nunca se perder
+            await asyncio.shield(self.checkin(worker, healthy))
+
+    async def _health_loop(self):
+        """Verifica periodicamente os workers ociosos e reinicia os que morreram"""
+        while True:
+            await asyncio.sleep(self.health_interval)
+            for _ in range(self._idle.qsize()):
+                try:
+                    worker = self._idle.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                await self.checkin(worker)
+
+    def stats(self):
+        """Métricas de uso do pool"""
+        return {
+            'size': len(self._workers),
+            'idle': self._idle.qsize(),
+            'waiting': self._waiting,
+            'checkouts': self._checkouts,
+            'waits': self._waits,
+            'failures': self._failures,
+            'cancelled': self._cancelled,
+            'workers': [
+                {
+                    'id': w.worker_id,
+                    'searches': w.searches,
+                    'restarts': w.restarts,
+                    'options': dict(w.options)
+                }
+                for w in self._workers
+            ]
+        }
+
+    async def close(self):
+        """Encerra todos os processos do pool"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+        for worker in self._workers:
+            await worker.close()
+        self._workers = []
+
+_pool = None
+_budget = SearchBudget(ASYNC_ENGINE_POOL_SIZE)
+
+async def start_pool():
+    """Cria o pool assíncrono (chamado na inicialização do app ASGI)"""
+    global _pool
+
+    engine_path = ai_engine.find_stockfish()
+    if engine_path is None:
+        print("⚠️ Stockfish not found, async mode will use fallback moves")
+        return None
+
+    try:
+        _pool = await AsyncEnginePool(
+            engine_path,
+            ASYNC_ENGINE_POOL_SIZE,
+            health_interval=ai_engine.ENGINE_HEALTH_INTERVAL
+        ).start()
+    except Exception as e:
+        print(f"❌ Error loading Stockfish: {e}")
+        _pool = None
+    return _pool
+
+async def stop_pool():
+    """Encerra o pool assíncrono"""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+        print("🔴 Async Stockfish engine pool closed")
+
+async def get_best_move(fen, difficulty='medium', clock=None):
+    """
+    Versão assíncrona de ai_engine.get_best_move: mesmo livro, cache,
+    orçamento de tempo e fallback, mas a busca é uma corrotina que pode
+    ser cancelada
+    """
+    board = chess.Board(fen)
+
+    if board.is_game_over():
+        return None
+
+    forced_move = ai_engine._get_forced_move(board)
+    if forced_move:
+        return forced_move
+
+    settings = ai_engine.DIFFICULTY_SETTINGS.get(difficulty, ai_engine.DIFFICULTY_SETTINGS['medium'])
+
+    if FAST_PATH_BLOCKS:
+        fast_move = await asyncio.to_thread(ai_engine.get_fast_move, board, settings)
+    else:
+        fast_move = ai_engine.get_fast_move(board, settings)
+    if fast_move:
+        return fast_move
+
+    if _pool is None:
+        return ai_engine._get_random_move(board)
+
+    try:
+        with _budget.track():
+            async with _pool.worker(timeout=ai_engine.ENGINE_CHECKOUT_TIMEOUT) as worker:
+                await worker.configure({"Skill Level": settings['skill_level']})
+                limit = _budget.limit(board, settings, clock)
+                result = await worker.engine.play(board, limit)
+    except PoolTimeout:
+        print("⚠️ All Stockfish workers busy, using fallback move")
+        return ai_engine._get_random_move(board)
+    except ENGINE_FAILURES as e:
+        print(f"Error calculating move: {e}")
+        return ai_engine._get_random_move(board)
+
+    best_move = result.move.uci()
+    if ai_engine.MOVE_CACHE_DB:
+        await asyncio.to_thread(ai_engine.remember_move, board, settings, best_move, limit.time)
+    else:
+        ai_engine.remember_move(board, settings, best_move, limit.time)
+    return best_move
+
+def get_stats():
+    """Métricas do modo assíncrono"""
+    stats = ai_engine.get_stats()
+    stats['stockfish_path'] = _pool.engine_path if _pool is not None else None
+    stats['engine_pool'] = _pool.stats() if _pool is not None else None
+    stats['search_budget'] = _budget.stats()
+    stats['mode'] = 'async'
+    return stats
@@ -0,0 +1,196 @@
+import chess
+import chess.engine
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+# Erros que indicam que o processo do Stockfish morreu ou ficou inconsistente
+ENGINE_FAILURES = (
+    chess.engine.EngineTerminatedError,
+    chess.engine.EngineError,
+    BrokenPipeError,
+    TimeoutError,
+)
+
+class PoolTimeout(Exception):
+    """Nenhum worker ficou livre dentro do tempo de espera"""
+    pass
+
+class EngineWorker:
+    """Um processo Stockfish do pool, com cache das opções já enviadas"""
+
+    def __init__(self, worker_id, engine_path):
+        self.worker_id = worker_id
+        self.engine_path = engine_path
+        self.engine = None
+        self.options = {}
+        self.searches = 0
+        self.restarts = 0
+        self.last_used = time.monotonic()
+
+    def start(self):
+        """Inicia o processo UCI e limpa o cache de opções"""
+        self.engine = chess.engine.SimpleEngine.popen_uci(self.engine_path)
+        self.options = {}
+
+    def configure(self, options):
+        """Envia ao Stockfish apenas as opções que mudaram desde o último uso"""
+        changed = {
+            name: value for name, value in options.items()
+            if self.options.get(name) != value
+        }
+        if changed:
+            self.engine.configure(changed)
+            self.options.update(changed)
+
+    def is_alive(self):
+        """Health check: o processo responde ao isready?"""
+        if self.engine is None:
+            return False
+        try:
+            self.engine.ping()
+            return True
+        except Exception:
+            return False
+
+    def restart(self):
+        """Encerra o processo atual (se houver) e sobe um novo"""
+        self.close()
+        self.start()
+        self.restarts += 1
+        print(f"♻️  Stockfish worker {self.worker_id} restarted")
+
+    def close(self):
+        """Encerra o processo sem propagar erros de um engine já morto"""
+        if self.engine is None:
+            return
+        try:
+            self.engine.quit()
+        except Exception:
+            try:
+                self.engine.close()
+            except Exception:
+                pass
+        self.engine = None
+
+class EnginePool:
+    """
+    Pool de processos Stockfish com checkout/checkin.
+    Cada requisição usa um worker exclusivo, então buscas concorrentes
+    rodam em paralelo e não disputam a opção Skill Level.
+    """
+
+    def __init__(self, engine_path, size, health_interval=30):
+        self.engine_path = engine_path
+        self.size = max(1, size)
+        self.health_interval = health_interval
+        self._workers = []
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._health_thread = None
+        self._checkouts = 0
+        self._waits = 0
+        self._failures = 0
+
+    def start(self):
+        """Sobe todos os workers; falha apenas se nenhum conseguir iniciar"""
+        for worker_id in range(self.size):
+            worker = EngineWorker(worker_id, self.engine_path)
+            try:
+                worker.start()
+            except Exception as e:
+                print(f"❌ Error starting Stockfish worker {worker_id}: {e}")
+                continue
+            self._workers.append(worker)
+            self._idle.put(worker)
+
+        if not self._workers:
+            raise RuntimeError(f"Could not start Stockfish from {self.engine_path}")
+
+        if self.health_interval:
+            self._health_thread = threading.Thread(target=self._health_loop, daemon=True)
+            self._health_thread.start()
+
+        print(f"✅ Stockfish pool started with {len(self._workers)} workers from: {self.engine_path}")
+        return self
+
+    def checkout(self, timeout=None):
+        """Retira um worker livre do pool, esperando até `timeout` segundos"""
+        try:
+            worker = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                self._waits += 1
+            try:
+                worker = self._idle.get(timeout=timeout)
+            except queue.Empty:
+                raise PoolTimeout('No engine worker available')
+
+        with self._lock:
+            self._checkouts += 1
+        return worker
+
+    def checkin(self, worker, healthy=True):
+        """Devolve o worker ao pool, reiniciando-o se ele falhou"""
+        worker.last_used = time.monotonic()
+        if not healthy or not worker.is_alive():
+            with self._lock:
+                self._failures += 1
+            try:
+                worker.restart()
+            except Exception as e:
+                print(f"❌ Error restarting Stockfish worker {worker.worker_id}: {e}")
+        self._idle.put(worker)
+
+    @contextmanager
+    def worker(self, timeout=None):
+        """Context manager de checkout/checkin usado por quem faz buscas"""
+        worker = self.checkout(timeout)
+        healthy = True
+        try:
+            yield worker
+            worker.searches += 1
+        except ENGINE_FAILURES:
+            healthy = False
+            raise
+        finally:
+            self.checkin(worker, healthy)
+
+    def _health_loop(self):
+        """Verifica periodicamente os workers ociosos e reinicia os que morreram"""
+        while not self._closed.wait(self.health_interval):
+            for _ in range(self._idle.qsize()):
+                try:
+                    worker = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                self.checkin(worker)
+
+    def stats(self):
+        """Métricas de uso do pool"""
+        with self._lock:
+            return {
+                'size': len(self._workers),
+                'idle': self._idle.qsize(),
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'failures': self._failures,
+                'workers': [
+                    {
+                        'id': w.worker_id,
+                        'searches': w.searches,
+                        'restarts': w.restarts,
+                        'options': dict(w.options)
+                    }
+                    for w in self._workers
+                ]
+            }
+
+    def close(self):
+        """Encerra todos os processos do pool"""
+        self._closed.set()
+        for worker in self._workers:
+            worker.close()
+        self._workers = []
@@ -0,0 +1,126 @@
+import chess
+import chess.polyglot
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+def position_key(board, settings):
+    """
+    Chave de transposição: hash Zobrist da posição (ignora os relógios de
+    lances) combinado com as configurações de busca usadas
+    """
+    zobrist = chess.polyglot.zobrist_hash(board)
+    return f"{zobrist:016x}:{settings['skill_level']}:{settings['depth']}:{settings['time_limit']}"
+
+class MoveCache:
+    """
+    Cache LRU limitado de melhores lances, com TTL opcional e uma segunda
+    camada opcional em disco (SQLite) que sobrevive a reinícios do serviço
+    """
+
+    def __init__(self, max_size=10000, ttl=0, db_path=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.db_path = db_path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if db_path:
+            self._init_db()
+
+    def _init_db(self):
+        """Abre a camada em disco e cria a tabela se necessário"""
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS best_moves (
+                key TEXT PRIMARY KEY,
+                move TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        ''')
+        self._db.commit()
+
+    def _expired(self, created_at):
+        return self.ttl > 0 and time.time() - created_at > self.ttl
+
+    def get(self, key):
+        """Retorna o lance em cache para a chave, ou None"""
+        if self.max_size <= 0:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                move, created_at = entry
+                if not self._expired(created_at):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return move
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT move, created_at FROM best_moves WHERE key = ?', (key,)
+                ).fetchone()
+                if row and not self._expired(row[1]):
+                    self._put(key, row[0], row[1])
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def set(self, key, move):
+        """Armazena o lance calculado nas duas camadas"""
+        if self.max_size <= 0 or not move:
+            return
+
+        created_at = time.time()
+        with self._lock:
+            self._put(key, move, created_at)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO best_moves (key, move, created_at) VALUES (?, ?, ?)',
+                        (key, move, created_at)
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    print(f"Error writing move cache to disk: {e}")
+
+    def _put(self, key, move, created_at):
+        """Insere na camada em memória, descartando o item menos usado"""
+        self._entries[key] = (move, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        """Contadores de acerto/erro do cache"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'disk': self.db_path,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+            }
+
+    def close(self):
+        """Fecha a camada em disco"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,124 @@
+import chess
+import chess.engine
+import os
+import threading
+from contextlib import contextmanager
+
+# Teto absoluto de tempo de busca por lance (s)
+AI_MAX_THINK_TIME = float(os.environ.get('AI_MAX_THINK_TIME', 2.0))
+# Fração mínima do tempo planejado que sobra sob pressão máxima de fila
+BUDGET_MIN_SCALE = float(os.environ.get('BUDGET_MIN_SCALE', 0.2))
+# Lances restantes estimados quando o cliente não informa
+DEFAULT_MOVES_TO_GO = int(os.environ.get('DEFAULT_MOVES_TO_GO', 30))
+
+def position_complexity(board):
+    """
+    Fator de complexidade da posição: menos tempo em linhas forçadas
+    (xeque, poucas respostas), mais em meio-jogos com muitas opções
+    """
+    legal_moves = board.legal_moves.count()
+
+    if board.is_check() or legal_moves <= 3:
+        return 0.5
+
+    non_pawn_pieces = chess.popcount(
+        board.occupied & ~board.pawns & ~board.kings
+    )
+    if non_pawn_pieces >= 8 and legal_moves >= 30:
+        return 1.3
+
+    return 1.0
+
+def parse_clock(data):
+    """
+    Lê o relógio opcional do corpo da requisição:
+    "remaining_time" e "increment" em segundos, "moves_to_go" opcional.
+    Lança ValueError se os valores forem inválidos.
+    """
+    if data.get('remaining_time') is None:
+        return None
+
+    remaining = float(data['remaining_time'])
+    increment = float(data.get('increment') or 0)
+    moves_to_go = data.get('moves_to_go')
+    if remaining < 0 or increment < 0:
+        raise ValueError('Clock values must be non-negative')
+    if moves_to_go is not None:
+        moves_to_go = int(moves_to_go)
+        if moves_to_go <= 0:
+            raise ValueError('moves_to_go must be positive')
+
+    return {'remaining': remaining, 'increment': increment, 'moves_to_go': moves_to_go}
+
+class SearchBudget:
+    """
+    Gerente do orçamento de CPU do motor: calcula o tempo de cada busca a
+    partir da dificuldade, do relógio da partida e da complexidade, e
+    encolhe esse tempo quando há mais buscas ativas que workers
+    """
+
+    def __init__(self, capacity):
+        self.capacity = max(1, capacity)
+        self._active = 0
+        self._lock = threading.Lock()
+        self.searches = 0
+        self.shortened_searches = 0
+        self.planned_time = 0.0
+
+    def pressure_scale(self):
+        """1.0 enquanto há workers sobrando; cai proporcionalmente à fila"""
+        with self._lock:
+            demand = self._active
+        if demand <= self.capacity:
+            return 1.0
+        return max(BUDGET_MIN_SCALE, self.capacity / demand)
+
+    def think_time(self, board, settings, clock=None):
+        """
+        Tempo de busca (s) para o lance. `clock` traz o tempo restante e o
+        incremento de quem joga: {"remaining": 120.0, "increment": 2.0}
+        """
+        think = settings['time_limit'] * position_complexity(board)
+
+        if clock and clock.get('remaining') is not None:
+            remaining = max(0.0, float(clock['remaining']))
+            increment = max(0.0, float(clock.get('increment') or 0))
+            moves_to_go = clock.get('moves_to_go') or DEFAULT_MOVES_TO_GO
+            # Nunca gasta mais que uma fração do relógio num único lance
+            allotted = remaining / moves_to_go + increment * 0.8
+            think = min(think, allotted, remaining * 0.2)
+
+        return max(0.01, min(think * self.pressure_scale(), AI_MAX_THINK_TIME))
+
+    def limit(self, board, settings, clock=None):
+        """Limite do python-chess para a busca (tempo planejado + profundidade)"""
+        think = self.think_time(board, settings, clock)
+        with self._lock:
+            self.searches += 1
+            self.planned_time += think
+            if think < settings['time_limit']:
+                self.shortened_searches += 1
+        return chess.engine.Limit(time=think, depth=settings['depth'])
+
+    @contextmanager
+    def track(self):
+        """Marca uma busca como ativa (inclui a espera por um worker)"""
+        with self._lock:
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def stats(self):
+        """Métricas do orçamento"""
+        with self._lock:
+            return {
+                'capacity': self.capacity,
+                'active': self._active,
+                'searches': self.searches,
+                'shortened_searches': self.shortened_searches,
+                'avg_think_time': round(self.planned_time / self.searches, 3) if self.searches else 0.0,
+                'max_think_time': AI_MAX_THINK_TIME
+            }
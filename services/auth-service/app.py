@@ -1,6 +1,7 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import models
+import db_pool
 import auth
 import os
 
@@ -19,7 +20,7 @@ models.init_db()
 @app.route('/health', methods=['GET'])
 def health():
     """Endpoint para verificar se o serviço está funcionando"""
-    return jsonify({'status': 'Auth Service is running!'}), 200
+    return jsonify({'status': 'Auth Service is running!', 'db_pool': db_pool.stats()}), 200
 
 @app.route('/auth/register', methods=['POST'])
 def register():
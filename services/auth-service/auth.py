@@ -6,19 +6,63 @@ import os
 
 SECRET_KEY = os.environ.get("SECRET_KEY", "TESTE_TESTE")
 
+# Chaves de assinatura por `kid` ("kid1:segredo1,kid2:segredo2"), as mesmas
+# configuradas no API Gateway. Para rotacionar: adicione a chave nova em
+# JWT_KEYS (gateway primeiro), troque JWT_ACTIVE_KID e remova a antiga
+# depois que os tokens dela expirarem. Sem JWT_KEYS, vale a SECRET_KEY.
+JWT_KEYS = os.environ.get("JWT_KEYS", "")
+JWT_ACTIVE_KID = os.environ.get("JWT_ACTIVE_KID", "default")
+
+def _parse_keys(value):
+    """
+    Lê "kid:segredo,kid2:segredo2" num dicionário. Entrada malformada é
+    erro na inicialização (mesma regra do token_verifier.parse_keys do
+    API Gateway), para os dois lados nunca ficarem com chaves diferentes
+    """
+    keys = {}
+    for position, item in enumerate(value.split(','), 1):
+        item = item.strip()
+        if not item:
+            continue
+        kid, _, secret = item.partition(':')
+        kid, secret = kid.strip(), secret.strip()
+        # A mensagem cita só a posição e o kid: nunca o segredo
+        if not kid or not secret:
+            raise ValueError(f'Invalid JWT_KEYS entry #{position} (expected "kid:secret")')
+        if kid in keys:
+            raise ValueError(f'Duplicate kid "{kid}" in JWT_KEYS')
+        keys[kid] = secret
+    return keys
+
+SIGNING_KEYS = _parse_keys(JWT_KEYS)
+SIGNING_KEYS.setdefault("default", SECRET_KEY)
+
+if JWT_ACTIVE_KID not in SIGNING_KEYS:
+    raise RuntimeError(f"JWT_ACTIVE_KID '{JWT_ACTIVE_KID}' is not in JWT_KEYS")
+
 def generate_token(user_id):
-    """Gera um token JWT para o usuário"""
+    """Gera um token JWT para o usuário (assinado com a chave ativa)"""
     payload = {
         'user_id': user_id,
         'exp': datetime.utcnow() + timedelta(hours=24)  # Expira em 24h
     }
-    token = jwt.encode(payload, SECRET_KEY, algorithm='HS256')
+    token = jwt.encode(
+        payload,
+        SIGNING_KEYS[JWT_ACTIVE_KID],
+        algorithm='HS256',
+        headers={'kid': JWT_ACTIVE_KID}
+    )
     return token
 
 def verify_token(token):
     """Verifica se o token é válido"""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+        # Tokens antigos, sem `kid`, foram assinados com a SECRET_KEY
+        kid = jwt.get_unverified_header(token).get('kid') or 'default'
+        secret = SIGNING_KEYS.get(kid)
+        if secret is None:
+            return None  # Chave desconhecida ou já removida
+        payload = jwt.decode(token, secret, algorithms=['HS256'])
         return payload
     except jwt.ExpiredSignatureError:
         return None  # Token expirado
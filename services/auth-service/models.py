@@ -1,23 +1,11 @@
 import psycopg2
 from psycopg2.extras import RealDictCursor
 import bcrypt
-import os
-import sys
-
-# Pega a URL de conexão do PostgreSQL (Neon) das variáveis de ambiente
-DATABASE_URL = os.environ.get('DATABASE_URL')
+import db_pool
 
 def get_db():
-    """Retorna uma conexão com o banco de dados PostgreSQL"""
-    try:
-        # Conecta ao PostgreSQL usando a string de conexão
-        # sslmode=require é geralmente necessário para o Neon
-        conn = psycopg2.connect(DATABASE_URL)
-        conn.autocommit = False
-        return conn
-    except Exception as e:
-        print(f"Erro ao conectar no PostgreSQL: {e}")
-        return None
+    """Retorna uma conexão do pool (devolvida com db_pool.release)"""
+    return db_pool.get_connection()
 
 def init_db():
     """Inicializa o banco de dados e cria as tabelas se não existirem"""
@@ -40,23 +28,24 @@ def init_db():
         ''')
         conn.commit()
         cursor.close()
-        conn.close()
+        db_pool.release(conn)
         print("Banco de dados PostgreSQL inicializado com sucesso!")
     except Exception as e:
         print(f"Erro ao inicializar tabelas: {e}")
         if conn:
             conn.rollback()
-            conn.close()
+            db_pool.release(conn)
 
 def create_user(name, email, password):
     """Cria um novo usuário no banco de dados"""
+    # Hash da senha usando bcrypt (antes de pegar a conexão, que é disputada)
+    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+
     conn = get_db()
     if not conn:
         return None
         
     cursor = conn.cursor()
-    # Hash da senha usando bcrypt
-    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
 
     try:
         # No PostgreSQL usamos %s em vez de ? e RETURNING para pegar o ID inserido
@@ -67,16 +56,16 @@ def create_user(name, email, password):
         user_id = cursor.fetchone()[0]
         conn.commit()
         cursor.close()
-        conn.close()
+        db_pool.release(conn)
         return user_id
     except psycopg2.IntegrityError:
         conn.rollback()
-        conn.close()
+        db_pool.release(conn)
         return None
     except Exception as e:
         print(f"Erro ao criar usuário: {e}")
         conn.rollback()
-        conn.close()
+        db_pool.release(conn)
         return None
     
 def get_user_by_email(email):
@@ -91,11 +80,11 @@ def get_user_by_email(email):
         cursor.execute('SELECT * FROM users WHERE email = %s', (email,))
         user = cursor.fetchone()
         cursor.close()
-        conn.close()
+        db_pool.release(conn)
         return user
     except Exception as e:
         print(f"Erro ao buscar usuário por email: {e}")
-        conn.close()
+        db_pool.release(conn)
         return None
 
 def get_user_by_id(user_id):
@@ -109,11 +98,11 @@ def get_user_by_id(user_id):
         cursor.execute('SELECT * FROM users WHERE id = %s', (user_id,))
         user = cursor.fetchone()
         cursor.close()
-        conn.close()
+        db_pool.release(conn)
         return user
     except Exception as e:
         print(f"Erro ao buscar usuário por ID: {e}")
-        conn.close()
+        db_pool.release(conn)
         return None
 
 def verify_password(stored_password_hash, password):
@@ -1,9 +1,13 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import models
+import db_pool
+import move_journal
 import game_logic
+import game_cache
 import uuid
 import os
+import atexit
 
 app = Flask(__name__)
 
@@ -16,13 +20,33 @@ CORS(app, origins=[
 # Inicializa o banco quando o app inicia
 models.init_db()
 
-# Dicionário para armazenar jogos ativos em memória (cache)
-active_games = {}
+# Diário write-behind de lances (MOVE_WRITE_MODE=journal); reenvia o que
+# ficou pendente de uma execução anterior e grava o resto ao encerrar
+move_journal.start()
+atexit.register(move_journal.stop)
+
+# Cache LRU das partidas ativas em memória (limitado em tamanho e tempo ocioso)
+active_games = game_cache.GameCache(
+    max_size=game_cache.GAME_CACHE_SIZE,
+    idle_ttl=game_cache.GAME_CACHE_IDLE_TTL,
+    finished_ttl=game_cache.GAME_CACHE_FINISHED_TTL
+)
+
+def load_chess_game(game_id):
+    """Retorna a partida do cache ou a recria a partir do FEN salvo (None se não existir)"""
+    chess_game = active_games.get(game_id)
+    if chess_game is None:
+        game = move_journal.load_game(game_id)
+        if not game:
+            return None
+        chess_game = game_logic.ChessGame(game_id, game['board_state'])
+        active_games.put(game_id, chess_game)
+    return chess_game
 
 @app.route('/health', methods=['GET'])
 def health():
     """Endpoint para verificar se o serviço está funcionando"""
-    return jsonify({'status': 'Game Service is running!'}), 200
+    return jsonify({'status': 'Game Service is running!', 'db_pool': db_pool.stats(), 'move_writes': move_journal.stats(), 'game_cache': active_games.stats()}), 200
 
 @app.route('/games', methods=['POST'])
 def create_game():
@@ -60,7 +84,7 @@ def create_game():
     )
     
     # Salva em memória para acesso rápido
-    active_games[game_id] = chess_game
+    active_games.put(game_id, chess_game)
     
     return jsonify({
         'game_id': game_id,
@@ -74,18 +98,10 @@ def create_game():
 def get_game(game_id):
     """Retorna o estado atual de uma partida"""
     
-    # Tenta pegar do cache
-    if game_id in active_games:
-        chess_game = active_games[game_id]
-    else:
-        # Busca no banco
-        game = models.get_game(game_id)
-        if not game:
-            return jsonify({'error': 'Game not found'}), 404
-        
-        # Recria o jogo a partir do FEN
-        chess_game = game_logic.ChessGame(game_id, game['board_state'])
-        active_games[game_id] = chess_game
+    # Tenta pegar do cache; senão recria o jogo a partir do FEN salvo
+    chess_game = load_chess_game(game_id)
+    if not chess_game:
+        return jsonify({'error': 'Game not found'}), 404
     
     game_status = chess_game.get_game_status()
     
@@ -124,14 +140,9 @@ def make_move(game_id):
     print(f"📍 From: {from_square}, To: {to_square}, Promotion: {promotion}")  # ADICIONE
     
     # Busca o jogo
-    if game_id not in active_games:
-        game = models.get_game(game_id)
-        if not game:
-            return jsonify({'error': 'Game not found'}), 404
-        chess_game = game_logic.ChessGame(game_id, game['board_state'])
-        active_games[game_id] = chess_game
-    else:
-        chess_game = active_games[game_id]
+    chess_game = load_chess_game(game_id)
+    if not chess_game:
+        return jsonify({'error': 'Game not found'}), 404
     
     # Verifica se o jogo já acabou
     if chess_game.is_game_over():
@@ -143,29 +154,28 @@ def make_move(game_id):
     if not move_result:
         return jsonify({'error': 'Invalid move'}), 400
     
-    # Salva o movimento no banco
-    models.add_move(
+    # Verifica status do jogo
+    game_status = chess_game.get_game_status()
+    
+    # Salva o movimento e o novo estado da partida (numa única transação ou no diário)
+    move_journal.save_move(
         game_id,
         from_square,
         to_square,
         move_result['piece'],
         move_result['captured'],
         move_result['promotion'],
-        move_result['notation']
-    )
-    
-    # Verifica status do jogo
-    game_status = chess_game.get_game_status()
-    
-    # Atualiza no banco
-    models.update_game(
-        game_id,
+        move_result['notation'],
         chess_game.get_board_state(),
         chess_game.get_current_turn(),
         game_status['status'],
         game_status.get('winner')
     )
     
+    # Partida encerrada sai do cache depois de GAME_CACHE_FINISHED_TTL
+    if chess_game.is_game_over():
+        active_games.finish(game_id)
+    
     return jsonify({
         'success': True,
         'move': move_result,
@@ -187,14 +197,9 @@ def get_valid_moves(game_id):
     square = request.args.get('square')
     
     # Busca o jogo
-    if game_id not in active_games:
-        game = models.get_game(game_id)
-        if not game:
-            return jsonify({'error': 'Game not found'}), 404
-        chess_game = game_logic.ChessGame(game_id, game['board_state'])
-        active_games[game_id] = chess_game
-    else:
-        chess_game = active_games[game_id]
+    chess_game = load_chess_game(game_id)
+    if not chess_game:
+        return jsonify({'error': 'Game not found'}), 404
     
     valid_moves = chess_game.get_valid_moves(square)
     
@@ -222,25 +227,21 @@ def resign_game(game_id):
         return jsonify({'error': 'color must be "white" or "black"'}), 400
     
     # Busca o jogo
-    if game_id not in active_games:
-        game = models.get_game(game_id)
-        if not game:
-            return jsonify({'error': 'Game not found'}), 404
-        chess_game = game_logic.ChessGame(game_id, game['board_state'])
-        active_games[game_id] = chess_game
-    else:
-        chess_game = active_games[game_id]
+    chess_game = load_chess_game(game_id)
+    if not chess_game:
+        return jsonify({'error': 'Game not found'}), 404
     
     result = chess_game.resign(color)
     
     # Atualiza no banco
-    models.update_game(
+    move_journal.save_state(
         game_id,
         chess_game.get_board_state(),
         chess_game.get_current_turn(),
         result['status'],
         result['winner']
     )
+    active_games.finish(game_id)
     
     return jsonify({
         'message': f'{color} resigned',
@@ -252,11 +253,11 @@ def resign_game(game_id):
 def get_move_history(game_id):
     """Retorna o histórico completo de movimentos"""
     
-    game = models.get_game(game_id)
+    game = move_journal.load_game(game_id)
     if not game:
         return jsonify({'error': 'Game not found'}), 404
     
-    moves = models.get_game_moves(game_id)
+    moves = move_journal.load_moves(game_id)
     
     move_list = []
     for move in moves:
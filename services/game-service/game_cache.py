@@ -0,0 +1,116 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Máximo de partidas em memória e tempo (s) sem acesso antes de sair do cache
+GAME_CACHE_SIZE = int(os.environ.get('GAME_CACHE_SIZE', 1000))
+GAME_CACHE_IDLE_TTL = float(os.environ.get('GAME_CACHE_IDLE_TTL', 1800))
+# Partidas encerradas ficam só mais um pouco (para a última consulta do frontend)
+GAME_CACHE_FINISHED_TTL = float(os.environ.get('GAME_CACHE_FINISHED_TTL', 60))
+
+# Estimativa de memória (medida com tracemalloc no python-chess 1.999):
+# um chess.Board vazio ocupa ~700 bytes e cada lance na pilha ~500 bytes
+BOARD_BASE_BYTES = 700
+BYTES_PER_MOVE = 500
+
+def estimate_size(chess_game):
+    """Bytes aproximados de um ChessGame (tabuleiro + pilha de lances)"""
+    return BOARD_BASE_BYTES + sys.getsizeof(chess_game.game_id) + BYTES_PER_MOVE * len(chess_game.board.move_stack)
+
+class GameCache:
+    """
+    Cache LRU das partidas ativas (ChessGame por game_id), limitado em
+    quantidade e em tempo ocioso. Partidas encerradas saem depois de
+    `finished_ttl`. O banco continua sendo a fonte da verdade: quem não
+    achar a partida aqui a recria a partir do FEN salvo.
+    """
+
+    def __init__(self, max_size=1000, idle_ttl=1800, finished_ttl=60):
+        self.max_size = max(1, max_size)
+        self.idle_ttl = idle_ttl
+        self.finished_ttl = finished_ttl
+        self._games = OrderedDict()
+        self._last_access = {}
+        self._finished_at = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = {'size': 0, 'idle': 0, 'finished': 0}
+
+    def get(self, game_id):
+        """Retorna a partida (marcando o acesso) ou None"""
+        with self._lock:
+            self._expire(time.monotonic())
+            chess_game = self._games.get(game_id)
+            if chess_game is None:
+                self.misses += 1
+                return None
+            self._games.move_to_end(game_id)
+            self._last_access[game_id] = time.monotonic()
+            self.hits += 1
+            return chess_game
+
+    def put(self, game_id, chess_game):
+        """Adiciona a partida, descartando as menos usadas se passar do limite"""
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            self._games[game_id] = chess_game
+            self._games.move_to_end(game_id)
+            self._last_access[game_id] = now
+            if chess_game.is_game_over():
+                self._finished_at.setdefault(game_id, now)
+            while len(self._games) > self.max_size:
+                oldest, _ = self._games.popitem(last=False)
+                self._forget(oldest)
+                self.evictions['size'] += 1
+
+    def finish(self, game_id):
+        """Marca a partida como encerrada (xeque-mate, empate ou desistência)"""
+        with self._lock:
+            if game_id in self._games:
+                self._finished_at.setdefault(game_id, time.monotonic())
+
+    def _forget(self, game_id):
+        self._last_access.pop(game_id, None)
+        self._finished_at.pop(game_id, None)
+
+    def _expire(self, now):
+        """Remove partidas ociosas (do início da fila LRU) e encerradas vencidas"""
+        while self._games:
+            game_id = next(iter(self._games))
+            if now - self._last_access[game_id] < self.idle_ttl:
+                break
+            del self._games[game_id]
+            self._forget(game_id)
+            self.evictions['idle'] += 1
+
+        for game_id, finished_at in list(self._finished_at.items()):
+            if now - finished_at >= self.finished_ttl:
+                del self._games[game_id]
+                self._forget(game_id)
+                self.evictions['finished'] += 1
+
+    def __len__(self):
+        with self._lock:
+            return len(self._games)
+
+    def stats(self):
+        """Tamanho, memória estimada e contadores de acerto/descarte"""
+        with self._lock:
+            self._expire(time.monotonic())
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._games),
+                'max_size': self.max_size,
+                'finished': len(self._finished_at),
+                'approx_bytes': sum(estimate_size(g) for g in self._games.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': dict(self.evictions),
+                'idle_ttl': self.idle_ttl,
+                'finished_ttl': self.finished_ttl
+            }
@@ -1,21 +1,17 @@
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from datetime import datetime
-import json
-import os
+import db_pool
 
-# URL de conexao do banco de dados PostgreSQL (Neon)
-DATABASE_URL = os.environ.get('DATABASE_URL')
+# Status que encerram a partida (gravam vencedor e horario de termino)
+FINISHED_STATUSES = ['checkmate', 'stalemate', 'draw', 'resigned']
+
+class JournalRecordError(Exception):
+    """Registro do diario recusado pelo banco (nao adianta tentar de novo)"""
 
 def get_db():
-    """Retorna uma conexao com o banco de dados PostgreSQL"""
-    try:
-        conn = psycopg2.connect(DATABASE_URL)
-        conn.autocommit = False
-        return conn
-    except Exception as e:
-        print(f"Erro ao conectar ao PostgreSQL: {e}")
-        return None
+    """Retorna uma conexão do pool (devolvida com db_pool.release)"""
+    return db_pool.get_connection()
 
 def init_db():
     """Inicializa as tabelas do banco de dados se nao existirem"""
@@ -59,15 +55,23 @@ def init_db():
             )
         ''')
         
+        # Ultimo registro do diario de lances (write-behind) ja gravado
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS journal_checkpoint (
+                name TEXT PRIMARY KEY,
+                last_seq BIGINT NOT NULL
+            )
+        ''')
+        
         conn.commit()
         cursor.close()
-        conn.close()
+        db_pool.release(conn)
         print("Banco de dados de jogos inicializado com sucesso")
     except Exception as e:
         print(f"Erro ao inicializar o banco de dados: {e}")
         if conn:
             conn.rollback()
-            conn.close()
+            db_pool.release(conn)
 
 def create_game(game_id, mode, white_player_id, black_player_id, board_state):
     """Cria uma nova partida no banco de dados"""
@@ -86,13 +90,13 @@ def create_game(game_id, mode, white_player_id, black_player_id, board_state):
         
         conn.commit()
         cursor.close()
-        conn.close()
+        db_pool.release(conn)
         return game_id
     except Exception as e:
         print(f"Erro ao criar partida: {e}")
         if conn:
             conn.rollback()
-            conn.close()
+            db_pool.release(conn)
         return None
 
 def get_game(game_id):
@@ -106,12 +110,12 @@ def get_game(game_id):
         cursor.execute('SELECT * FROM games WHERE id = %s', (game_id,))
         game = cursor.fetchone()
         cursor.close()
-        conn.close()
+        db_pool.release(conn)
         return game
     except Exception as e:
         print(f"Erro ao buscar partida: {e}")
         if conn:
-            conn.close()
+            db_pool.release(conn)
         return None
 
 def update_game(game_id, board_state, current_turn, status, winner=None):
@@ -122,7 +126,7 @@ def update_game(game_id, board_state, current_turn, status, winner=None):
         
     try:
         cursor = conn.cursor()
-        if status in ['checkmate', 'stalemate', 'draw', 'resigned']:
+        if status in FINISHED_STATUSES:
             cursor.execute('''
                 UPDATE games 
                 SET board_state = %s, current_turn = %s, status = %s, 
@@ -138,12 +142,12 @@ def update_game(game_id, board_state, current_turn, status, winner=None):
         
         conn.commit()
         cursor.close()
-        conn.close()
+        db_pool.release(conn)
     except Exception as e:
         print(f"Erro ao atualizar partida: {e}")
         if conn:
             conn.rollback()
-            conn.close()
+            db_pool.release(conn)
 
 def add_move(game_id, from_square, to_square, piece, captured_piece, promotion, notation):
     """Adiciona um novo movimento ao historico da partida"""
@@ -161,12 +165,160 @@ def add_move(game_id, from_square, to_square, piece, captured_piece, promotion,
         
         conn.commit()
         cursor.close()
-        conn.close()
+        db_pool.release(conn)
     except Exception as e:
         print(f"Erro ao adicionar movimento: {e}")
         if conn:
             conn.rollback()
-            conn.close()
+            db_pool.release(conn)
+
+def apply_move(game_id, from_square, to_square, piece, captured_piece, promotion, notation,
+               board_state, current_turn, status, winner=None):
+    """
+    Registra o movimento e atualiza a partida numa unica transacao (um so
+    comando com CTE, uma ida ao banco): nunca fica um movimento gravado
+    sem o tabuleiro correspondente
+    """
+    conn = get_db()
+    if not conn:
+        return False
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            WITH new_move AS (
+                INSERT INTO moves (game_id, from_square, to_square, piece,
+                                   captured_piece, promotion, notation)
+                VALUES (%(game_id)s, %(from_square)s, %(to_square)s, %(piece)s,
+                        %(captured_piece)s, %(promotion)s, %(notation)s)
+                RETURNING game_id
+            )
+            UPDATE games
+            SET board_state = %(board_state)s, current_turn = %(current_turn)s,
+                status = %(status)s,
+                winner = CASE WHEN %(finished)s THEN %(winner)s ELSE winner END,
+                finished_at = CASE WHEN %(finished)s THEN CURRENT_TIMESTAMP ELSE finished_at END
+            WHERE id = (SELECT game_id FROM new_move)
+        ''', {
+            'game_id': game_id,
+            'from_square': from_square,
+            'to_square': to_square,
+            'piece': piece,
+            'captured_piece': captured_piece,
+            'promotion': promotion,
+            'notation': notation,
+            'board_state': board_state,
+            'current_turn': current_turn,
+            'status': status,
+            'winner': winner,
+            'finished': status in FINISHED_STATUSES
+        })
+
+        conn.commit()
+        cursor.close()
+        db_pool.release(conn)
+        return True
+    except Exception as e:
+        print(f"Erro ao registrar movimento: {e}")
+        if conn:
+            conn.rollback()
+            db_pool.release(conn)
+        return False
+
+def get_journal_checkpoint(journal_name):
+    """Ultimo seq do diario ja gravado (0 se nunca gravou; None se o banco estiver indisponivel)"""
+    conn = get_db()
+    if not conn:
+        return None
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT last_seq FROM journal_checkpoint WHERE name = %s', (journal_name,))
+        row = cursor.fetchone()
+        cursor.close()
+        db_pool.release(conn)
+        return row[0] if row else 0
+    except Exception as e:
+        print(f"Erro ao ler checkpoint do diario de lances: {e}")
+        db_pool.release(conn)
+        return None
+
+def apply_journal_batch(journal_name, records):
+    """
+    Grava um lote do diario de lances numa unica transacao: insere os
+    lances, aplica o estado mais recente de cada partida e avanca o
+    checkpoint. Registros ja cobertos pelo checkpoint (reenviados apos
+    um restart) sao ignorados. Retorna False se o banco estiver
+    indisponivel e levanta JournalRecordError se algum registro for
+    recusado (violacao de FK, dado invalido).
+    """
+    conn = get_db()
+    if not conn:
+        return False
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO journal_checkpoint (name, last_seq) VALUES (%s, 0)
+            ON CONFLICT (name) DO NOTHING
+        ''', (journal_name,))
+        cursor.execute(
+            'SELECT last_seq FROM journal_checkpoint WHERE name = %s FOR UPDATE',
+            (journal_name,)
+        )
+        last_seq = cursor.fetchone()[0]
+        records = [r for r in records if r['seq'] > last_seq]
+
+        if records:
+            moves = [
+                (r['game_id'], r['move']['from_square'], r['move']['to_square'], r['move']['piece'],
+                 r['move']['captured_piece'], r['move']['promotion'], r['move']['notation'], r['timestamp'])
+                for r in records if r.get('move')
+            ]
+            if moves:
+                execute_values(cursor, '''
+                    INSERT INTO moves (game_id, from_square, to_square, piece,
+                                       captured_piece, promotion, notation, timestamp)
+                    VALUES %s
+                ''', moves, template='(%s, %s, %s, %s, %s, %s, %s, %s::timestamp)')
+
+            # So o estado mais recente de cada partida precisa ir para o banco
+            latest = {}
+            for r in records:
+                latest[r['game_id']] = r
+            execute_values(cursor, '''
+                UPDATE games AS g
+                SET board_state = v.board_state, current_turn = v.current_turn,
+                    status = v.status,
+                    winner = CASE WHEN v.finished THEN v.winner ELSE g.winner END,
+                    finished_at = CASE WHEN v.finished THEN v.updated_at ELSE g.finished_at END
+                FROM (VALUES %s) AS v(id, board_state, current_turn, status, winner, finished, updated_at)
+                WHERE g.id = v.id
+            ''', [
+                (r['game_id'], r['board_state'], r['current_turn'], r['status'],
+                 r['winner'], r['finished'], r['timestamp'])
+                for r in latest.values()
+            ], template='(%s, %s, %s, %s, %s::text, %s::boolean, %s::timestamp)')
+
+            cursor.execute(
+                'UPDATE journal_checkpoint SET last_seq = %s WHERE name = %s',
+                (records[-1]['seq'], journal_name)
+            )
+
+        conn.commit()
+        cursor.close()
+        db_pool.release(conn)
+        return True
+    except (psycopg2.IntegrityError, psycopg2.DataError, KeyError, TypeError) as e:
+        conn.rollback()
+        db_pool.release(conn)
+        raise JournalRecordError(str(e)) from e
+    except Exception as e:
+        print(f"Erro ao gravar lote do diario de lances: {e}")
+        if conn:
+            conn.rollback()
+            db_pool.release(conn)
+        return False
 
 def get_game_moves(game_id):
     """Retorna a lista de movimentos de uma partida especifica"""
@@ -183,10 +335,10 @@ def get_game_moves(game_id):
         ''', (game_id,))
         moves = cursor.fetchall()
         cursor.close()
-        conn.close()
+        db_pool.release(conn)
         return moves
     except Exception as e:
         print(f"Erro ao buscar movimentos: {e}")
         if conn:
-            conn.close()
+            db_pool.release(conn)
         return []
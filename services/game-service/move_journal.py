@@ -0,0 +1,388 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+import models
+
+# Modo de gravação dos lances: "sync" (direto no Postgres, na requisição) ou
+# "journal" (write-behind: diário local em disco + gravação em lote)
+MOVE_WRITE_MODE = os.environ.get('MOVE_WRITE_MODE', 'sync')
+# Arquivo do diário e nome dele no checkpoint do banco (um por processo).
+# Obrigatórios no modo journal: o arquivo precisa estar num disco que
+# sobreviva ao restart e o nome precisa ser estável entre deploys
+MOVE_JOURNAL_PATH = os.environ.get('MOVE_JOURNAL_PATH')
+MOVE_JOURNAL_NAME = os.environ.get('MOVE_JOURNAL_NAME')
+# Intervalo (s) entre gravações em lote no Postgres e tamanho máximo do lote
+MOVE_JOURNAL_FLUSH_INTERVAL = float(os.environ.get('MOVE_JOURNAL_FLUSH_INTERVAL', 0.5))
+MOVE_JOURNAL_BATCH_SIZE = int(os.environ.get('MOVE_JOURNAL_BATCH_SIZE', 500))
+# Janela (s) em que escritas concorrentes se juntam num único fsync
+MOVE_JOURNAL_FSYNC_DELAY = float(os.environ.get('MOVE_JOURNAL_FSYNC_DELAY', 0.002))
+# Tentativas de ler o checkpoint do banco na inicialização
+MOVE_JOURNAL_CHECKPOINT_RETRIES = int(os.environ.get('MOVE_JOURNAL_CHECKPOINT_RETRIES', 5))
+# Registros recusados pelo banco (ex.: partida inexistente) saem do diário para cá
+MOVE_JOURNAL_DEAD_LETTER_PATH = os.environ.get('MOVE_JOURNAL_DEAD_LETTER_PATH')
+
+class MoveJournal:
+    """
+    Diário write-behind dos lances. Cada registro (lance + novo estado da
+    partida) é anexado ao arquivo e só é confirmado depois do fsync, que é
+    compartilhado entre as escritas concorrentes (group commit). Uma thread
+    grava os registros pendentes em lote no Postgres, junto com o
+    checkpoint do diário, e compacta o arquivo; ao reiniciar, o que ainda
+    estiver no arquivo é reenviado e o checkpoint descarta o que já foi
+    gravado. Se o banco recusar um lote, os registros são regravados um a
+    um e os recusados vão para o arquivo de dead letters, para não travar
+    o diário.
+    """
+
+    def __init__(self, path, name, flush_interval=0.5, batch_size=500, fsync_delay=0.002, dead_letter_path=None):
+        self.path = path
+        self.name = name
+        self.dead_letter_path = dead_letter_path or path + '.dead'
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        self.fsync_delay = fsync_delay
+        self._file = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._sync_cond = threading.Condition()
+        self._syncing = False
+        self._seq = 0
+        self._written = 0
+        self._synced = 0
+        self._pending = []
+        self._latest = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self.appended = 0
+        self.fsyncs = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.flush_failures = 0
+        self.consecutive_failures = 0
+        self.quarantined = 0
+        self.replayed = 0
+
+    def start(self, checkpoint=0):
+        """
+        Reenvia o que sobrou no diário e inicia a thread de gravação. Os seqs
+        novos partem do checkpoint do banco: com o diário vazio e o relógio
+        atrasado, lances novos não podem parecer já gravados
+        """
+        self._seq = checkpoint
+        self._replay()
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._thread = threading.Thread(target=self._flush_loop, name='move-journal', daemon=True)
+        self._thread.start()
+        print(f"📒 Move journal started at {self.path} ({len(self._pending)} pending)")
+        return self
+
+    def _replay(self):
+        """Carrega os registros ainda não confirmados no banco"""
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Última linha cortada por uma queda antes do fsync
+                        continue
+                    self._pending.append(record)
+                    self._latest[record['game_id']] = record
+                    self._seq = max(self._seq, record['seq'])
+        self._written = self._synced = self._seq
+        self.replayed = len(self._pending)
+
+    def _next_seq(self):
+        # Baseado no relógio para continuar crescendo depois de um restart com diário vazio
+        self._seq = max(self._seq + 1, time.time_ns() // 1000)
+        return self._seq
+
+    def append(self, record):
+        """Anexa um registro e retorna depois que ele estiver em disco"""
+        with self._lock:
+            record['seq'] = self._next_seq()
+            self._file.write(json.dumps(record) + '\n')
+            self._pending.append(record)
+            self._latest[record['game_id']] = record
+            self._written = record['seq']
+            self.appended += 1
+        self._sync(record['seq'])
+        return record['seq']
+
+    def _acquire_sync(self, seq=None):
+        """Vira o responsável pelo fsync; False se outro já cobriu `seq`"""
+        with self._sync_cond:
+            while self._syncing and (seq is None or self._synced < seq):
+                self._sync_cond.wait()
+            if seq is not None and self._synced >= seq:
+                return False
+            self._syncing = True
+            return True
+
+    def _release_sync(self, synced):
+        with self._sync_cond:
+            self._syncing = False
+            self._synced = max(self._synced, synced)
+            self._sync_cond.notify_all()
+
+    def _sync(self, seq):
+        """Group commit: um fsync confirma todas as escritas feitas até ele"""
+        if not self._acquire_sync(seq):
+            return
+        target = 0
+        try:
+            if self.fsync_delay:
+                time.sleep(self.fsync_delay)
+            with self._lock:
+                target = self._written
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            self.fsyncs += 1
+        finally:
+            self._release_sync(target)
+
+    def flush(self):
+        """Grava um lote de registros pendentes no Postgres; retorna quantos"""
+        with self._flush_lock:
+            with self._lock:
+                batch = self._pending[:self.batch_size]
+            if not batch:
+                return 0
+
+            try:
+                applied = models.apply_journal_batch(self.name, batch)
+            except models.JournalRecordError:
+                # Algum registro é recusado: isola-o gravando um a um
+                batch = batch[:self._apply_one_by_one(batch)]
+                applied = bool(batch)
+
+            if not applied:
+                self.flush_failures += 1
+                self.consecutive_failures += 1
+                return 0
+            self.consecutive_failures = 0
+
+            last_seq = batch[-1]['seq']
+            with self._lock:
+                del self._pending[:len(batch)]
+                for record in batch:
+                    latest = self._latest.get(record['game_id'])
+                    if latest is not None and latest['seq'] <= last_seq:
+                        del self._latest[record['game_id']]
+            self.flushed += len(batch)
+            self.flushes += 1
+            self._compact()
+            return len(batch)
+
+    def _apply_one_by_one(self, batch):
+        """
+        Grava os registros do lote individualmente, mandando os recusados
+        para o dead letter. Para no primeiro erro de conexão e retorna
+        quantos registros do início do lote foram resolvidos
+        """
+        done = 0
+        for record in batch:
+            try:
+                if not models.apply_journal_batch(self.name, [record]):
+                    break
+            except models.JournalRecordError as e:
+                self._quarantine(record, e)
+            done += 1
+        return done
+
+    def _quarantine(self, record, error):
+        """Anexa o registro recusado (com o erro) ao arquivo de dead letters"""
+        with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'error': str(error), 'journal': self.name, 'record': record}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.quarantined += 1
+        print(f"⚠️ Move journal record {record['seq']} for game {record['game_id']} rejected: {error}")
+
+    def _compact(self):
+        """Reescreve o diário só com os registros ainda pendentes"""
+        self._acquire_sync()
+        synced = 0
+        try:
+            with self._lock:
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as tmp:
+                    for record in self._pending:
+                        tmp.write(json.dumps(record) + '\n')
+                    tmp.flush()
+                    os.fsync(tmp.fileno())
+                self._file.close()
+                os.replace(tmp_path, self.path)
+                self._file = open(self.path, 'a', encoding='utf-8')
+                synced = self._written
+        finally:
+            self._release_sync(synced)
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                # Esvazia o acumulado em lotes antes de dormir de novo
+                while self.flush() == self.batch_size:
+                    pass
+            except Exception as e:
+                self.flush_failures += 1
+                print(f"Erro ao gravar o diário de lances: {e}")
+
+    def latest_state(self, game_id):
+        """Estado mais recente ainda não gravado no banco (ou None)"""
+        with self._lock:
+            return self._latest.get(game_id)
+
+    def pending_moves(self, game_id):
+        """Lances da partida que ainda estão só no diário"""
+        with self._lock:
+            return [r for r in self._pending if r['game_id'] == game_id and r.get('move')]
+
+    def stats(self):
+        """Métricas do diário"""
+        with self._lock:
+            pending = len(self._pending)
+            oldest = self._pending[0]['timestamp'] if self._pending else None
+        return {
+            'mode': 'journal',
+            'path': self.path,
+            'pending': pending,
+            'appended': self.appended,
+            'fsyncs': self.fsyncs,
+            'flushed': self.flushed,
+            'flushes': self.flushes,
+            'flush_failures': self.flush_failures,
+            'consecutive_failures': self.consecutive_failures,
+            'oldest_pending_age': round((datetime.utcnow() - datetime.fromisoformat(oldest)).total_seconds(), 1) if oldest else 0.0,
+            'quarantined': self.quarantined,
+            'dead_letter_path': self.dead_letter_path,
+            'replayed': self.replayed
+        }
+
+    def close(self):
+        """Para a thread e tenta gravar tudo o que estiver pendente"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        try:
+            while self.flush():
+                pass
+        except Exception as e:
+            print(f"Erro ao gravar o diário de lances: {e}")
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+_journal = None
+
+def start():
+    """Ativa o diário quando MOVE_WRITE_MODE=journal"""
+    global _journal
+    if MOVE_WRITE_MODE == 'journal' and _journal is None:
+        if not MOVE_JOURNAL_PATH or not MOVE_JOURNAL_NAME:
+            raise RuntimeError('MOVE_WRITE_MODE=journal requires MOVE_JOURNAL_PATH and MOVE_JOURNAL_NAME')
+
+        checkpoint = None
+        for attempt in range(MOVE_JOURNAL_CHECKPOINT_RETRIES):
+            checkpoint = models.get_journal_checkpoint(MOVE_JOURNAL_NAME)
+            if checkpoint is not None:
+                break
+            time.sleep(2 ** attempt)
+        if checkpoint is None:
+            # Sem o checkpoint não dá para numerar lances novos com segurança
+            raise RuntimeError('Could not read the move journal checkpoint from the database')
+
+        _journal = MoveJournal(
+            MOVE_JOURNAL_PATH,
+            MOVE_JOURNAL_NAME,
+            flush_interval=MOVE_JOURNAL_FLUSH_INTERVAL,
+            batch_size=MOVE_JOURNAL_BATCH_SIZE,
+            fsync_delay=MOVE_JOURNAL_FSYNC_DELAY,
+            dead_letter_path=MOVE_JOURNAL_DEAD_LETTER_PATH
+        ).start(checkpoint)
+    return _journal
+
+def stop():
+    """Encerra o diário gravando o que estiver pendente"""
+    global _journal
+    if _journal is not None:
+        _journal.close()
+        _journal = None
+
+def _state_record(game_id, board_state, current_turn, status, winner, move=None):
+    return {
+        'game_id': game_id,
+        'board_state': board_state,
+        'current_turn': current_turn,
+        'status': status,
+        'winner': winner,
+        'finished': status in models.FINISHED_STATUSES,
+        'timestamp': datetime.utcnow().isoformat(),
+        'move': move
+    }
+
+def save_move(game_id, from_square, to_square, piece, captured_piece, promotion, notation,
+              board_state, current_turn, status, winner=None):
+    """Grava o lance e o novo estado (no diário ou direto no banco)"""
+    if _journal is None:
+        return models.apply_move(
+            game_id, from_square, to_square, piece, captured_piece, promotion, notation,
+            board_state, current_turn, status, winner
+        )
+
+    _journal.append(_state_record(game_id, board_state, current_turn, status, winner, move={
+        'from_square': from_square,
+        'to_square': to_square,
+        'piece': piece,
+        'captured_piece': captured_piece,
+        'promotion': promotion,
+        'notation': notation
+    }))
+    return True
+
+def save_state(game_id, board_state, current_turn, status, winner=None):
+    """
+    Atualiza só o estado da partida. No modo diário passa pelo diário para
+    não ser sobrescrito por um lance mais antigo ainda pendente
+    """
+    if _journal is None:
+        return models.update_game(game_id, board_state, current_turn, status, winner)
+
+    _journal.append(_state_record(game_id, board_state, current_turn, status, winner))
+    return True
+
+def load_game(game_id):
+    """models.get_game com o estado pendente do diário por cima"""
+    game = models.get_game(game_id)
+    if game is None or _journal is None:
+        return game
+
+    latest = _journal.latest_state(game_id)
+    if latest is not None:
+        game = dict(game)
+        game['board_state'] = latest['board_state']
+        game['current_turn'] = latest['current_turn']
+        game['status'] = latest['status']
+        if latest['finished']:
+            game['winner'] = latest['winner']
+    return game
+
+def load_moves(game_id):
+    """models.get_game_moves mais os lances que ainda estão só no diário"""
+    moves = models.get_game_moves(game_id)
+    if _journal is None:
+        return moves
+
+    pending = [
+        dict(record['move'], game_id=game_id, timestamp=record['timestamp'])
+        for record in _journal.pending_moves(game_id)
+    ]
+    return list(moves) + pending
+
+def stats():
+    """Métricas da gravação de lances"""
+    if _journal is None:
+        return {'mode': 'sync'}
+    return _journal.stats()
@@ -0,0 +1,247 @@
+import chess
+import chess.engine
+import chess.pgn
+import io
+import math
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import models
+
+# Profundidade fixa usada em cada posição da partida
+ANALYSIS_DEPTH = int(os.environ.get('ANALYSIS_DEPTH', 12))
+# Quantidade de partidas analisadas em paralelo (um Stockfish por worker)
+ANALYSIS_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', 2))
+# Analisa automaticamente toda partida salva com PGN
+ANALYSIS_AUTO = os.environ.get('ANALYSIS_AUTO', 'true').lower() == 'true'
+
+# Score usado para converter mates em centipeões
+MATE_SCORE = 10000
+# Perda máxima considerada por lance (evita que um mate distorça a média)
+MAX_CP_LOSS = 1000
+
+# Limiares de perda em centipeões para classificar os lances
+INACCURACY_THRESHOLD = 50
+MISTAKE_THRESHOLD = 100
+BLUNDER_THRESHOLD = 300
+
+def find_stockfish():
+    """Procura pelo executável do Stockfish"""
+    env_path = os.environ.get('STOCKFISH_PATH')
+    if env_path and os.path.exists(env_path):
+        return env_path
+    for path in ['/usr/games/stockfish', '/usr/local/bin/stockfish', 'stockfish']:
+        if shutil.which(path):
+            return shutil.which(path)
+    return None
+
+_engine_path = find_stockfish()
+_executor = ThreadPoolExecutor(max_workers=max(1, ANALYSIS_WORKERS), thread_name_prefix='analysis')
+_local = threading.local()
+_in_flight = set()
+_lock = threading.Lock()
+# Processos Stockfish de todas as threads do pool, encerrados por shutdown()
+_engines = set()
+_closing = False
+
+def is_available():
+    """Verifica se há Stockfish para rodar as análises"""
+    return _engine_path is not None
+
+def _get_engine():
+    """Cada thread do pool mantém seu próprio processo Stockfish"""
+    engine = getattr(_local, 'engine', None)
+    if engine is None:
+        engine = chess.engine.SimpleEngine.popen_uci(_engine_path)
+        _local.engine = engine
+        with _lock:
+            _engines.add(engine)
+    return engine
+
+def _discard_engine():
+    """Descarta o Stockfish da thread (usado quando o processo falha)"""
+    engine = getattr(_local, 'engine', None)
+    _local.engine = None
+    if engine is not None:
+        with _lock:
+            _engines.discard(engine)
+        try:
+            engine.close()
+        except Exception:
+            pass
+
+def shutdown():
+    """
+    Encerra o pool e os processos Stockfish de todas as threads (na saída
+    do serviço). As análises interrompidas continuam pendentes no banco e
+    voltam à fila no próximo start (resume_pending).
+    """
+    global _closing
+    _closing = True
+    _executor.shutdown(wait=False, cancel_futures=True)
+    with _lock:
+        engines = list(_engines)
+        _engines.clear()
+    for engine in engines:
+        try:
+            engine.quit()
+        except Exception:
+            try:
+                engine.close()
+            except Exception:
+                pass
+    if engines:
+        print(f"🔴 {len(engines)} Stockfish analysis engine(s) closed")
+
+def submit(game_id):
+    """
+    Enfileira a análise de uma partida no pool em background.
+    Retorna False se a partida já está sendo analisada.
+    """
+    with _lock:
+        if game_id in _in_flight:
+            return False
+        _in_flight.add(game_id)
+
+    models.set_analysis_status(game_id, 'pending', ANALYSIS_DEPTH)
+    _executor.submit(_run, game_id)
+    return True
+
+def resume_pending():
+    """Reenfileira as análises que não terminaram antes do último restart"""
+    if not is_available():
+        return
+    for game_id in models.get_unfinished_analyses():
+        submit(game_id)
+
+def _run(game_id):
+    """Job executado no pool: analisa a partida e grava o resultado"""
+    try:
+        if not is_available():
+            raise RuntimeError('Stockfish not available')
+
+        game = models.get_game_history(game_id)
+        if not game or not game.get('pgn'):
+            raise ValueError('Game has no PGN to analyze')
+
+        models.set_analysis_status(game_id, 'running', ANALYSIS_DEPTH)
+        try:
+            summary, moves = analyze_pgn(game['pgn'], ANALYSIS_DEPTH, game_key=game_id)
+        except chess.engine.EngineError:
+            _discard_engine()
+            raise
+        models.save_analysis(game_id, ANALYSIS_DEPTH, summary, moves)
+        print(f"🔎 Analysis completed for game {game_id}")
+    except Exception as e:
+        if _closing:
+            # Engine encerrado pelo shutdown: fica 'running' e é retomada no restart
+            print(f"Análise da partida {game_id} interrompida pelo shutdown")
+            return
+        print(f"Erro ao analisar partida {game_id}: {e}")
+        models.set_analysis_status(game_id, 'failed', error=str(e))
+    finally:
+        with _lock:
+            _in_flight.discard(game_id)
+
+def _evaluate(engine, board, depth, game_key):
+    """
+    Avalia a posição (ponto de vista das brancas) e retorna o melhor lance.
+    Usa o mesmo `game` em todas as posições para o Stockfish reaproveitar a
+    tabela hash da busca anterior em vez de recomeçar do zero.
+    """
+    with engine.analysis(board, chess.engine.Limit(depth=depth), game=game_key) as analysis:
+        analysis.wait()
+        info = analysis.info
+
+    score = info.get('score')
+    pv = info.get('pv') or []
+    return (
+        score.white().score(mate_score=MATE_SCORE) if score is not None else 0,
+        pv[0] if pv else None
+    )
+
+def _win_percent(cp):
+    """Converte centipeões em chance de vitória (0-100)"""
+    return 50 + 50 * (2 / (1 + math.exp(-0.00368208 * cp)) - 1)
+
+def _move_accuracy(win_before, win_after):
+    """Precisão do lance a partir da queda na chance de vitória"""
+    accuracy = 103.1668 * math.exp(-0.04354 * (win_before - win_after)) - 3.1669
+    return max(0.0, min(100.0, accuracy))
+
+def _classify(cp_loss):
+    if cp_loss >= BLUNDER_THRESHOLD:
+        return 'blunder'
+    if cp_loss >= MISTAKE_THRESHOLD:
+        return 'mistake'
+    if cp_loss >= INACCURACY_THRESHOLD:
+        return 'inaccuracy'
+    return None
+
+def analyze_pgn(pgn, depth=ANALYSIS_DEPTH, game_key=None):
+    """
+    Reproduz o PGN e calcula, para cada lance, a avaliação, a perda em
+    centipeões, a precisão e a classificação (imprecisão/erro/blunder).
+    Cada posição é avaliada uma única vez: a avaliação depois do lance N
+    é a avaliação antes do lance N+1.
+    """
+    game = chess.pgn.read_game(io.StringIO(pgn))
+    if game is None:
+        raise ValueError('Invalid PGN')
+
+    engine = _get_engine()
+    board = game.board()
+    eval_before, best_move = _evaluate(engine, board, depth, game_key)
+
+    moves = []
+    for ply, move in enumerate(game.mainline_moves(), start=1):
+        mover = board.turn
+        san = board.san(move)
+        best_san = board.san(best_move) if best_move else None
+        board.push(move)
+
+        if board.is_checkmate():
+            eval_after, next_best = (MATE_SCORE if mover == chess.WHITE else -MATE_SCORE), None
+        elif board.is_game_over():
+            eval_after, next_best = 0, None
+        else:
+            eval_after, next_best = _evaluate(engine, board, depth, game_key)
+
+        # Perspectiva de quem jogou o lance
+        sign = 1 if mover == chess.WHITE else -1
+        cp_loss = min(MAX_CP_LOSS, max(0, sign * (eval_before - eval_after)))
+        accuracy = _move_accuracy(_win_percent(sign * eval_before), _win_percent(sign * eval_after))
+
+        moves.append({
+            'ply': ply,
+            'color': 'white' if mover == chess.WHITE else 'black',
+            'move': move.uci(),
+            'san': san,
+            'best_move': best_move.uci() if best_move else None,
+            'best_san': best_san,
+            'evaluation': eval_after,
+            'cp_loss': cp_loss,
+            'accuracy': round(accuracy, 1),
+            'classification': _classify(cp_loss)
+        })
+
+        eval_before, best_move = eval_after, next_best
+
+    return _summarize(moves), moves
+
+def _summarize(moves):
+    """Consolida os lances em estatísticas por jogador"""
+    summary = {}
+    for color in ['white', 'black']:
+        player_moves = [m for m in moves if m['color'] == color]
+        count = len(player_moves)
+        summary[color] = {
+            'moves': count,
+            'avg_cp_loss': round(sum(m['cp_loss'] for m in player_moves) / count, 1) if count else 0.0,
+            'accuracy': round(sum(m['accuracy'] for m in player_moves) / count, 1) if count else 0.0,
+            'inaccuracies': sum(1 for m in player_moves if m['classification'] == 'inaccuracy'),
+            'mistakes': sum(1 for m in player_moves if m['classification'] == 'mistake'),
+            'blunders': sum(1 for m in player_moves if m['classification'] == 'blunder')
+        }
+    return summary
@@ -1,8 +1,12 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import models
+import db_pool
+import analysis
 from datetime import datetime
+import atexit
 import os
+import threading
 
 app = Flask(__name__)
 
@@ -13,11 +17,19 @@ CORS(app, origins=[
 ])
 
 models.init_db()
+analysis.resume_pending()
+
+# Encerra o pool de análise e os processos do Stockfish quando o serviço
+# termina. As threads do python-chess não são daemon e o atexit só roda
+# depois do join delas: o gancho do threading roda antes
+if hasattr(threading, '_register_atexit'):
+    threading._register_atexit(analysis.shutdown)
+atexit.register(analysis.shutdown)
 
 @app.route('/health', methods=['GET'])
 def health():
     """Endpoint para verificar se o serviço está funcionando"""
-    return jsonify({'status': 'History Service is running!'}), 200
+    return jsonify({'status': 'History Service is running!', 'db_pool': db_pool.stats()}), 200
 
 @app.route('/history/games', methods=['POST'])
 def save_game():
@@ -53,6 +65,10 @@ def save_game():
             pgn=data.get('pgn', '')
         )
         
+        # Análise pós-jogo roda em background, fora do caminho da requisição
+        if history_id and data.get('pgn') and analysis.ANALYSIS_AUTO and analysis.is_available():
+            analysis.submit(data['game_id'])
+        
         return jsonify({
             'success': True,
             'history_id': history_id,
@@ -128,6 +144,53 @@ def get_game_history(game_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/history/games/<game_id>/analysis', methods=['POST'])
+def request_game_analysis(game_id):
+    """Enfileira a análise pós-jogo de uma partida"""
+    if not analysis.is_available():
+        return jsonify({'error': 'Analysis engine not available'}), 503
+    
+    game = models.get_game_history(game_id)
+    if not game:
+        return jsonify({'error': 'Game not found'}), 404
+    if not game['pgn']:
+        return jsonify({'error': 'Game has no PGN to analyze'}), 400
+    
+    analysis.submit(game_id)
+    
+    return jsonify({
+        'game_id': game_id,
+        'status': 'pending'
+    }), 202
+
+@app.route('/history/games/<game_id>/analysis', methods=['GET'])
+def get_game_analysis(game_id):
+    """Retorna a análise pós-jogo (202 enquanto ainda está sendo calculada)"""
+    try:
+        result = models.get_analysis(game_id)
+        
+        if not result:
+            return jsonify({'error': 'Analysis not found'}), 404
+        
+        if result['status'] != 'completed':
+            return jsonify({
+                'game_id': game_id,
+                'status': result['status'],
+                'error': result['error']
+            }), 202 if result['status'] in ['pending', 'running'] else 200
+        
+        return jsonify({
+            'game_id': game_id,
+            'status': result['status'],
+            'depth': result['depth'],
+            'summary': result['summary'],
+            'moves': result['moves'],
+            'completed_at': result['completed_at']
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/history/users/<int:user_id>/stats', methods=['GET'])
 def get_user_stats_route(user_id):
     """Retorna estatísticas de um usuário"""
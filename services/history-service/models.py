@@ -1,20 +1,11 @@
-import psycopg2
 from psycopg2.extras import RealDictCursor
 from datetime import datetime
-import os
-
-# URL de conexao do banco de dados PostgreSQL (Neon)
-DATABASE_URL = os.environ.get('DATABASE_URL')
+import json
+import db_pool
 
 def get_db():
-    """Retorna uma conexao com o banco de dados PostgreSQL"""
-    try:
-        conn = psycopg2.connect(DATABASE_URL)
-        conn.autocommit = False
-        return conn
-    except Exception as e:
-        print(f"Erro ao conectar ao PostgreSQL: {e}")
-        return None
+    """Retorna uma conexão do pool (devolvida com db_pool.release)"""
+    return db_pool.get_connection()
 
 def init_db():
     """Inicializa o banco de dados e cria as tabelas e indices"""
@@ -42,6 +33,20 @@ def init_db():
             )
         ''')
         
+        # Tabela de analises pos-jogo (preenchida pelo worker de analise)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS game_analysis (
+                game_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                depth INTEGER,
+                summary TEXT,
+                moves TEXT,
+                error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                completed_at TIMESTAMP
+            )
+        ''')
+        
         # Indices para otimizacao de consultas
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_white_player ON game_history(white_player_id)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_black_player ON game_history(black_player_id)')
@@ -49,13 +54,13 @@ def init_db():
         
         conn.commit()
         cursor.close()
-        conn.close()
+        db_pool.release(conn)
         print("Banco de dados de historico inicializado com sucesso")
     except Exception as e:
         print(f"Erro ao inicializar o banco de dados: {e}")
         if conn:
             conn.rollback()
-            conn.close()
+            db_pool.release(conn)
 
 def save_game_history(game_id, mode, white_player_id, black_player_id, 
                      winner, status, moves_count, duration_seconds, pgn):
@@ -88,14 +93,14 @@ def save_game_history(game_id, mode, white_player_id, black_player_id,
         
         conn.commit()
         cursor.close()
-        conn.close()
+        db_pool.release(conn)
         return history_id
     
     except Exception as e:
         print(f"Erro ao salvar historico: {e}")
         if conn:
             conn.rollback()
-            conn.close()
+            db_pool.release(conn)
         return None
 
 def get_user_games(user_id, limit=20, offset=0):
@@ -115,12 +120,12 @@ def get_user_games(user_id, limit=20, offset=0):
         
         games = cursor.fetchall()
         cursor.close()
-        conn.close()
+        db_pool.release(conn)
         return games
     except Exception as e:
         print(f"Erro ao buscar partidas do usuario: {e}")
         if conn:
-            conn.close()
+            db_pool.release(conn)
         return []
 
 def get_game_history(game_id):
@@ -134,12 +139,12 @@ def get_game_history(game_id):
         cursor.execute('SELECT * FROM game_history WHERE game_id = %s', (game_id,))
         game = cursor.fetchone()
         cursor.close()
-        conn.close()
+        db_pool.release(conn)
         return game
     except Exception as e:
         print(f"Erro ao buscar detalhes da partida: {e}")
         if conn:
-            conn.close()
+            db_pool.release(conn)
         return None
 
 def get_user_stats(user_id):
@@ -160,7 +165,7 @@ def get_user_stats(user_id):
         total_games = cursor.fetchone()['total']
         
         if total_games == 0:
-            conn.close()
+            db_pool.release(conn)
             return {
                 'total_games': 0, 'wins': 0, 'losses': 0, 'draws': 0,
                 'win_rate': 0.0, 'ai_games': 0, 'avg_moves_per_game': 0.0,
@@ -215,7 +220,7 @@ def get_user_stats(user_id):
         total_time = cursor.fetchone()['total_time'] or 0
         
         cursor.close()
-        conn.close()
+        db_pool.release(conn)
         
         return {
             'total_games': total_games,
@@ -230,7 +235,7 @@ def get_user_stats(user_id):
     except Exception as e:
         print(f"Erro ao calcular estatisticas: {e}")
         if conn:
-            conn.close()
+            db_pool.release(conn)
         return {}
 
 def get_recent_games(limit=50):
@@ -249,10 +254,115 @@ def get_recent_games(limit=50):
         
         games = cursor.fetchall()
         cursor.close()
-        conn.close()
+        db_pool.release(conn)
         return games
     except Exception as e:
         print(f"Erro ao buscar jogos recentes: {e}")
         if conn:
-            conn.close()
+            db_pool.release(conn)
+        return []
+
+def set_analysis_status(game_id, status, depth=None, error=None):
+    """Cria ou atualiza o status da analise de uma partida"""
+    conn = get_db()
+    if not conn:
+        return False
+        
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO game_analysis (game_id, status, depth, error)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (game_id) DO UPDATE SET
+                status = EXCLUDED.status,
+                depth = COALESCE(EXCLUDED.depth, game_analysis.depth),
+                error = EXCLUDED.error
+        ''', (game_id, status, depth, error))
+        
+        conn.commit()
+        cursor.close()
+        db_pool.release(conn)
+        return True
+    except Exception as e:
+        print(f"Erro ao atualizar status da analise: {e}")
+        if conn:
+            conn.rollback()
+            db_pool.release(conn)
+        return False
+
+def save_analysis(game_id, depth, summary, moves):
+    """Salva o resultado completo da analise de uma partida"""
+    conn = get_db()
+    if not conn:
+        return False
+        
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO game_analysis (game_id, status, depth, summary, moves, completed_at)
+            VALUES (%s, 'completed', %s, %s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (game_id) DO UPDATE SET
+                status = 'completed',
+                depth = EXCLUDED.depth,
+                summary = EXCLUDED.summary,
+                moves = EXCLUDED.moves,
+                error = NULL,
+                completed_at = CURRENT_TIMESTAMP
+        ''', (game_id, depth, json.dumps(summary), json.dumps(moves)))
+        
+        conn.commit()
+        cursor.close()
+        db_pool.release(conn)
+        return True
+    except Exception as e:
+        print(f"Erro ao salvar analise: {e}")
+        if conn:
+            conn.rollback()
+            db_pool.release(conn)
+        return False
+
+def get_analysis(game_id):
+    """Busca a analise de uma partida, com resumo e lances ja decodificados"""
+    conn = get_db()
+    if not conn:
+        return None
+        
+    try:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        cursor.execute('SELECT * FROM game_analysis WHERE game_id = %s', (game_id,))
+        analysis = cursor.fetchone()
+        cursor.close()
+        db_pool.release(conn)
+        
+        if analysis:
+            analysis['summary'] = json.loads(analysis['summary']) if analysis['summary'] else None
+            analysis['moves'] = json.loads(analysis['moves']) if analysis['moves'] else []
+        return analysis
+    except Exception as e:
+        print(f"Erro ao buscar analise: {e}")
+        if conn:
+            db_pool.release(conn)
+        return None
+
+def get_unfinished_analyses():
+    """Retorna os IDs das analises que ficaram pendentes (ex: apos um restart)"""
+    conn = get_db()
+    if not conn:
+        return []
+        
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT game_id FROM game_analysis
+            WHERE status IN ('pending', 'running')
+            ORDER BY created_at ASC
+        ''')
+        rows = cursor.fetchall()
+        cursor.close()
+        db_pool.release(conn)
+        return [row[0] for row in rows]
+    except Exception as e:
+        print(f"Erro ao buscar analises pendentes: {e}")
+        if conn:
+            db_pool.release(conn)
         return []
@@ -1,27 +1,26 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import os
-import psycopg2
 from psycopg2.extras import RealDictCursor
+import db_pool
 
 app = Flask(__name__)
 CORS(app)
 
-DATABASE_URL = os.environ.get('DATABASE_URL')
 HISTORY_SERVICE_URL = os.environ.get('HISTORY_SERVICE_URL', 'http://localhost:8005')
 
-def get_db_connection():
-    return psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
-
 @app.route('/health', methods=['GET'])
 def health():
-    return jsonify({"status": "Recommendation Service is running!"}), 200
+    return jsonify({"status": "Recommendation Service is running!", "db_pool": db_pool.stats()}), 200
 
 @app.route('/recommendations/<int:user_id>', methods=['GET'])
 def get_recommendations(user_id):
+    conn = db_pool.get_connection()
+    if conn is None:
+        return jsonify({"error": "Database unavailable"}), 503
+
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
         query = """
             SELECT COUNT(*) as total,
             SUM(CASE WHEN (white_player_id=%s AND winner='white') 
@@ -35,7 +34,6 @@ def get_recommendations(user_id):
         cur.execute(query, (user_id, user_id, user_id, user_id))
         stats = cur.fetchone()
         cur.close()
-        conn.close()
 
         total = stats['total'] or 0
         wins = stats['wins'] or 0
@@ -75,6 +73,8 @@ def get_recommendations(user_id):
         }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    finally:
+        db_pool.release(conn)
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8006))
@@ -0,0 +1,198 @@
+import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
+import os
+import threading
+import time
+import weakref
+
+# Módulo compartilhado pelos serviços com banco (auth, game, history,
+# recommendation): o Dockerfile de cada um copia services/shared/db_pool.py
+
+# URL de conexao do banco de dados PostgreSQL (Neon)
+DATABASE_URL = os.environ.get('DATABASE_URL')
+
+# Conexões mantidas abertas (mínimo) e teto de conexões simultâneas
+DB_POOL_MIN = int(os.environ.get('DB_POOL_MIN', 1))
+DB_POOL_MAX = int(os.environ.get('DB_POOL_MAX', 10))
+# Tempo máximo (s) esperando uma conexão livre quando o pool está cheio
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 5))
+# Limite de cada query no servidor (ms, 0 = sem limite)
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 5000))
+# Conexões ociosas há mais que isso (s) são testadas com SELECT 1 antes do uso
+DB_HEALTH_CHECK_INTERVAL = float(os.environ.get('DB_HEALTH_CHECK_INTERVAL', 30))
+
+class _ConfiguredPool(psycopg2.pool.ThreadedConnectionPool):
+    """
+    ThreadedConnectionPool que aplica o statement_timeout em cada conexão
+    nova. Abre `minconn` conexões de início, mas mantém abertas até
+    `maxconn` (o original fecha toda devolução acima de `minconn`).
+    """
+
+    def _putconn(self, conn, key=None, close=False):
+        # O _putconn do psycopg2 só guarda a conexão devolvida enquanto o
+        # pool tiver menos de `minconn` ociosas e fecha as demais; aqui o
+        # teto é `maxconn`. Roda sob o lock do putconn, então a troca
+        # temporária do limite não é vista por outras threads.
+        minconn = self.minconn
+        self.minconn = self.maxconn
+        try:
+            super()._putconn(conn, key, close)
+        finally:
+            self.minconn = minconn
+
+    def _connect(self, key=None):
+        conn = super()._connect(key)
+        conn.autocommit = False
+        if DB_STATEMENT_TIMEOUT_MS:
+            # SET em vez do parâmetro `options`, que o pooler do Neon não aceita
+            cursor = conn.cursor()
+            cursor.execute('SET statement_timeout = %s', (DB_STATEMENT_TIMEOUT_MS,))
+            cursor.close()
+            conn.commit()
+        _last_used[conn] = time.monotonic()
+        _count('created')
+        return conn
+
+_pool = None
+_pool_lock = threading.Lock()
+# O ThreadedConnectionPool falha na hora quando esgota; o semáforo faz
+# quem chega depois esperar (até DB_POOL_TIMEOUT) por uma conexão livre
+_slots = threading.BoundedSemaphore(max(1, DB_POOL_MAX))
+# Último uso de cada conexão (some junto com a conexão descartada)
+_last_used = weakref.WeakKeyDictionary()
+_stats_lock = threading.Lock()
+_stats = {
+    'checkouts': 0,
+    'waits': 0,
+    'timeouts': 0,
+    'errors': 0,
+    'created': 0,
+    'discarded': 0,
+    'health_checks': 0,
+    'in_use': 0,
+    'wait_time': 0.0
+}
+
+def _count(name, value=1):
+    with _stats_lock:
+        _stats[name] += value
+
+def _get_pool():
+    """Cria o pool na primeira conexão pedida"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _ConfiguredPool(max(0, DB_POOL_MIN), max(1, DB_POOL_MAX), DATABASE_URL)
+    return _pool
+
+def _is_healthy(conn):
+    """Conexão aberta e, se ficou muito tempo ociosa, respondendo ao SELECT 1"""
+    if conn.closed:
+        return False
+    idle = time.monotonic() - _last_used.get(conn, 0)
+    if idle < DB_HEALTH_CHECK_INTERVAL:
+        return True
+    _count('health_checks')
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT 1')
+        cursor.close()
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+def get_connection():
+    """
+    Retira uma conexão do pool (autocommit desligado). Retorna None se o
+    banco estiver inacessível ou se nenhuma conexão ficar livre a tempo.
+    Toda conexão obtida aqui deve voltar com release().
+    """
+    started = time.monotonic()
+    if not _slots.acquire(blocking=False):
+        _count('waits')
+        if not _slots.acquire(timeout=DB_POOL_TIMEOUT):
+            _count('timeouts')
+            print(f"Pool de conexões esgotado ({DB_POOL_MAX} em uso)")
+            return None
+    _count('wait_time', time.monotonic() - started)
+
+    try:
+        pool = _get_pool()
+        conn = pool.getconn()
+        # Descarta conexões derrubadas pelo servidor e tenta outra
+        while not _is_healthy(conn):
+            _count('discarded')
+            pool.putconn(conn, close=True)
+            conn = pool.getconn()
+    except Exception as e:
+        _slots.release()
+        _count('errors')
+        print(f"Erro ao conectar ao PostgreSQL: {e}")
+        return None
+
+    _count('checkouts')
+    _count('in_use')
+    return conn
+
+def release(conn):
+    """Devolve a conexão ao pool, desfazendo transação pendente ou descartando-a se quebrou"""
+    if conn is None:
+        return
+    discard = conn.closed != 0
+    if not discard and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            discard = True
+    if discard:
+        _count('discarded')
+        _last_used.pop(conn, None)
+    else:
+        _last_used[conn] = time.monotonic()
+
+    try:
+        pool = _pool
+        if pool is None or pool.closed:
+            # Pool já fechado (encerramento): não recria, só fecha a conexão
+            if not conn.closed:
+                conn.close()
+        else:
+            pool.putconn(conn, close=discard)
+    except psycopg2.pool.PoolError:
+        # Fechado entre a checagem e o putconn
+        conn.close()
+    finally:
+        _count('in_use', -1)
+        _slots.release()
+
+def stats():
+    """Métricas de uso do pool (expostas no /health)"""
+    with _stats_lock:
+        counters = dict(_stats)
+    checkouts = counters['checkouts']
+    return {
+        'min_size': DB_POOL_MIN,
+        'max_size': DB_POOL_MAX,
+        'open': len(_pool._pool) + len(_pool._used) if _pool is not None else 0,
+        'in_use': counters['in_use'],
+        'checkouts': checkouts,
+        'waits': counters['waits'],
+        'timeouts': counters['timeouts'],
+        'errors': counters['errors'],
+        'created': counters['created'],
+        'discarded': counters['discarded'],
+        'health_checks': counters['health_checks'],
+        'avg_wait_ms': round(counters['wait_time'] / checkouts * 1000, 2) if checkouts else 0.0,
+        'statement_timeout_ms': DB_STATEMENT_TIMEOUT_MS
+    }
+
+def close():
+    """Fecha todas as conexões do pool"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None